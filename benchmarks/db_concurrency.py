@@ -0,0 +1,116 @@
+"""
+数据库并发基准测试：多个线程持续写入 LLM 追踪记录，同时多个线程读取列表和统计信息，
+输出写入与读取的吞吐量。
+
+用法：
+    python -m benchmarks.db_concurrency --writers 4 --readers 4 --duration 10
+    python -m benchmarks.db_concurrency --profile legacy   # 对比未调优的 SQLite 默认设置
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from kirara_ai.config.global_config import DatabaseConfig, GlobalConfig
+from kirara_ai.database import DatabaseManager
+from kirara_ai.events.event_bus import EventBus
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.llm.format.message import LLMChatMessage, LLMChatTextContent
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import LLMChatResponse, Message, Usage
+from kirara_ai.tracing import LLMTracer
+
+PROFILES = {
+    # 当前默认设置：WAL + synchronous=NORMAL + 单写连接 + 只读连接池
+    "tuned": DatabaseConfig(),
+    # 接近 SQLite 默认行为：回滚日志 + synchronous=FULL，不使用内存映射
+    "legacy": DatabaseConfig(wal=False, synchronous="FULL", mmap_size_mb=0, reader_pool_size=1),
+}
+
+
+def build_tracer(db_path: str, profile: str) -> LLMTracer:
+    config = GlobalConfig(database=PROFILES[profile])
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(GlobalConfig, config)
+    container.register(EventBus, EventBus())
+    db_manager = DatabaseManager(container, database_url=f"sqlite:///{db_path}")
+    db_manager.initialize()
+    container.register(DatabaseManager, db_manager)
+    tracer = LLMTracer(container)
+    tracer.initialize()
+    return tracer
+
+
+def run(writers: int, readers: int, duration: float, profile: str) -> None:
+    temp_dir = tempfile.mkdtemp()
+    tracer = build_tracer(os.path.join(temp_dir, "bench.db"), profile)
+    request = LLMChatRequest(
+        model="bench-model",
+        messages=[LLMChatMessage(role="user", content=[LLMChatTextContent(text="hello " * 200)])],
+    )
+    response = LLMChatResponse(
+        model="bench-model",
+        message=Message(role="assistant", content=[LLMChatTextContent(text="world " * 200)]),
+        usage=Usage(prompt_tokens=10, completion_tokens=20, total_tokens=30),
+    )
+
+    stop = threading.Event()
+    writes = [0] * writers
+    reads = [0] * readers
+    read_latency = [0.0] * readers
+
+    def write_loop(n: int):
+        while not stop.is_set():
+            trace_id = tracer.start_request_tracking(f"backend-{n % 2}", request)
+            tracer.complete_request_tracking(trace_id, request, response)
+            writes[n] += 1
+
+    def read_loop(n: int):
+        while not stop.is_set():
+            started = time.perf_counter()
+            if reads[n] % 2:
+                tracer.get_statistics()
+            else:
+                tracer.get_traces(filters={"backend_name": "backend-0"}, page_size=20)
+            read_latency[n] += time.perf_counter() - started
+            reads[n] += 1
+
+    threads = [threading.Thread(target=write_loop, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=read_loop, args=(n,)) for n in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    tracer.writer.flush()
+    elapsed = time.perf_counter() - started
+
+    total_reads = sum(reads)
+    print(f"profile={profile} writers={writers} readers={readers} duration={elapsed:.1f}s")
+    print(f"  traces written: {sum(writes)} ({sum(writes) / elapsed:.0f}/s)")
+    print(f"  dashboard reads: {total_reads} ({total_reads / elapsed:.0f}/s)")
+    if total_reads:
+        print(f"  avg read latency: {sum(read_latency) / total_reads * 1000:.2f} ms")
+
+    tracer.shutdown()
+    tracer.db_manager.shutdown()
+    shutil.rmtree(temp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="tuned")
+    args = parser.parse_args()
+    run(args.writers, args.readers, args.duration, args.profile)
+
+
+if __name__ == "__main__":
+    main()
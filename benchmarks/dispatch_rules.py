@@ -0,0 +1,150 @@
+"""
+调度规则匹配基准测试：注册大量前缀 / 关键词 / 正则 / 发送者组合规则，
+测量每条消息找到匹配规则的平均耗时。
+
+用法：
+    python -m benchmarks.dispatch_rules --rules 500 --messages 2000
+    python -m benchmarks.dispatch_rules --mode legacy   # 对比每条消息重新创建规则实例的旧实现
+    python -m benchmarks.dispatch_rules --mode linear   # 对比不使用索引、逐条检查已编译规则
+    python -m benchmarks.dispatch_rules --mode uncached # 对比使用索引但不缓存发送者条件的结果
+    python -m benchmarks.dispatch_rules --sender-only 200  # 额外注册只按发送者匹配、无法被索引预筛选的规则
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.sender import ChatSender
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.workflow.core.dispatch import CombinedDispatchRule, DispatchRuleRegistry
+from kirara_ai.workflow.core.dispatch.models.dispatch_rules import RuleGroup, SimpleDispatchRule
+from kirara_ai.workflow.core.workflow import WorkflowRegistry
+
+
+def build_rules(count: int, sender_only: int, rng: random.Random) -> List[CombinedDispatchRule]:
+    rules = []
+    for i in range(sender_only):
+        # 只限制发送者的规则对每条消息都是候选规则，基准测试中的发送者都不匹配
+        rules.append(CombinedDispatchRule(
+            rule_id=f"sender{i}",
+            name=f"Sender {i}",
+            workflow_id="bench:workflow",
+            priority=rng.randint(1, 10),
+            rule_groups=[RuleGroup(operator="and", rules=[
+                SimpleDispatchRule(type="chat_type", config={"chat_type": "群聊"}),
+                SimpleDispatchRule(type="sender", config={"sender_id": f"vip{i}", "sender_group": "group1"}),
+            ])],
+        ))
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            simple = SimpleDispatchRule(type="prefix", config={"prefix": f"/cmd{i}"})
+        elif kind == 1:
+            simple = SimpleDispatchRule(type="keyword", config={"keywords": [f"kw{i}a", f"kw{i}b"]})
+        elif kind == 2:
+            simple = SimpleDispatchRule(type="regex", config={"pattern": rf"^(?:run|exec)\s+task{i}\b"})
+        else:
+            simple = SimpleDispatchRule(type="prefix", config={"prefix": f"#{i} "})
+        groups = [RuleGroup(operator="or", rules=[simple])]
+        if rng.random() < 0.3:
+            # 部分规则额外限制发送者和聊天类型
+            groups.append(RuleGroup(operator="and", rules=[
+                SimpleDispatchRule(type="chat_type", config={"chat_type": "群聊"}),
+                SimpleDispatchRule(type="sender", config={"sender_id": f"user{i % 10}"}),
+            ]))
+        rules.append(CombinedDispatchRule(
+            rule_id=f"rule{i}",
+            name=f"Rule {i}",
+            workflow_id="bench:workflow",
+            priority=rng.randint(1, 10),
+            rule_groups=groups,
+        ))
+    return rules
+
+
+def build_messages(count: int, rule_count: int, rng: random.Random) -> List[IMMessage]:
+    messages = []
+    texts = [
+        "/cmd{} hello",
+        "something about kw{}b here",
+        "run task{} now",
+        "#{} note",
+    ]
+    for _ in range(count):
+        target = rng.randrange(rule_count)
+        if rng.random() < 0.2:
+            text = "plain chat message that matches nothing " * 3
+        else:
+            text = texts[target % 4].format(target)
+        sender = ChatSender.from_group_chat(f"user{target % 10}", "group1", "bench")
+        messages.append(IMMessage(sender=sender, message_elements=[TextMessage(text)]))
+    return messages
+
+
+def measure(name: str, messages: List[IMMessage], match: Callable[[IMMessage], object]) -> None:
+    start = time.perf_counter()
+    matched = sum(1 for message in messages if match(message) is not None)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {elapsed / len(messages) * 1e6:9.1f} us/message, {matched}/{len(messages)} matched")
+
+
+def run(rule_count: int, sender_only: int, message_count: int, mode: str, seed: int) -> None:
+    rng = random.Random(seed)
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    workflow_registry = WorkflowRegistry(container)
+    container.register(WorkflowRegistry, workflow_registry)
+    registry = DispatchRuleRegistry(container)
+    for rule in build_rules(rule_count, sender_only, rng):
+        registry.register(rule)
+    messages = build_messages(message_count, rule_count, rng)
+    print(f"{rule_count} rules, {sender_only} sender-only rules, {message_count} messages")
+
+    if mode in ("legacy", "all"):
+        def legacy(message: IMMessage):
+            # 旧实现：每条消息重新筛选、排序规则，并从配置重新创建每个规则实例
+            active = sorted((r for r in registry.rules.values() if r.enabled), key=lambda r: r.priority, reverse=True)
+            for rule in active:
+                rule.invalidate()
+                if rule.match(message, workflow_registry, container):
+                    return rule
+            return None
+        measure("legacy", messages, legacy)
+        # 恢复编译结果
+        for rule in registry.rules.values():
+            rule.compile(workflow_registry)
+
+    if mode in ("linear", "all"):
+        def linear(message: IMMessage):
+            for compiled in registry.get_matcher().rules:
+                if compiled.match(message, container):
+                    return compiled.rule
+            return None
+        measure("linear", messages, linear)
+
+    if mode in ("uncached", "all"):
+        def uncached(message: IMMessage):
+            for compiled in registry.get_matcher().candidates(message):
+                if compiled.match(message, container):
+                    return compiled.rule
+            return None
+        measure("uncached", messages, uncached)
+
+    if mode in ("indexed", "all"):
+        measure("indexed", messages, lambda message: registry.get_matcher().match(message, container))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--sender-only", type=int, default=0)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--mode", choices=["legacy", "linear", "uncached", "indexed", "all"], default="all")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.rules, args.sender_only, args.messages, args.mode, args.seed)
+
+
+if __name__ == "__main__":
+    main()
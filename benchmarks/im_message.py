@@ -0,0 +1,56 @@
+"""
+消息派生属性基准测试：模拟调度规则、消息构造和记忆组合器对同一条消息反复读取
+content / images / voices，并测量构造消息的耗时和单个文本元素占用的内存。
+
+用法：
+    python -m benchmarks.im_message --iterations 100000
+    python -m benchmarks.im_message --elements 8 --reads 20
+"""
+import argparse
+import sys
+import time
+
+from kirara_ai.im.message import IMMessage, MentionElement, TextMessage
+from kirara_ai.im.sender import ChatSender
+
+
+def build_message(elements: int) -> IMMessage:
+    sender = ChatSender.from_group_chat("user1", "group1", "bench")
+    message_elements = [MentionElement(ChatSender.get_bot_sender())]
+    message_elements += [TextMessage(f"line {i} of a busy group chat message") for i in range(elements - 1)]
+    return IMMessage(sender=sender, message_elements=message_elements)
+
+
+def run(iterations: int, elements: int, reads: int) -> None:
+    start = time.perf_counter()
+    messages = [build_message(elements) for _ in range(iterations)]
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for message in messages:
+        for _ in range(reads):
+            message.content
+            message.images
+            message.voices
+    access = time.perf_counter() - start
+
+    element = TextMessage("x")
+    size = sys.getsizeof(element)
+    if hasattr(element, "__dict__"):
+        size += sys.getsizeof(element.__dict__)
+    print(f"build: {build / iterations * 1e6:.2f} us/message")
+    print(f"{reads} reads: {access / iterations * 1e6:.2f} us/message")
+    print(f"TextMessage size: {size} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--elements", type=int, default=4)
+    parser.add_argument("--reads", type=int, default=10)
+    args = parser.parse_args()
+    run(args.iterations, args.elements, args.reads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+依赖注入基准测试：模拟每条消息调度时的容器操作——创建作用域容器、注册消息相关对象、
+多次解析全局对象，并构造带 @Inject 构造函数的对象，输出每次调度的平均耗时。
+
+用法：
+    python -m benchmarks.ioc_inject --iterations 100000
+    python -m benchmarks.ioc_inject --depth 3   # 嵌套作用域层数
+"""
+import argparse
+import time
+from typing import List
+
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.ioc.inject import Inject
+
+
+# 模拟全局服务
+class EventBus: ...
+class LLMManager: ...
+class MemoryManager: ...
+class MediaManager: ...
+class GlobalConfig: ...
+
+
+# 模拟每条消息的作用域对象
+class IMAdapter: ...
+class IMMessage: ...
+
+
+class Executor:
+    @Inject()
+    def __init__(
+        self,
+        container: DependencyContainer,
+        message: IMMessage,
+        event_bus: EventBus,
+        llm_manager: LLMManager,
+        memory_manager: MemoryManager,
+    ):
+        self.container = container
+        self.message = message
+        self.event_bus = event_bus
+        self.llm_manager = llm_manager
+        self.memory_manager = memory_manager
+
+
+GLOBAL_SERVICES: List[type] = [EventBus, LLMManager, MemoryManager, MediaManager, GlobalConfig]
+
+
+def build_container(depth: int) -> DependencyContainer:
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    for service in GLOBAL_SERVICES:
+        container.register(service, service())
+    # 额外的作用域层，模拟插件或子系统创建的嵌套作用域
+    for _ in range(depth - 1):
+        container = container.scoped()
+    return container
+
+
+def dispatch_once(container: DependencyContainer, adapter: IMAdapter, message: IMMessage) -> None:
+    with container.scoped() as scoped:
+        scoped.register(IMAdapter, adapter)
+        scoped.register(IMMessage, message)
+        # 调度与工作流执行过程中反复解析全局对象
+        for _ in range(4):
+            for service in GLOBAL_SERVICES:
+                scoped.resolve(service)
+            scoped.has(MediaManager)
+        Executor(scoped)
+
+
+def run(iterations: int, depth: int) -> None:
+    container = build_container(depth)
+    adapter, message = IMAdapter(), IMMessage()
+    for _ in range(min(iterations, 1000)):
+        dispatch_once(container, adapter, message)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        dispatch_once(container, adapter, message)
+    elapsed = time.perf_counter() - start
+    print(f"depth={depth}: {elapsed / iterations * 1e6:.2f} us/dispatch, {iterations / elapsed:,.0f} dispatches/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--depth", type=int, default=1)
+    args = parser.parse_args()
+    run(args.iterations, args.depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Add llm trace rollups
+
+Revision ID: 7c1f2a9d3b4e
+Revises: 4a364dbb8dab
+Create Date: 2025-04-12 10:21:07.518204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1f2a9d3b4e'
+down_revision: Union[str, None] = '4a364dbb8dab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 与 kirara_ai.tracing.rollup.GRANULARITIES 保持一致
+GRANULARITIES = {
+    'minute': '%Y-%m-%d %H:%M:00',
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('llm_trace_rollups',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket', sa.String(length=19), nullable=False),
+    sa.Column('model_id', sa.String(length=64), nullable=False),
+    sa.Column('backend_name', sa.String(length=64), nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('success', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.Column('total_tokens', sa.Integer(), nullable=False),
+    sa.Column('cached_tokens', sa.Integer(), nullable=False),
+    sa.Column('duration_sum', sa.Float(), nullable=False),
+    sa.Column('duration_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket', 'model_id', 'backend_name', name='uq_rollup_bucket')
+    )
+
+    # 从已有的追踪记录回填统计
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for granularity, fmt in GRANULARITIES.items():
+        # 转义冒号，避免被识别为绑定参数
+        fmt = fmt.replace(':', '\\:')
+        op.execute(sa.text(f"""
+            INSERT INTO llm_trace_rollups (
+                granularity, bucket, model_id, backend_name, requests, success, failed,
+                prompt_tokens, completion_tokens, total_tokens, cached_tokens, duration_sum, duration_count
+            )
+            SELECT
+                '{granularity}', strftime('{fmt}', request_time), model_id, backend_name,
+                count(*),
+                sum(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+                sum(CASE WHEN status = 'failed' THEN 1 ELSE 0 END),
+                coalesce(sum(prompt_tokens), 0),
+                coalesce(sum(completion_tokens), 0),
+                coalesce(sum(total_tokens), 0),
+                coalesce(sum(cached_tokens), 0),
+                coalesce(sum(duration), 0),
+                count(duration)
+            FROM llm_request_traces
+            GROUP BY strftime('{fmt}', request_time), model_id, backend_name
+        """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('llm_trace_rollups')
@@ -0,0 +1,64 @@
+"""Move trace payloads to a separate table
+
+Revision ID: e5f7a9c1b2d4
+Revises: d2a4c6e8f913
+Create Date: 2025-04-18 14:03:26.771940
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f7a9c1b2d4'
+down_revision: Union[str, None] = 'd2a4c6e8f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('llm_request_payloads',
+    sa.Column('trace_id', sa.String(length=64), nullable=False),
+    sa.Column('request_time', sa.DateTime(), nullable=True),
+    sa.Column('request_data', sa.LargeBinary(), nullable=True),
+    sa.Column('response_data', sa.LargeBinary(), nullable=True),
+    sa.PrimaryKeyConstraint('trace_id')
+    )
+    op.create_index(op.f('ix_llm_request_payloads_request_time'), 'llm_request_payloads', ['request_time'], unique=False)
+
+    # 旧数据以未压缩的 JSON 原样搬运，读取时按数据头识别
+    op.execute(sa.text("""
+        INSERT INTO llm_request_payloads (trace_id, request_time, request_data, response_data)
+        SELECT trace_id, request_time, CAST(request_json AS BLOB), CAST(response_json AS BLOB)
+        FROM llm_request_traces
+        WHERE request_json IS NOT NULL OR response_json IS NOT NULL
+    """))
+
+    with op.batch_alter_table('llm_request_traces') as batch_op:
+        batch_op.drop_column('request_json')
+        batch_op.drop_column('response_json')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('llm_request_traces') as batch_op:
+        batch_op.add_column(sa.Column('request_json', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('response_json', sa.Text(), nullable=True))
+
+    # 压缩过的内容无法在 SQL 中还原，只迁回未压缩的数据
+    op.execute(sa.text("""
+        UPDATE llm_request_traces SET
+            request_json = (
+                SELECT CAST(p.request_data AS TEXT) FROM llm_request_payloads p
+                WHERE p.trace_id = llm_request_traces.trace_id AND hex(substr(p.request_data, 1, 1)) = '7B'
+            ),
+            response_json = (
+                SELECT CAST(p.response_data AS TEXT) FROM llm_request_payloads p
+                WHERE p.trace_id = llm_request_traces.trace_id AND hex(substr(p.response_data, 1, 1)) = '7B'
+            )
+    """))
+
+    op.drop_index(op.f('ix_llm_request_payloads_request_time'), table_name='llm_request_payloads')
+    op.drop_table('llm_request_payloads')
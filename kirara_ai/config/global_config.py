@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -109,10 +109,65 @@ class SystemConfig(BaseModel):
     timezone: str = Field(default="Asia/Shanghai", description="时区")
 
 
+class MediaConfig(BaseModel):
+    """媒体配置"""
+
+    gc_interval: int = Field(default=600, description="后台清理无引用媒体的间隔（秒），0 表示不清理")
+    gc_batch_size: int = Field(default=50, description="每批最多删除的媒体数量")
+    gc_batch_interval: float = Field(default=1.0, description="两批删除之间的等待时间（秒）")
+    gc_min_unreferenced_age: int = Field(default=3600, description="无引用媒体超过此时长（秒）未被访问才会被清理")
+    disk_quota_mb: int = Field(default=0, description="媒体文件磁盘配额（MB），超出时优先清理最久未访问的无引用媒体，0 表示不限制")
+
+
 class TracingConfig(BaseModel):
     """Tracing 配置"""
     
     llm_tracing_content: bool = Field(default=False, description="是否记录 LLM 请求内容")
+    write_batch_size: int = Field(default=100, description="追踪记录批量写入的最大条数")
+    write_flush_interval: float = Field(default=1.0, description="追踪记录批量写入的最长等待时间（秒）")
+    retention_days: int = Field(default=30, description="追踪记录的保留天数")
+    retention_interval: int = Field(default=3600, description="后台清理过期追踪记录的间隔（秒），0 表示不清理")
+    retention_batch_size: int = Field(default=1000, description="每批删除的追踪记录数量")
+    vacuum_mode: Literal["none", "incremental", "full"] = Field(default="none", description="清理后回收数据库文件空间的方式")
+    payload_retention_days: int = Field(default=0, description="请求和响应内容的保留天数，0 表示与追踪记录相同")
+    latency_window_days: int = Field(default=7, description="延迟分位数统计的时间窗口（天）")
+    latency_persist_interval: float = Field(default=60.0, description="延迟直方图的持久化间隔（秒）")
+    span_tracing: bool = Field(default=True, description="是否记录消息处理链路（工作流 / 区块 / 外部调用）的耗时")
+    span_export: Literal["none", "file", "otlp"] = Field(default="none", description="链路数据的导出方式：写入 OTLP JSON 文件或发送到 OTLP/HTTP Collector")
+    span_export_path: str = Field(default="./data/traces/spans.jsonl", description="导出 OTLP JSON 文件的路径")
+    span_export_endpoint: str = Field(default="http://localhost:4318/v1/traces", description="OTLP/HTTP Collector 的地址")
+    span_export_interval: float = Field(default=5.0, description="链路数据的导出间隔（秒）")
+
+
+class ProfilingConfig(BaseModel):
+    """工作流性能分析配置"""
+
+    enabled: bool = Field(default=False, description="是否记录每个区块的耗时、排队等待、CPU 时间和内存分配")
+    memory_sample_interval: int = Field(default=10, description="每隔多少次区块执行统计一次内存分配，0 表示不统计")
+
+
+class DispatchConfig(BaseModel):
+    """消息调度配置"""
+
+    queue_policy: Literal["none", "serialize", "debounce", "drop"] = Field(
+        default="serialize",
+        description="同一发送者的消息处理方式：none 不排队 / serialize 依次处理 / debounce 合并连续消息后处理 / drop 处理中丢弃新消息",
+    )
+    queue_scope: Literal["member", "group", "global"] = Field(default="member", description="排队的范围：按发送者 / 按群 / 全局")
+    debounce_ms: int = Field(default=1500, description="debounce 策略下合并连续消息的等待时间（毫秒）")
+    max_concurrency: int = Field(default=0, description="全局同时处理的消息数量上限，超出时等待，0 表示不限制")
+    workers: int = Field(default=0, description="处理消息的工作进程数量，同一发送者的消息总在同一进程处理，0 表示在主进程中处理")
+
+
+class DatabaseConfig(BaseModel):
+    """数据库配置，仅对 SQLite 生效"""
+
+    wal: bool = Field(default=True, description="是否启用 WAL 日志模式，读写互不阻塞")
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field(default="NORMAL", description="同步模式，WAL 模式下 NORMAL 即可保证一致性")
+    busy_timeout: int = Field(default=5000, description="数据库被锁定时的等待时间（毫秒）")
+    mmap_size_mb: int = Field(default=256, description="内存映射读取的大小（MB），0 表示不使用")
+    reader_pool_size: int = Field(default=4, description="只读连接池大小")
+    async_engine: bool = Field(default=False, description="是否启用基于 aiosqlite 的异步引擎")
 
 
 class GlobalConfig(BaseModel):
@@ -126,6 +181,10 @@ class GlobalConfig(BaseModel):
     update: UpdateConfig = UpdateConfig()
     frpc: FrpcConfig = FrpcConfig()
     system: SystemConfig = SystemConfig()
+    media: MediaConfig = MediaConfig()
     tracing: TracingConfig = TracingConfig()
+    profiling: ProfilingConfig = ProfilingConfig()
+    dispatch: DispatchConfig = DispatchConfig()
+    database: DatabaseConfig = DatabaseConfig()
 
     model_config = ConfigDict(extra="allow")
@@ -1,16 +1,22 @@
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from alembic import command
 from alembic.config import Config
 from alembic.runtime.migration import MigrationContext
 from alembic.script import ScriptDirectory
-from sqlalchemy import MetaData, create_engine
+from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from kirara_ai.config.global_config import DatabaseConfig, GlobalConfig
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.logger import get_logger
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
 logger = get_logger("DB")
 
 # 创建Base类，用于所有ORM模型
@@ -20,14 +26,29 @@ metadata = MetaData()
 class DatabaseManager:
     """数据库管理器，负责管理数据库连接和会话"""
 
-    def __init__(self, container: DependencyContainer, database_url: Optional[str] = None, is_debug: bool = False):
+    def __init__(
+        self,
+        container: DependencyContainer,
+        database_url: Optional[str] = None,
+        is_debug: bool = False,
+        config: Optional[DatabaseConfig] = None,
+    ):
         self.container = container
-        self.engine = None
-        self.session_factory = None
+        # 写入引擎，SQLite 下只有一个连接，进程内的写入在连接池上排队，避免锁冲突
+        self.engine: Optional[Engine] = None
+        # 只读引擎，WAL 模式下读取不会被写入阻塞
+        self.read_engine: Optional[Engine] = None
+        self.async_engine: Optional["AsyncEngine"] = None
+        self.session_factory: Optional[sessionmaker] = None
+        self.read_session_factory: Optional[sessionmaker] = None
+        self.async_session_factory: Optional["async_sessionmaker"] = None
         self.data_dir = "./data/db"
         self.db_path = os.path.join(self.data_dir, "kirara.db")
         self.database_url = database_url
         self.is_debug = is_debug
+        if config is None:
+            config = container.resolve(GlobalConfig).database if container.has(GlobalConfig) else DatabaseConfig()
+        self.config = config
 
     def initialize(self):
         """初始化数据库连接"""
@@ -40,16 +61,78 @@ class DatabaseManager:
         else:
             db_url = f"sqlite:///{self.db_path}"
 
-        self.engine = create_engine(db_url, echo=self.is_debug)
+        url = make_url(db_url)
+        if url.get_backend_name() != "sqlite":
+            self.engine = create_engine(db_url, echo=self.is_debug)
+            self.read_engine = self.engine
+        elif url.database in (None, "", ":memory:"):
+            # 内存数据库每个连接都是独立的库，需要在线程间共享同一个连接（如后台写入线程）
+            self.engine = create_engine(
+                db_url,
+                echo=self.is_debug,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+            self.read_engine = self.engine
+        else:
+            self.engine = create_engine(
+                db_url,
+                echo=self.is_debug,
+                connect_args={"check_same_thread": False},
+                pool_size=1,
+                max_overflow=0,
+                pool_timeout=60,
+            )
+            self.read_engine = create_engine(
+                db_url,
+                echo=self.is_debug,
+                connect_args={"check_same_thread": False},
+                pool_size=max(1, self.config.reader_pool_size),
+                max_overflow=self.config.reader_pool_size,
+            )
+            for engine in (self.engine, self.read_engine):
+                event.listen(engine, "connect", self._configure_sqlite_connection)
+            if self.config.async_engine:
+                self._create_async_engine(url)
 
         # 创建session工厂
         self.session_factory = sessionmaker(bind=self.engine)
+        self.read_session_factory = sessionmaker(bind=self.read_engine)
 
         # 运行数据库迁移
         self._run_migrations()
 
         logger.info(f"Database initialized at {self.engine.url}")
 
+    def _configure_sqlite_connection(self, dbapi_connection, connection_record):
+        """为每个新的 SQLite 连接设置性能相关的 PRAGMA"""
+        cursor = dbapi_connection.cursor()
+        try:
+            if self.config.wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={self.config.synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(self.config.busy_timeout)}")
+            cursor.execute(f"PRAGMA mmap_size={int(self.config.mmap_size_mb) * 1024 * 1024}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cursor.close()
+
+    def _create_async_engine(self, url: URL):
+        """创建基于 aiosqlite 的异步引擎，未安装 aiosqlite 时跳过"""
+        try:
+            import aiosqlite  # noqa: F401
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        except ImportError:
+            logger.warning("aiosqlite is not installed, async database engine is disabled")
+            return
+        self.async_engine = create_async_engine(
+            url.set(drivername="sqlite+aiosqlite"),
+            echo=self.is_debug,
+            pool_size=max(1, self.config.reader_pool_size),
+        )
+        event.listen(self.async_engine.sync_engine, "connect", self._configure_sqlite_connection)
+        self.async_session_factory = async_sessionmaker(self.async_engine, expire_on_commit=False)
+
     def _run_migrations(self):
         assert self.engine is not None
         """运行数据库迁移"""
@@ -86,15 +169,30 @@ class DatabaseManager:
             logger.error(f"Error during database migration: {e}")
             raise
 
-    def get_session(self) -> Session:
-        """获取数据库会话"""
+    def get_session(self, readonly: bool = False) -> Session:
+        """获取数据库会话，只读查询可以使用 readonly=True 从只读连接池获取连接，不占用写入连接"""
         if not self.session_factory:
             self.initialize()
-        assert self.session_factory is not None
+        assert self.session_factory is not None and self.read_session_factory is not None
+        if readonly:
+            return self.read_session_factory()
         return self.session_factory()
 
+    def get_async_session(self) -> "AsyncSession":
+        """获取异步数据库会话，需要在配置中启用异步引擎并安装 aiosqlite"""
+        if not self.session_factory:
+            self.initialize()
+        if self.async_session_factory is None:
+            raise RuntimeError("Async database engine is not enabled")
+        return self.async_session_factory()
+
     def shutdown(self):
         """关闭数据库连接"""
+        if self.async_engine:
+            # 异步引擎的连接需要在事件循环中关闭，此处只释放连接池
+            self.async_engine.sync_engine.dispose(close=False)
+        if self.read_engine and self.read_engine is not self.engine:
+            self.read_engine.dispose()
         if self.engine:
             self.engine.dispose()
             logger.info("Database connection closed")
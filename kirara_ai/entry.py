@@ -24,11 +24,13 @@ from kirara_ai.memory.composes import DefaultMemoryComposer, DefaultMemoryDecomp
 from kirara_ai.memory.memory_manager import MemoryManager
 from kirara_ai.memory.scopes import GlobalScope, GroupScope, MemberScope
 from kirara_ai.plugin_manager.plugin_loader import PluginLoader
-from kirara_ai.tracing import LLMTracer, TracingManager
+from kirara_ai.tracing import LLMTracer, SpanTracer, TracingManager
 from kirara_ai.web.api.system.utils import get_installed_version, get_latest_pypi_version
 from kirara_ai.web.app import WebServer
 from kirara_ai.workflow.core.block import BlockRegistry
 from kirara_ai.workflow.core.dispatch import DispatchRuleRegistry, WorkflowDispatcher
+from kirara_ai.workflow.core.dispatch.workers import DispatchWorkerPool
+from kirara_ai.workflow.core.execution.profiler import WorkflowProfiler
 from kirara_ai.workflow.core.workflow import WorkflowRegistry
 from kirara_ai.workflow.implementations.blocks import register_system_blocks
 from kirara_ai.workflow.implementations.workflows import register_system_workflows
@@ -106,6 +108,11 @@ def init_tracing_system(container: DependencyContainer):
     container.register(LLMTracer, llm_tracer)
     tracing_manager.register_tracer("llm", llm_tracer)
 
+    # 创建并注册链路追踪器
+    span_tracer = SpanTracer(container)
+    container.register(SpanTracer, span_tracer)
+    tracing_manager.register_tracer("span", span_tracer)
+
     # 初始化追踪系统
     tracing_manager.initialize()
 
@@ -142,8 +149,9 @@ def init_application() -> DependencyContainer:
         time.tzset()
 
     container = init_container()
-    container.register(asyncio.AbstractEventLoop, asyncio.new_event_loop())
-    container.register(EventBus, EventBus())
+    loop = asyncio.new_event_loop()
+    container.register(asyncio.AbstractEventLoop, loop)
+    container.register(EventBus, EventBus(loop=loop))
 
     container.register(GlobalConfig, config)
     container.register(BlockRegistry, BlockRegistry())
@@ -155,6 +163,7 @@ def init_application() -> DependencyContainer:
 
     # 注册媒体管理器
     media_manager = MediaManager()
+    media_manager.gc.configure(config.media)
     container.register(MediaManager, media_manager)
     container.register(MediaCarrierRegistry, MediaCarrierRegistry(container))
     container.register(MediaCarrierService, MediaCarrierService(container, media_manager))
@@ -162,6 +171,7 @@ def init_application() -> DependencyContainer:
     # 注册工作流注册表
     workflow_registry = WorkflowRegistry(container)
     container.register(WorkflowRegistry, workflow_registry)
+    container.register(WorkflowProfiler, WorkflowProfiler(container))
 
     # 注册调度规则注册表
     dispatch_registry = DispatchRuleRegistry(container)
@@ -249,6 +259,19 @@ def run_application(container: DependencyContainer):
     logger.info("Connecting to MCP servers")
     mcp_manager.connect_all_servers(loop=loop)
 
+    # 启动多进程调度
+    worker_pool = None
+    dispatch_config = container.resolve(GlobalConfig).dispatch
+    if dispatch_config.workers > 0:
+        logger.info(f"Starting {dispatch_config.workers} dispatch workers")
+        worker_pool = DispatchWorkerPool(container, dispatch_config.workers)
+        worker_pool.start()
+        container.resolve(WorkflowDispatcher).worker_pool = worker_pool
+
+    # 启动媒体垃圾回收
+    media_manager = container.resolve(MediaManager)
+    media_manager.gc.start(loop)
+
     # 注册信号处理函数
     signal.signal(signal.SIGINT, _signal_handler)
     signal.signal(signal.SIGTERM, _signal_handler)
@@ -272,6 +295,11 @@ def run_application(container: DependencyContainer):
         logger.info("Shutting down memory system...")
         memory_manager.shutdown()
 
+        # 关闭媒体管理器
+        media_manager = container.resolve(MediaManager)
+        logger.info("Shutting down media manager...")
+        media_manager.shutdown()
+
         # 关闭追踪系统
         try:
             tracing_manager = container.resolve(TracingManager)
@@ -299,6 +327,14 @@ def run_application(container: DependencyContainer):
         except Exception as e:
             logger.error(f"Error stopping adapters: {e}")
 
+        # 停止调度工作进程
+        if worker_pool is not None:
+            logger.info("Stopping dispatch workers...")
+            worker_pool.stop()
+
+        # 停止事件总线的后台投递线程
+        container.resolve(EventBus).shutdown()
+
         # 关闭事件循环
         loop.stop()
         logger.info("Application stopped gracefully")
@@ -1,28 +1,171 @@
-from typing import Callable, Dict, List, Type
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Type
 
 from kirara_ai.logger import get_logger
 
 logger = get_logger("EventBus")
 
+# 后台投递线程的停止标记
+_STOP = object()
+
+
+def _listener_name(listener: Callable) -> str:
+    return getattr(listener, "__qualname__", None) or getattr(listener, "__name__", repr(listener))
+
+
+class _BackgroundQueue:
+    """后台投递队列，由独立线程按顺序把事件交给监听器，队列满时丢弃新事件"""
+
+    def __init__(self, name: str, bus: "EventBus", max_size: int):
+        self.name = name
+        self.bus = bus
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name=f"EventBus-{name}", daemon=True)
+        self.thread.start()
+
+    def put(self, event: Any) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Background event queue {self.name} is full, dropped {self.dropped} events")
+
+    def _run(self) -> None:
+        while True:
+            event = self.queue.get()
+            try:
+                if event is _STOP:
+                    return
+                self.bus._deliver(event)
+            finally:
+                self.queue.task_done()
+
+    def stop(self, timeout: Optional[float]) -> None:
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+
+
 class EventBus:
-    def __init__(self):
-        self._listeners: Dict[Type, List[Callable]] = {}
+    """
+    事件总线。
+    - 监听器表采用写时复制：注册 / 注销时加锁并替换整张表，发布事件时无锁读取，可在任意线程发布
+    - async 监听器会被调度到主事件循环执行，不阻塞发布者
+    - 通过 enable_background 可让某类事件进入后台队列，由独立线程投递，慢监听器不会增加发布者的延迟
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._listeners: Dict[Type, Tuple[Callable, ...]] = {}
+        self._lock = threading.Lock()
+        # async 监听器的调度目标，在其他线程发布事件时使用
+        self._loop = loop
+        # 事件类型 -> 后台队列，多个事件类型可共享同一个队列以保持相互间的顺序
+        self._background: Dict[Type, _BackgroundQueue] = {}
+        self._background_queues: Dict[str, _BackgroundQueue] = {}
+        # 持有尚未完成的 async 监听器任务，避免被垃圾回收
+        self._tasks: Set[Any] = set()
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """设置 async 监听器的调度目标"""
+        self._loop = loop
 
     def register(self, event_type: Type, listener: Callable):
-        if event_type not in self._listeners:
-            self._listeners[event_type] = []
-        self._listeners[event_type].append(listener)
+        with self._lock:
+            listeners = dict(self._listeners)
+            listeners[event_type] = listeners.get(event_type, ()) + (listener,)
+            self._listeners = listeners
 
     def unregister(self, event_type: Type, listener: Callable):
-        if event_type in self._listeners:
-            self._listeners[event_type].remove(listener)
+        with self._lock:
+            current = self._listeners.get(event_type)
+            if not current or listener not in current:
+                return
+            remaining = list(current)
+            remaining.remove(listener)
+            listeners = dict(self._listeners)
+            if remaining:
+                listeners[event_type] = tuple(remaining)
+            else:
+                del listeners[event_type]
+            self._listeners = listeners
+
+    def enable_background(self, event_type: Type, queue_name: Optional[str] = None, max_size: int = 10000):
+        """
+        让某类事件改为后台投递，post 只负责入队。
+        queue_name 相同的事件类型共享一个队列和投递线程，彼此之间保持发布顺序。
+        """
+        name = queue_name or event_type.__name__
+        with self._lock:
+            background = self._background_queues.get(name)
+            if background is None:
+                background = self._background_queues[name] = _BackgroundQueue(name, self, max_size)
+            background_map = dict(self._background)
+            background_map[event_type] = background
+            self._background = background_map
 
     def post(self, event):
-        event_type = type(event)
-        if event_type in self._listeners:
-            for listener in self._listeners[event_type]:
-                try:
-                    listener(event)
-                except Exception as e:
-                    listener_name = listener.__name__
-                    logger.opt(exception=e).error(f"Error in listener {listener_name}")
+        background = self._background.get(type(event))
+        if background is not None:
+            background.put(event)
+        else:
+            self._deliver(event)
+
+    def _deliver(self, event) -> None:
+        listeners = self._listeners.get(type(event))
+        if not listeners:
+            return
+        for listener in listeners:
+            try:
+                result = listener(event)
+                if asyncio.iscoroutine(result):
+                    self._schedule(listener, result)
+            except Exception as e:
+                logger.opt(exception=e).error(f"Error in listener {_listener_name(listener)}")
+
+    def _schedule(self, listener: Callable, coro) -> None:
+        """把 async 监听器调度到事件循环：优先使用当前线程正在运行的循环，否则使用绑定的主循环"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None:
+            future: Any = running.create_task(coro)
+        elif self._loop is not None and not self._loop.is_closed():
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        else:
+            coro.close()
+            logger.warning(f"No event loop to run async listener {_listener_name(listener)}, event dropped")
+            return
+        self._tasks.add(future)
+        future.add_done_callback(lambda done: self._on_task_done(listener, done))
+
+    def _on_task_done(self, listener: Callable, future: Any) -> None:
+        self._tasks.discard(future)
+        if future.cancelled():
+            return
+        exception = future.exception()
+        if exception is not None:
+            logger.opt(exception=exception).error(f"Error in listener {_listener_name(listener)}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后台队列中的事件投递完成，超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for background in list(self._background_queues.values()):
+            while background.queue.unfinished_tasks:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.005)
+        return True
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """停止后台投递线程，队列中剩余的事件会先投递完"""
+        with self._lock:
+            queues = list(self._background_queues.values())
+            self._background = {}
+            self._background_queues = {}
+        for background in queues:
+            background.stop(timeout)
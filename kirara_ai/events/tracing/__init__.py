@@ -1,5 +1,6 @@
 from .base import TraceCompleteEvent, TraceEvent, TraceFailEvent, TraceStartEvent
 from .llm import LLMRequestCompleteEvent, LLMRequestFailEvent, LLMRequestStartEvent
+from .span import SpanEndEvent
 
 __all__ = [
     "TraceEvent",
@@ -9,4 +10,5 @@ __all__ = [
     "LLMRequestStartEvent",
     "LLMRequestCompleteEvent",
     "LLMRequestFailEvent",
+    "SpanEndEvent",
 ]
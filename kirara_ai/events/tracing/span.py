@@ -0,0 +1,20 @@
+from typing import TYPE_CHECKING
+
+from .base import TraceStartEvent
+
+if TYPE_CHECKING:
+    from kirara_ai.tracing.span import Span
+
+
+class SpanEndEvent(TraceStartEvent):
+    """
+    span 结束事件。span 结束时一次性写入完整记录，
+    对追踪写入器而言它同时是这条记录的开始事件，trace_id 为 span 的唯一标识。
+    """
+
+    def __init__(self, span: "Span"):
+        super().__init__(span.span_id)
+        self.span = span
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(span={self.span})"
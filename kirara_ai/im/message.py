@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, ClassVar, Dict, Iterable, List, Literal, Optional, Type, TypeVar
 
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.media import MediaManager, MediaType
 
+M = TypeVar("M", bound="MediaMessage")
+
 MIMETYPE_MAPPING = {
     "image": MediaType.IMAGE,
     "audio": MediaType.AUDIO,
@@ -14,6 +16,12 @@ MIMETYPE_MAPPING = {
 
 # 定义消息元素的基类
 class MessageElement(ABC):
+    # 轻量元素使用 __slots__，子类未声明时仍然拥有 __dict__
+    __slots__ = ()
+
+    # to_plain 的结果在元素创建后是否不变，IMMessage 据此决定能否缓存 content
+    plain_cacheable: ClassVar[bool] = True
+
     @abstractmethod
     def to_dict(self):
         pass
@@ -25,6 +33,8 @@ class MessageElement(ABC):
 
 # 定义文本消息元素
 class TextMessage(MessageElement):
+    __slots__ = ("text",)
+
     def __init__(self, text: str):
         self.text = text
 
@@ -40,10 +50,13 @@ class TextMessage(MessageElement):
 
 # 定义媒体消息的基类
 class MediaMessage(MessageElement):
-    
+    """
+    媒体消息的基类。
+    未提供 media_id 时延迟注册：异步代码中使用 `await ImageMessage.create(...)` 或 `await ensure_registered()`
+    在当前事件循环中完成注册；同步代码首次访问 media_id 时才会阻塞注册。
+    """
+
     resource_type: Literal["image", "audio", "video", "file"]
-    
-    media_id: str
 
     def __init__(
         self,
@@ -58,6 +71,8 @@ class MediaMessage(MessageElement):
         tags: Optional[List[str]] = None,
         media_manager: Optional[MediaManager] = None,
     ):
+        if not media_id and not any([url, path, data]):
+            raise ValueError("Must provide at least one of url, path, or data")
         self.url = url
         self.path = path
         self.data = data
@@ -68,12 +83,41 @@ class MediaMessage(MessageElement):
         self._tags = tags or []
         self._media_manager = media_manager or MediaManager()
         self.base64_url: Optional[str] = None
-        if media_id:
-            self.media_id = media_id
-            return
+        self._media_id: Optional[str] = media_id
 
-        # 注册媒体文件
+    @classmethod
+    async def create(cls: Type[M], *args: Any, **kwargs: Any) -> M:
+        """异步创建媒体消息并完成注册，参数与构造函数相同；不阻塞事件循环，也不创建线程"""
+        element = cls(*args, **kwargs)
+        await element.ensure_registered()
+        return element
+
+    @property
+    def media_id(self) -> str:
+        """媒体 ID，尚未注册时在同步上下文中阻塞注册"""
+        if self._media_id is None:
+            self._register_blocking()
+        assert self._media_id is not None
+        return self._media_id
 
+    @media_id.setter
+    def media_id(self, value: str) -> None:
+        self._media_id = value
+
+    @property
+    def registered(self) -> bool:
+        """媒体是否已经注册"""
+        return self._media_id is not None
+
+    async def ensure_registered(self) -> str:
+        """在当前事件循环中注册媒体文件（如果尚未注册），返回媒体 ID"""
+        if self._media_id is None:
+            await self._register_media()
+        assert self._media_id is not None
+        return self._media_id
+
+    def _register_blocking(self) -> None:
+        """在同步上下文中注册媒体文件"""
         # 使用线程创建新的事件循环来阻塞执行媒体注册
         import asyncio
         import threading
@@ -104,7 +148,7 @@ class MediaMessage(MessageElement):
         media_manager = self._media_manager
 
         # 根据传入的参数注册媒体文件
-        self.media_id = await media_manager.register_media(
+        media_id = await media_manager.register_media(
             url=self.url,
             path=self.path,
             data=self.data,
@@ -117,16 +161,16 @@ class MediaMessage(MessageElement):
         )
 
         # 获取媒体元数据
-        metadata = media_manager.get_metadata(self.media_id)
+        metadata = media_manager.get_metadata(media_id)
         if metadata and metadata.format:
             self.format = metadata.format
             if metadata.media_type:
                 self.resource_type = metadata.media_type.value
+        self._media_id = media_id
 
     async def get_url(self) -> str:
         """获取媒体资源的URL"""
-        if not self.media_id:
-            raise ValueError("Media not registered")
+        await self.ensure_registered()
 
         # 如果已经有URL，直接返回
         if self.url:
@@ -143,8 +187,7 @@ class MediaMessage(MessageElement):
 
     async def get_path(self) -> str:
         """获取媒体资源的文件路径"""
-        if not self.media_id:
-            raise ValueError("Media not registered")
+        await self.ensure_registered()
 
         # 如果已经有路径，直接返回
         if self.path and Path(self.path).exists():
@@ -161,8 +204,7 @@ class MediaMessage(MessageElement):
 
     async def get_data(self) -> bytes:
         """获取媒体资源的二进制数据"""
-        if not self.media_id:
-            raise ValueError("Media not registered")
+        await self.ensure_registered()
 
         # 如果已经有数据，直接返回
         if self.data:
@@ -179,8 +221,7 @@ class MediaMessage(MessageElement):
 
     async def get_base64_url(self) -> str:
         """获取媒体资源的Base64 URL"""
-        if not self.media_id:
-            raise ValueError("Media not registered")
+        await self.ensure_registered()
         
         if self.base64_url:
             return self.base64_url
@@ -192,10 +233,21 @@ class MediaMessage(MessageElement):
 
         raise ValueError("Failed to get media base64 URL")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # 媒体管理器不随消息序列化，反序列化时使用目标进程的媒体管理器
+        state = self.__dict__.copy()
+        state.pop("_media_manager", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # MediaManager 是单例，已创建时直接复用，避免重新执行 __init__
+        self._media_manager = getattr(MediaManager, "_instance", None) or MediaManager()
+        if self._media_id:
+            self._media_manager.load_metadata(self._media_id)
+
     def get_description(self) -> str:
         """获取媒体资源的描述"""
-        if not self.media_id:
-            raise ValueError("Media not registered")
         metadata = self._media_manager.get_metadata(self.media_id)
         if metadata:
             return metadata.description or ""
@@ -235,6 +287,8 @@ class VoiceMessage(MediaMessage):
 # 定义图片消息
 class ImageMessage(MediaMessage):
     resource_type = "image"
+    # alt 文本来自媒体元数据，可能在消息创建后更新
+    plain_cacheable = False
 
     def to_dict(self):
         result = super().to_dict()
@@ -250,6 +304,8 @@ class ImageMessage(MediaMessage):
 # 定义@消息元素
 # :deprecated
 class AtElement(MessageElement):
+    __slots__ = ("user_id", "nickname")
+
     def __init__(self, user_id: str, nickname: str = ""):
         self.user_id = user_id
         self.nickname = nickname
@@ -265,6 +321,8 @@ class AtElement(MessageElement):
 
 # 定义@消息元素
 class MentionElement(MessageElement):
+    __slots__ = ("target",)
+
     def __init__(self, target: ChatSender):
         self.target = target
 
@@ -279,6 +337,7 @@ class MentionElement(MessageElement):
 
 # 定义回复消息元素
 class ReplyElement(MessageElement):
+    __slots__ = ("message_id",)
 
     def __init__(self, message_id: str):
         self.message_id = message_id
@@ -312,6 +371,7 @@ class FileMessage(MediaMessage):
 
 # 定义JSON消息元素
 class JsonMessage(MessageElement):
+    __slots__ = ("data",)
 
     def __init__(self, data: str):
         self.data = data
@@ -328,6 +388,7 @@ class JsonMessage(MessageElement):
 
 # 定义表情消息元素
 class EmojiMessage(MessageElement):
+    __slots__ = ("face_id",)
 
     def __init__(self, face_id: str):
         self.face_id = face_id
@@ -359,6 +420,39 @@ class VideoMessage(MediaMessage):
         return f"VideoMessage(media_id={self.media_id}, url={self.url}, path={self.path}, format={self.format})"
 
 
+class MessageElements(list):
+    """消息元素列表，被修改时清除所属消息的派生属性缓存"""
+
+    __slots__ = ("_message",)
+
+    def __init__(self, elements: Iterable[MessageElement], message: "IMMessage"):
+        super().__init__(elements)
+        self._message = message
+
+    def __reduce__(self):
+        # 复制和序列化时还原为普通列表，由所属消息重新包装
+        return (list, (list(self),))
+
+
+def _invalidating(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._message._views.clear()
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in (
+    "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+    "__setitem__", "__delitem__", "__iadd__", "__imul__",
+):
+    setattr(MessageElements, _name, _invalidating(_name))
+
+
 # 定义消息类
 class IMMessage:
     """
@@ -372,42 +466,66 @@ class IMMessage:
         content: 消息的纯文本内容
         images: 消息中的图片列表
         voices: 消息中的语音列表
+
+    content / images / voices 在首次访问后缓存，修改 message_elements 时自动失效。
     """
 
     sender: ChatSender
-    message_elements: List[MessageElement]
     raw_message: Optional[dict]
 
     def __repr__(self):
         return f"IMMessage(sender={self.sender}, message_elements={self.message_elements}, raw_message={self.raw_message})"
 
+    @property
+    def message_elements(self) -> List[MessageElement]:
+        return self._message_elements
+
+    @message_elements.setter
+    def message_elements(self, elements: Iterable[MessageElement]) -> None:
+        self._message_elements = MessageElements(elements, self)
+        self._views: Dict[str, Any] = {}
+
     @property
     def content(self) -> str:
         """获取消息的纯文本内容"""
+        content = self._views.get("content")
+        if content is not None:
+            return content
         content = ""
-        for element in self.message_elements:
+        cacheable = True
+        for element in self._message_elements:
             content += element.to_plain()
             if isinstance(element, TextMessage):
                 content += "\n"
-        return content.strip()
+            cacheable = cacheable and element.plain_cacheable
+        content = content.strip()
+        if cacheable:
+            self._views["content"] = content
+        return content
 
     @property
     def images(self) -> List[ImageMessage]:
-        """获取消息中的所有图片"""
-        return [
-            element
-            for element in self.message_elements
-            if isinstance(element, ImageMessage)
-        ]
+        """获取消息中的所有图片，返回的列表是缓存，不要修改"""
+        images = self._views.get("images")
+        if images is None:
+            images = self._views["images"] = [
+                element
+                for element in self._message_elements
+                if isinstance(element, ImageMessage)
+            ]
+        return images
 
     @property
     def voices(self) -> List[VoiceMessage]:
-        """获取消息中的所有语音"""
-        return [
-            element
-            for element in self.message_elements
-            if isinstance(element, VoiceMessage)
-        ]
+        """获取消息中的所有语音，返回的列表是缓存，不要修改"""
+        voices = self._views.get("voices")
+        if voices is None:
+            voices = self._views["voices"] = [
+                element
+                for element in self._message_elements
+                if isinstance(element, VoiceMessage)
+            ]
+        return voices
 
     def __init__(
         self,
@@ -419,6 +537,16 @@ class IMMessage:
         self.message_elements = message_elements
         self.raw_message = raw_message
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_views", None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        elements = state.pop("_message_elements", [])
+        self.__dict__.update(state)
+        self.message_elements = elements
+
     def to_dict(self):
         return {
             "sender": self.sender,
@@ -3,6 +3,9 @@ from typing import Any, Optional, Type, TypeVar, overload
 
 T = TypeVar("T")
 
+# 解析失败的标记，注册的值本身可能为 None
+_MISSING = object()
+
 class DependencyContainer:
     """
         依赖注入容器，提供注册和解析的功能。你可以在此获取一些全局的对象。
@@ -49,9 +52,13 @@ class DependencyContainer:
         destroy: 从容器中移除一个值或对象实例
         scoped: 创建一个新的作用域容器
     """
+    # 已创建作用域的容器注册或移除对象时递增，使作用域容器的解析缓存失效
+    _generation = 0
+
     def __init__(self, parent=None):
         self.parent = parent  # 父容器，用于支持作用域嵌套
         self.registry = {}  # 当前容器的注册表
+        self._has_scopes = False  # 是否创建过作用域容器
 
     def register(self, key, value):
         """
@@ -64,6 +71,22 @@ class DependencyContainer:
             value: 值/对象实例
         """
         self.registry[key] = value
+        self._changed(key)
+
+    def _changed(self, key) -> None:
+        """注册表变化时调用，子作用域可能缓存了旧值"""
+        if self._has_scopes:
+            DependencyContainer._generation += 1
+
+    def _lookup(self, key) -> Any:
+        """沿父容器链查找，找不到时返回 _MISSING"""
+        container: Optional[DependencyContainer] = self
+        while container is not None:
+            registry = container.registry
+            if key in registry:
+                return registry[key]
+            container = container.parent
+        return _MISSING
 
     @overload
     def resolve(self, key: Type[T]) -> T: ...
@@ -86,13 +109,10 @@ class DependencyContainer:
         Raises:
             KeyError: {key}在当前容器和父容器中都不存在时抛出
         """
-        if key in self.registry:
-            return self.registry[key]
-
-        elif self.parent:
-            return self.parent.resolve(key)
-        else:
+        value = self._lookup(key)
+        if value is _MISSING:
             raise KeyError(f"Dependency {key} not found.")
+        return value
 
 
     def has(self, key: Type[T] | Any) -> bool:
@@ -103,7 +123,7 @@ class DependencyContainer:
         Returns:
             成功返回 True, 失败返回 False
         """
-        return key in self.registry or (self.parent is not None and self.parent.has(key))
+        return self._lookup(key) is not _MISSING
 
     @overload
     def destroy(self, key: Type[T], recursive: bool = False) -> None: ...
@@ -124,6 +144,7 @@ class DependencyContainer:
         """
         if key in self.registry:
             del self.registry[key]
+            self._changed(key)
         elif self.parent and recursive:
             self.parent.destroy(key, recursive)
         else: 
@@ -133,6 +154,7 @@ class DependencyContainer:
     def scoped(self):
         """创建一个新的作用域容器"""
         new_container = ScopedContainer(self)
+        self._has_scopes = True
 
         if DependencyContainer in self.registry:
             new_container.registry[DependencyContainer] = new_container
@@ -144,8 +166,33 @@ class DependencyContainer:
 current_container = contextvars.ContextVar[Optional[DependencyContainer]]("current_container", default=None)
 
 class ScopedContainer(DependencyContainer):
+    """
+    作用域容器，从父容器链解析到的对象会缓存在本地，
+    重复解析时不必逐层查找；祖先容器的注册表变化后缓存整体失效。
+    """
+
     def __init__(self, parent):
         super().__init__(parent)
+        self._cache: dict = {}
+        self._cache_generation = DependencyContainer._generation
+
+    def _changed(self, key) -> None:
+        self._cache.pop(key, None)
+        super()._changed(key)
+
+    def _lookup(self, key) -> Any:
+        registry = self.registry
+        if key in registry:
+            return registry[key]
+        if self._cache_generation != DependencyContainer._generation:
+            self._cache.clear()
+            self._cache_generation = DependencyContainer._generation
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.parent._lookup(key)
+            if value is not _MISSING:
+                self._cache[key] = value
+        return value
 
     def __enter__(self):
         # 将当前容器设置为新的作用域容器
@@ -1,5 +1,5 @@
 from functools import wraps
-from inspect import signature
+from inspect import Parameter, signature
 from typing import Any, Callable, Optional, Type
 
 from kirara_ai.ioc.container import DependencyContainer
@@ -46,28 +46,49 @@ class Inject:
         return cls
 
     def inject_function(self, func: Callable):
+        # 签名和需要注入的参数在装饰时计算一次
+        sig = signature(func)
+        injections = [
+            (name, param.annotation)
+            for name, param in sig.parameters.items()
+            if param.annotation != param.empty
+        ]
+        positional_names = [
+            name for name, param in sig.parameters.items()
+            if param.kind == Parameter.POSITIONAL_OR_KEYWORD
+        ]
+        # 只有普通参数和仅关键字参数时，可以直接按参数名组装调用参数，不必每次 bind
+        simple = all(
+            param.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY)
+            for param in sig.parameters.values()
+        )
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # 获取函数的参数签名
-            sig = signature(func)
             # 检查是否有 DependencyContainer 对象作为参数传递进来
             container_param = self.find_container(args, kwargs)
             # 如果有 DependencyContainer 对象，则将其作为 self.container
             if container_param:
                 self.container = container_param
+            container = self.container
+
+            if simple and len(args) <= len(positional_names):
+                arguments = dict(zip(positional_names, args))
+                if not kwargs.keys() & arguments.keys():
+                    arguments.update(kwargs)
+                    if container:
+                        for name, annotation in injections:
+                            if name not in kwargs:
+                                arguments[name] = container.resolve(annotation)
+                    return func(**arguments)
 
             # 遍历参数，注入依赖
             bound_args = sig.bind_partial(*args, **kwargs)
             bound_args.apply_defaults()
-            for name, param in sig.parameters.items():
-                if (
-                    param.annotation != param.empty
-                    and name not in kwargs
-                    and self.container
-                ):
-                    bound_args.arguments[name] = self.container.resolve(
-                        param.annotation
-                    )
+            if container:
+                for name, annotation in injections:
+                    if name not in kwargs:
+                        bound_args.arguments[name] = container.resolve(annotation)
 
             # 调用实际的函数
             return func(*bound_args.args, **bound_args.kwargs)
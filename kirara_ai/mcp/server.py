@@ -13,6 +13,7 @@ from pydantic import AnyUrl
 from kirara_ai.config.global_config import MCPServerConfig
 from kirara_ai.logger import get_logger
 from kirara_ai.mcp.models import MCPConnectionState
+from kirara_ai.tracing.span import SPAN_MCP, start_span
 
 logger = get_logger("MCP.Server")
 
@@ -195,7 +196,8 @@ class MCPServer:
             工具调用结果
         """
         assert self.session is not None
-        return await self.session.call_tool(tool_name, tool_args)
+        with start_span(f"mcp {tool_name}", SPAN_MCP, {"mcp.server": self.server_config.id, "mcp.tool": tool_name}):
+            return await self.session.call_tool(tool_name, tool_args)
     
     async def complete(self, prompt: str, tool_args: dict):
         """
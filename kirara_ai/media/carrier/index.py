@@ -0,0 +1,86 @@
+from typing import Dict, Optional, Set, Tuple
+
+
+def split_reference_key(full_reference_key: str) -> Optional[Tuple[str, str]]:
+    """将完整引用键拆分为 (provider_name, reference_key)"""
+    if ":" not in full_reference_key:
+        return None
+    provider_name, reference_key = full_reference_key.split(":", 1)
+    return provider_name, reference_key
+
+
+class ReferenceIndex:
+    """
+    媒体引用的双向多重映射：
+    完整引用键 -> 媒体 ID 集合，媒体 ID -> 完整引用键集合，提供者 -> 完整引用键集合。
+    所有查询均为 O(1)。
+    """
+
+    def __init__(self):
+        self._media_by_reference: Dict[str, Set[str]] = {}
+        self._references_by_media: Dict[str, Set[str]] = {}
+        self._references_by_provider: Dict[str, Set[str]] = {}
+
+    def clear(self) -> None:
+        self._media_by_reference.clear()
+        self._references_by_media.clear()
+        self._references_by_provider.clear()
+
+    def add(self, full_reference_key: str, media_id: str) -> bool:
+        """添加一条引用，返回是否为新引用"""
+        media_ids = self._media_by_reference.setdefault(full_reference_key, set())
+        if media_id in media_ids:
+            return False
+        media_ids.add(media_id)
+        self._references_by_media.setdefault(media_id, set()).add(full_reference_key)
+        parts = split_reference_key(full_reference_key)
+        if parts:
+            self._references_by_provider.setdefault(parts[0], set()).add(full_reference_key)
+        return True
+
+    def remove(self, full_reference_key: str, media_id: str) -> bool:
+        """移除一条引用，返回引用是否存在"""
+        media_ids = self._media_by_reference.get(full_reference_key)
+        if not media_ids or media_id not in media_ids:
+            return False
+        media_ids.discard(media_id)
+        if not media_ids:
+            del self._media_by_reference[full_reference_key]
+            parts = split_reference_key(full_reference_key)
+            if parts:
+                provider_keys = self._references_by_provider.get(parts[0])
+                if provider_keys is not None:
+                    provider_keys.discard(full_reference_key)
+                    if not provider_keys:
+                        del self._references_by_provider[parts[0]]
+
+        references = self._references_by_media.get(media_id)
+        if references is not None:
+            references.discard(full_reference_key)
+            if not references:
+                del self._references_by_media[media_id]
+        return True
+
+    def remove_media(self, media_id: str) -> None:
+        """移除某个媒体的所有引用"""
+        for full_reference_key in list(self._references_by_media.get(media_id, ())):
+            self.remove(full_reference_key, media_id)
+
+    def has_reference(self, full_reference_key: str) -> bool:
+        return full_reference_key in self._media_by_reference
+
+    def get_media_ids(self, full_reference_key: str) -> Set[str]:
+        """获取引用键关联的媒体 ID"""
+        return set(self._media_by_reference.get(full_reference_key, ()))
+
+    def get_references(self, media_id: str) -> Set[str]:
+        """获取媒体的所有完整引用键"""
+        return set(self._references_by_media.get(media_id, ()))
+
+    def get_references_by_provider(self, provider_name: str) -> Set[str]:
+        """获取某个提供者的所有完整引用键"""
+        return set(self._references_by_provider.get(provider_name, ()))
+
+    def get_providers(self) -> Set[str]:
+        """获取所有出现过的提供者名称"""
+        return set(self._references_by_provider.keys())
@@ -0,0 +1,190 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional
+from urllib.parse import urlsplit
+
+from kirara_ai.logger import get_logger
+
+if TYPE_CHECKING:
+    from curl_cffi import AsyncSession, Session
+
+
+class DownloadError(ValueError):
+    """下载失败"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class _LoopState:
+    """单个事件循环内共享的连接池和按主机并发限制"""
+
+    def __init__(self, session: "AsyncSession"):
+        self.session = session
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+class MediaDownloader:
+    """
+    媒体下载客户端，复用连接池以避免每次下载都重新建立 TLS 连接。
+    支持按主机限制并发、超时、大小上限以及带退避的重试。
+    """
+
+    # 这些状态码通常是临时错误，值得重试
+    RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        max_size: int = 50 * 1024 * 1024,
+        per_host_limit: int = 4,
+        max_clients: int = 16,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 5,
+    ):
+        self.timeout = timeout
+        self.max_size = max_size
+        self.per_host_limit = per_host_limit
+        self.max_clients = max_clients
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = get_logger("MediaDownloader")
+        # AsyncSession 和 Semaphore 都绑定事件循环，因此按事件循环分别维护
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._sync_local = threading.local()
+        self._sync_sessions: "weakref.WeakSet[Session]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _get_loop_state(self) -> _LoopState:
+        from curl_cffi import AsyncSession
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_states.get(loop)
+            if state is None:
+                session = AsyncSession(trust_env=True, timeout=self.timeout, max_clients=self.max_clients)
+                state = _LoopState(session)
+                self._loop_states[loop] = state
+            return state
+
+    def _get_host_semaphore(self, state: _LoopState, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = state.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            state.host_semaphores[host] = semaphore
+        return semaphore
+
+    def _get_sync_session(self) -> "Session":
+        from curl_cffi import Session
+
+        session = getattr(self._sync_local, "session", None)
+        if session is None:
+            session = Session(trust_env=True, timeout=self.timeout)
+            self._sync_local.session = session
+            self._sync_sessions.add(session)
+        return session
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1)
+
+    def _check_status(self, url: str, status_code: int) -> None:
+        if status_code != 200:
+            raise DownloadError(
+                f"Failed to download file from {url}, status: {status_code}",
+                retryable=status_code in self.RETRYABLE_STATUS,
+            )
+
+    def _check_content_length(self, url: str, headers) -> None:
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_size:
+            raise DownloadError(f"File from {url} exceeds size limit: {content_length} > {self.max_size} bytes")
+
+    async def _fetch(self, state: _LoopState, url: str) -> bytes:
+        resp = await state.session.get(url, stream=True)
+        try:
+            self._check_status(url, resp.status_code)
+            self._check_content_length(url, resp.headers)
+            buffer = bytearray()
+            async for chunk in resp.aiter_content():
+                buffer.extend(chunk)
+                if len(buffer) > self.max_size:
+                    raise DownloadError(f"File from {url} exceeds size limit: {self.max_size} bytes")
+            return bytes(buffer)
+        finally:
+            await resp.aclose()
+
+    async def download(self, url: str) -> bytes:
+        """下载文件内容"""
+        from curl_cffi.requests.exceptions import RequestException
+
+        state = self._get_loop_state()
+        semaphore = self._get_host_semaphore(state, url)
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    return await self._fetch(state, url)
+            except (DownloadError, RequestException) as e:
+                retryable = e.retryable if isinstance(e, DownloadError) else True
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                self.logger.warning(f"Download failed, retrying in {delay:.2f}s ({attempt}/{self.max_retries}): {e}")
+                await asyncio.sleep(delay)
+
+    def download_sync(self, url: str) -> bytes:
+        """同步下载文件内容"""
+        from curl_cffi.requests.exceptions import RequestException
+
+        session = self._get_sync_session()
+        attempt = 0
+        while True:
+            try:
+                resp = session.get(url)
+                self._check_status(url, resp.status_code)
+                self._check_content_length(url, resp.headers)
+                if len(resp.content) > self.max_size:
+                    raise DownloadError(f"File from {url} exceeds size limit: {self.max_size} bytes")
+                return resp.content
+            except (DownloadError, RequestException) as e:
+                retryable = e.retryable if isinstance(e, DownloadError) else True
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                self.logger.warning(f"Download failed, retrying in {delay:.2f}s ({attempt}/{self.max_retries}): {e}")
+                time.sleep(delay)
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环中的连接池"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_states.pop(loop, None)
+        if state is not None:
+            await state.session.close()
+
+    def close(self) -> None:
+        """关闭所有连接池，应在事件循环停止后调用"""
+        for session in list(self._sync_sessions):
+            session.close()
+        self._sync_sessions = weakref.WeakSet()
+        self._sync_local = threading.local()
+        with self._lock:
+            states = list(self._loop_states.items())
+            self._loop_states = weakref.WeakKeyDictionary()
+        for loop, state in states:
+            if loop.is_closed() or loop.is_running():
+                continue
+            try:
+                loop.run_until_complete(state.session.close())
+            except Exception as e:
+                self.logger.warning(f"Failed to close download session: {e}")
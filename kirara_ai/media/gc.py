@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from kirara_ai.config.global_config import MediaConfig
+from kirara_ai.logger import get_logger
+from kirara_ai.media.metadata import MediaMetadata
+
+if TYPE_CHECKING:
+    from kirara_ai.media.manager import MediaManager
+
+
+class MediaGarbageCollector:
+    """
+    媒体垃圾回收器。
+    增量维护引用计数索引和无引用候选集合，后台按批次限速删除长时间未访问的无引用媒体；
+    超出磁盘配额时，按最近最少使用的顺序淘汰无引用媒体。
+    """
+
+    def __init__(self, manager: "MediaManager", config: Optional[MediaConfig] = None):
+        self.manager = manager
+        self.config = config or MediaConfig()
+        self.logger = get_logger("MediaGC")
+        self._lock = threading.RLock()
+        # media_id -> 引用数量
+        self._ref_counts: Dict[str, int] = {}
+        # 引用数量为 0 的候选集合
+        self._unreferenced: Set[str] = set()
+        # media_id -> 最近访问时间（时间戳）
+        self._last_access: Dict[str, float] = {}
+        # media_id -> 文件大小
+        self._sizes: Dict[str, int] = {}
+        self._total_size = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, config: MediaConfig) -> None:
+        """更新回收策略"""
+        self.config = config
+
+    @property
+    def total_size(self) -> int:
+        """已登记媒体的总大小（字节）"""
+        return self._total_size
+
+    def get_ref_count(self, media_id: str) -> int:
+        """获取媒体的引用数量"""
+        return self._ref_counts.get(media_id, 0)
+
+    def get_unreferenced(self) -> Set[str]:
+        """获取当前无引用的媒体 ID"""
+        with self._lock:
+            return set(self._unreferenced)
+
+    def track(self, metadata: MediaMetadata) -> None:
+        """登记或更新媒体的索引信息，元数据变化时调用"""
+        media_id = metadata.media_id
+        with self._lock:
+            ref_count = len(metadata.references)
+            self._ref_counts[media_id] = ref_count
+            if ref_count == 0:
+                self._unreferenced.add(media_id)
+            else:
+                self._unreferenced.discard(media_id)
+
+            size = metadata.size or 0
+            self._total_size += size - self._sizes.get(media_id, 0)
+            self._sizes[media_id] = size
+
+            if media_id not in self._last_access:
+                self._last_access[media_id] = metadata.created_at.timestamp()
+
+    def untrack(self, media_id: str) -> None:
+        """媒体被删除时移除其索引信息"""
+        with self._lock:
+            self._ref_counts.pop(media_id, None)
+            self._unreferenced.discard(media_id)
+            self._last_access.pop(media_id, None)
+            self._total_size -= self._sizes.pop(media_id, 0)
+
+    def touch(self, media_id: str) -> None:
+        """记录媒体被访问"""
+        if media_id in self._ref_counts:
+            self._last_access[media_id] = time.time()
+
+    def _expired_candidates(self, now: float) -> List[str]:
+        """获取超过保留时长的无引用媒体，按最近访问时间升序"""
+        deadline = now - self.config.gc_min_unreferenced_age
+        with self._lock:
+            expired = [
+                (self._last_access.get(media_id, 0), media_id)
+                for media_id in self._unreferenced
+                if self._last_access.get(media_id, 0) <= deadline
+            ]
+        expired.sort()
+        return [media_id for _, media_id in expired]
+
+    def _quota_candidates(self) -> List[str]:
+        """超出磁盘配额时，按最近最少使用顺序挑选需要淘汰的无引用媒体"""
+        quota = self.config.disk_quota_mb * 1024 * 1024
+        if quota <= 0 or self._total_size <= quota:
+            return []
+        with self._lock:
+            excess = self._total_size - quota
+            lru = sorted(self._unreferenced, key=lambda media_id: self._last_access.get(media_id, 0))
+        victims = []
+        for media_id in lru:
+            if excess <= 0:
+                break
+            victims.append(media_id)
+            excess -= self._sizes.get(media_id, 0)
+        return victims
+
+    def _delete_batch(self, media_ids: List[str]) -> int:
+        """删除一批媒体，跳过期间重新被引用的媒体"""
+        count = 0
+        for media_id in media_ids:
+            if self.get_ref_count(media_id) > 0 or media_id not in self.manager.metadata_cache:
+                continue
+            try:
+                self.manager.delete_media(media_id)
+                count += 1
+            except Exception as e:
+                self.logger.error(f"Failed to delete media {media_id}: {e}")
+        return count
+
+    async def _delete_in_batches(self, media_ids: List[str]) -> int:
+        count = 0
+        batch_size = max(1, self.config.gc_batch_size)
+        for i in range(0, len(media_ids), batch_size):
+            if i > 0:
+                await asyncio.sleep(self.config.gc_batch_interval)
+            count += self._delete_batch(media_ids[i:i + batch_size])
+        return count
+
+    async def collect(self) -> int:
+        """执行一次回收，返回删除的媒体数量"""
+        count = await self._delete_in_batches(self._expired_candidates(time.time()))
+        count += await self._delete_in_batches(self._quota_candidates())
+        if count:
+            self.logger.info(f"Collected {count} unreferenced media, total size: {self._total_size} bytes")
+        return count
+
+    def collect_all(self) -> int:
+        """立即同步删除所有无引用媒体，返回删除的媒体数量"""
+        return self._delete_batch(list(self.get_unreferenced()))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.gc_interval)
+            try:
+                await self.collect()
+            except Exception as e:
+                self.logger.opt(exception=e).error(f"Media garbage collection failed: {e}")
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """在指定事件循环中启动后台回收任务"""
+        if self.config.gc_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def stop(self) -> None:
+        """停止后台回收任务"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
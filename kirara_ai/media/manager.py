@@ -3,15 +3,23 @@ import base64
 import hashlib
 import json
 import shutil
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import aiofiles
 
 from kirara_ai.logger import get_logger
+from kirara_ai.media.downloader import MediaDownloader
+from kirara_ai.media.gc import MediaGarbageCollector
 from kirara_ai.media.metadata import MediaMetadata
+from kirara_ai.media.thumbnail import ThumbnailCache
 from kirara_ai.media.types.media_type import MediaType
 from kirara_ai.media.utils.mime import detect_mime_type
+from kirara_ai.media.utils.singleflight import SingleFlight
+from kirara_ai.tracing.span import SPAN_MEDIA, start_span
 
 if TYPE_CHECKING:
     from kirara_ai.im.message import MediaMessage
@@ -21,18 +29,35 @@ if TYPE_CHECKING:
 class MediaManager:
     """媒体管理器，负责媒体文件的注册、引用计数和生命周期管理"""
     
+    # URL -> media_id 映射的有效期（秒）和最大条目数
+    URL_MEMO_TTL = 300
+    URL_MEMO_MAX_SIZE = 1024
+    
     def __init__(self, media_dir: str = "data/media"):
         self.media_dir = Path(media_dir)
         self.metadata_dir = self.media_dir / "metadata"
         self.files_dir = self.media_dir / "files"
+        self.thumbnails_dir = self.media_dir / "thumbnails"
         self.metadata_cache: Dict[str, MediaMetadata] = {}
         self.logger = get_logger("MediaManager")
         self._pending_tasks: set[asyncio.Task] = set()
         
+        # 并发请求合并：相同 URL 只下载一次，相同 media_id 只落盘一次
+        self._download_flight: SingleFlight[str, bytes] = SingleFlight()
+        self._register_flight: SingleFlight[str, str] = SingleFlight()
+        self._ensure_flight: SingleFlight[str, Optional[Path]] = SingleFlight()
+        self._url_memo: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._url_memo_lock = threading.Lock()
+        
         # 确保目录存在
         self.media_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_dir.mkdir(parents=True, exist_ok=True)
         self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbnails = ThumbnailCache(self.thumbnails_dir)
+        # 共享的下载客户端，复用连接池
+        self.downloader = MediaDownloader()
+        # 引用计数索引和后台垃圾回收
+        self.gc = MediaGarbageCollector(self)
         
         # 加载所有元数据
         self._load_all_metadata()
@@ -45,6 +70,7 @@ class MediaManager:
                 with open(metadata_file, "r", encoding="utf-8") as f:
                     metadata = MediaMetadata.from_dict(json.load(f))
                     self.metadata_cache[metadata.media_id] = metadata
+                    self.gc.track(metadata)
             except Exception as e:
                 self.logger.error(f"Failed to load metadata from {metadata_file}: {e}")
                 
@@ -54,6 +80,7 @@ class MediaManager:
         with open(metadata_path, "w", encoding="utf-8") as f:
             json.dump(metadata.to_dict(), f, ensure_ascii=False, indent=2)
         self.metadata_cache[metadata.media_id] = metadata
+        self.gc.track(metadata)
         
     def _get_file_path(self, media_id: str, format: str) -> Path:
         """获取媒体文件路径"""
@@ -75,31 +102,45 @@ class MediaManager:
     
     async def _download_file_async(self, url: str) -> bytes:
         """异步下载文件"""
-        from curl_cffi import AsyncSession, Response
-
         # 如果 url 是 file:// 开头，则直接返回文件内容
         if url.startswith("file://"):
             async with aiofiles.open(url[7:], "rb") as f:
                 return await f.read()
-        async with AsyncSession(trust_env=True, timeout=3000) as session:
-            resp: Response = await session.get(url)
-            if resp.status_code != 200:
-                raise ValueError(f"Failed to download file from {url}, status: {resp.status_code}")
-            return resp.content
+        with start_span("media download", SPAN_MEDIA, {"media.url": url}):
+            return await self.downloader.download(url)
     
     def _download_file_sync(self, url: str) -> bytes:
         """同步下载文件"""
-        from curl_cffi import Response, Session
-
         # 如果 url 是 file:// 开头，则直接返回文件内容
         if url.startswith("file://"):
             with open(url[7:], "rb") as f:
                 return f.read()
-        with Session() as session:
-            resp: Response = session.get(url)
-            if resp.status_code != 200:
-                raise ValueError(f"Failed to download file from {url}, status: {resp.status_code}")
-            return resp.content
+        return self.downloader.download_sync(url)
+    
+    async def _download_coalesced(self, url: str) -> bytes:
+        """下载文件，同一 URL 的并发下载会被合并为一次"""
+        return await self._download_flight.do(url, lambda: self._download_file_async(url))
+    
+    def _memo_get(self, url: str) -> Optional[str]:
+        """从 URL 映射中查找 media_id，过期或媒体已删除时返回 None"""
+        with self._url_memo_lock:
+            entry = self._url_memo.get(url)
+            if entry is None:
+                return None
+            media_id, expires_at = entry
+            if expires_at < time.monotonic() or media_id not in self.metadata_cache:
+                del self._url_memo[url]
+                return None
+            self._url_memo.move_to_end(url)
+            return media_id
+    
+    def _memo_put(self, url: str, media_id: str) -> None:
+        """记录 URL 对应的 media_id"""
+        with self._url_memo_lock:
+            self._url_memo[url] = (media_id, time.monotonic() + self.URL_MEMO_TTL)
+            self._url_memo.move_to_end(url)
+            while len(self._url_memo) > self.URL_MEMO_MAX_SIZE:
+                self._url_memo.popitem(last=False)
     
     async def register_media(
         self,
@@ -136,6 +177,13 @@ class MediaManager:
         if not any([url, path, data]):
             raise ValueError("Must provide at least one of url, path, or data")
 
+        # 短时间内重复出现的 URL 直接复用已注册的媒体
+        if url and not path and data is None:
+            memo_media_id = self._memo_get(url)
+            if memo_media_id:
+                self.logger.debug(f"Media URL already registered: {url} -> {memo_media_id}")
+                return memo_media_id
+
         # 获取数据
         if path:
             file_path = Path(path)
@@ -149,7 +197,7 @@ class MediaManager:
                 raise
         elif url:
             try:
-                data = await self._download_file_async(url)
+                data = await self._download_coalesced(url)
             except Exception as e:
                 self.logger.error(f"Failed to download file: {e}", exc_info=True)
                 raise
@@ -160,12 +208,45 @@ class MediaManager:
         
         hash_data = await asyncio.to_thread(hashlib.sha1, data)
         media_id = hash_data.hexdigest()
+        if url:
+            self._memo_put(url, media_id)
 
         # 检查是否已存在相同 media_id 的媒体
         if media_id in self.metadata_cache:
             self.logger.info(f"Media already exists: {media_id}")
             return media_id
 
+        # 相同内容的并发注册只保存一次
+        return await self._register_flight.do(
+            media_id,
+            lambda: self._store_media(
+                media_id,
+                data,
+                url=url,
+                format=format,
+                media_type=media_type,
+                size=size,
+                source=source,
+                description=description,
+                tags=tags,
+                reference_id=reference_id,
+            ),
+        )
+
+    async def _store_media(
+        self,
+        media_id: str,
+        data: bytes,
+        url: Optional[str] = None,
+        format: Optional[str] = None,
+        media_type: Optional[MediaType] = None,
+        size: Optional[int] = None,
+        source: Optional[str] = None,
+        description: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        reference_id: Optional[str] = None,
+    ) -> str:
+        """保存媒体文件并创建元数据"""
         # 获取数据大小
         if not size:
             size = len(data)
@@ -206,6 +287,10 @@ class MediaManager:
         # 保存元数据
         self._save_metadata(metadata)
         self.logger.info(f"Registered media: {media_id}")
+
+        # 在后台预生成缩略图
+        if media_type == MediaType.IMAGE and format != "gif":
+            self.thumbnails.schedule(media_id, target_path)
         return media_id
     
     async def register_from_path(
@@ -274,6 +359,9 @@ class MediaManager:
             raise ValueError(f"Media not found: {media_id}")
         
         metadata = self.metadata_cache[media_id]
+        # 引用已存在时无需重复写入元数据
+        if reference_id in metadata.references:
+            return
         metadata.references.add(reference_id)
         self._save_metadata(metadata)
         
@@ -305,6 +393,7 @@ class MediaManager:
             file_path = self._get_file_path(media_id, metadata.format)
             if file_path.exists():
                 file_path.unlink()
+        self.thumbnails.delete(media_id)
         
         # 删除元数据
         metadata_path = self.metadata_dir / f"{media_id}.json"
@@ -313,6 +402,7 @@ class MediaManager:
         
         # 从缓存中移除
         del self.metadata_cache[media_id]
+        self.gc.untrack(media_id)
         
         self.logger.info(f"Deleted media: {media_id}")
     
@@ -376,11 +466,42 @@ class MediaManager:
         """获取媒体元数据"""
         return self.metadata_cache.get(media_id)
     
+    def load_metadata(self, media_id: str) -> Optional[MediaMetadata]:
+        """从磁盘加载单个媒体的元数据，用于获取其他进程注册的媒体"""
+        if media_id in self.metadata_cache:
+            return self.metadata_cache[media_id]
+        metadata_path = self.metadata_dir / f"{media_id}.json"
+        if not metadata_path.exists():
+            return None
+        try:
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                metadata = MediaMetadata.from_dict(json.load(f))
+        except Exception as e:
+            self.logger.error(f"Failed to load metadata from {metadata_path}: {e}")
+            return None
+        self.metadata_cache[metadata.media_id] = metadata
+        self.gc.track(metadata)
+        return metadata
+    
     async def ensure_file_exists(self, media_id: str) -> Optional[Path]:
         """确保媒体文件存在，如果不存在则尝试下载或复制"""
         if media_id not in self.metadata_cache:
             return None
         
+        metadata = self.metadata_cache[media_id]
+        if metadata.format:
+            file_path = self._get_file_path(media_id, metadata.format)
+            if file_path.exists():
+                return file_path
+        
+        # 相同媒体的并发补全只执行一次
+        return await self._ensure_flight.do(media_id, lambda: self._ensure_file_exists(media_id))
+    
+    async def _ensure_file_exists(self, media_id: str) -> Optional[Path]:
+        """下载或复制缺失的媒体文件"""
+        if media_id not in self.metadata_cache:
+            return None
+        
         metadata = self.metadata_cache[media_id]
         
         # 如果没有格式信息，无法确定文件路径
@@ -412,7 +533,7 @@ class MediaManager:
                         # 如果有URL，尝试下载并检测格式
             elif metadata.url:
                 try:
-                    data = await self._download_file_async(metadata.url)
+                    data = await self._download_coalesced(metadata.url)
                     _, media_type, format = detect_mime_type(data=data)
                     
                     # 更新元数据
@@ -440,7 +561,7 @@ class MediaManager:
         # 如果文件不存在，尝试从URL下载
         if metadata.url:
             try:
-                data = await self._download_file_async(metadata.url)
+                data = await self._download_coalesced(metadata.url)
                 await self._save_file_async(data, file_path)
                 return file_path
             except Exception as e:
@@ -463,6 +584,7 @@ class MediaManager:
         if media_id not in self.metadata_cache:
             return None
         
+        self.gc.touch(media_id)
         metadata = self.metadata_cache[media_id]
         
         # 如果有原始路径，直接返回
@@ -472,6 +594,17 @@ class MediaManager:
         # 否则确保文件存在并返回
         return await self.ensure_file_exists(media_id)
     
+    async def get_thumbnail_path(self, media_id: str) -> Optional[Path]:
+        """获取图片缩略图路径，缩略图缺失或过期时重新生成"""
+        metadata = self.metadata_cache.get(media_id)
+        if not metadata or metadata.media_type != MediaType.IMAGE:
+            return None
+        
+        file_path = await self.get_file_path(media_id)
+        if not file_path:
+            return None
+        return await self.thumbnails.get_or_create(media_id, file_path)
+    
     async def get_data(self, media_id: str) -> Optional[bytes]:
         """获取媒体文件数据"""
         if media_id not in self.metadata_cache:
@@ -491,7 +624,7 @@ class MediaManager:
         # 尝试从URL下载
         if metadata.url:
             try:
-                return await self._download_file_async(metadata.url)
+                return await self._download_coalesced(metadata.url)
             except Exception as e:
                 self.logger.error(f"Failed to download media from URL: {metadata.url}, error: {e}")
         
@@ -583,13 +716,7 @@ class MediaManager:
     
     def cleanup_unreferenced(self) -> int:
         """清理没有引用的媒体文件，返回清理的文件数量"""
-        count = 0
-        for media_id, metadata in list(self.metadata_cache.items()):
-            if not metadata.references:
-                self.delete_media(media_id)
-                count += 1
-        
-        return count
+        return self.gc.collect_all()
     
     async def create_media_message(self, media_id: str) -> Optional["MediaMessage"]:
         """根据媒体ID创建MediaMessage对象"""
@@ -616,6 +743,12 @@ class MediaManager:
         from kirara_ai.media.media_object import Media
         return Media(media_id=media_id, media_manager=self)
     
+    def shutdown(self) -> None:
+        """关闭媒体管理器的后台任务和连接池"""
+        self.gc.stop()
+        self.thumbnails.shutdown()
+        self.downloader.close()
+    
     def __new__(cls, *args, **kwargs) -> "MediaManager":
         if not hasattr(cls, "_instance"):
             print("new MediaManager")
@@ -0,0 +1,122 @@
+import asyncio
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from kirara_ai.logger import get_logger
+
+THUMBNAIL_SIZE = 300
+THUMBNAIL_FORMAT = "webp"
+THUMBNAIL_QUALITY = 65
+
+
+def render_thumbnail(image_data: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    """将图片数据缩放为 WEBP 缩略图（同步执行，应在线程中调用）"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_data)) as img:
+        width, height = img.size
+        if width > height:
+            new_width = size
+            new_height = int(height * (size / width))
+        else:
+            new_height = size
+            new_width = int(width * (size / height))
+
+        # 对 JPEG 使用 draft 模式，解码时直接缩小，避免解码完整尺寸
+        img.draft("RGB", (new_width, new_height))
+        img.thumbnail((new_width, new_height))
+        output = io.BytesIO()
+        img.convert("RGB").save(output, format="WEBP", optimize=True, quality=THUMBNAIL_QUALITY)
+        return output.getvalue()
+
+
+class ThumbnailCache:
+    """
+    缩略图缓存，缩略图按 media_id 持久化到磁盘，只生成一次。
+    图片注册时由后台线程池预生成；缩略图缺失或比原文件旧时按需重建。
+    """
+
+    def __init__(self, thumbnails_dir: Path, max_workers: int = 2):
+        self.thumbnails_dir = thumbnails_dir
+        self.thumbnails_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.logger = get_logger("ThumbnailCache")
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_path(self, media_id: str) -> Path:
+        """获取缩略图文件路径"""
+        return self.thumbnails_dir / f"{media_id}.{THUMBNAIL_FORMAT}"
+
+    def is_fresh(self, media_id: str, source_path: Path) -> bool:
+        """缩略图存在且不早于原文件时认为有效"""
+        thumbnail_path = self.get_path(media_id)
+        try:
+            return thumbnail_path.stat().st_mtime >= source_path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="thumbnail"
+            )
+        return self._executor
+
+    def _build(self, media_id: str, source_path: Path) -> Path:
+        """生成缩略图并原子地写入磁盘"""
+        thumbnail_path = self.get_path(media_id)
+        if self.is_fresh(media_id, source_path):
+            return thumbnail_path
+        data = render_thumbnail(source_path.read_bytes())
+        tmp_path = thumbnail_path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(thumbnail_path)
+        return thumbnail_path
+
+    def submit(self, media_id: str, source_path: Path) -> Future:
+        """提交缩略图生成任务，同一 media_id 同时只会生成一次"""
+        with self._lock:
+            future = self._inflight.get(media_id)
+            if future is not None:
+                return future
+            future = self._get_executor().submit(self._build, media_id, source_path)
+            self._inflight[media_id] = future
+
+        def _on_done(f: Future) -> None:
+            with self._lock:
+                if self._inflight.get(media_id) is f:
+                    del self._inflight[media_id]
+            if not f.cancelled() and f.exception() is not None:
+                self.logger.warning(f"Failed to generate thumbnail for {media_id}: {f.exception()}")
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def schedule(self, media_id: str, source_path: Path) -> None:
+        """在后台预生成缩略图"""
+        if self.is_fresh(media_id, source_path):
+            return
+        self.submit(media_id, source_path)
+
+    async def get_or_create(self, media_id: str, source_path: Path) -> Path:
+        """获取缩略图路径，缺失或过期时重新生成"""
+        if self.is_fresh(media_id, source_path):
+            return self.get_path(media_id)
+        return await asyncio.wrap_future(self.submit(media_id, source_path))
+
+    def delete(self, media_id: str) -> None:
+        """删除缩略图"""
+        thumbnail_path = self.get_path(media_id)
+        if thumbnail_path.exists():
+            thumbnail_path.unlink()
+
+    def shutdown(self) -> None:
+        """关闭后台线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -1,3 +1,4 @@
 from kirara_ai.media.utils.mime import detect_mime_type, mime_remapping
+from kirara_ai.media.utils.singleflight import SingleFlight
 
-__all__ = ["detect_mime_type", "mime_remapping"] 
\ No newline at end of file
+__all__ = ["detect_mime_type", "mime_remapping", "SingleFlight"]
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[K, T]):
+    """
+    并发请求合并：同一个 key 同时只会执行一次，其余调用者等待并共享同一个结果。
+    结果通过 concurrent.futures.Future 传递，因此跨线程、跨事件循环的调用者也能被合并。
+    """
+
+    def __init__(self):
+        self._calls: Dict[K, Future] = {}
+        self._lock = threading.Lock()
+
+    def inflight(self, key: K) -> bool:
+        """判断 key 是否正在执行"""
+        with self._lock:
+            return key in self._calls
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行 fn，如果相同 key 的调用正在进行，则等待它的结果"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            # shield 防止等待者被取消时连带取消共享的 future
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        else:
+            if not future.done():
+                future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
@@ -148,18 +148,20 @@ class MemoryManager(MediaReferenceProvider[List[MemoryEntry]]):
         return self.memories.get(reference_key)
     
     def _register_media_reference(self, entry: MemoryEntry, reference_key: str) -> None:
-        """注册媒体引用"""
+        """注册媒体引用，同一条记忆中的媒体批量登记"""
+        media_ids = entry.metadata.get("_media_ids", [])
+        if not media_ids:
+            return
         media_carrier = self.container.resolve(MediaCarrierService)
-        for media_id in entry.metadata.get("_media_ids", []):
-            media_carrier.register_reference(media_id, "memory", reference_key)
+        media_carrier.register_references(media_ids, "memory", reference_key)
 
     def _remove_media_references(self, removed_entries: List[MemoryEntry], unremoved_entries: List[MemoryEntry], reference_key: str) -> None:
         """移除媒体引用"""
+        # 确保 id 没有在 unremoved_entries 中
+        removed_media_ids = {media_id for entry in removed_entries for media_id in entry.metadata.get("_media_ids", [])}
+        unremoved_media_ids = {media_id for entry in unremoved_entries for media_id in entry.metadata.get("_media_ids", [])}
+        stale_media_ids = removed_media_ids - unremoved_media_ids
+        if not stale_media_ids:
+            return
         media_carrier = self.container.resolve(MediaCarrierService)
-        # 确保 id 没有在  unremoved_entries 中
-        removed_media_ids = [media_id for entry in removed_entries for media_id in entry.metadata.get("_media_ids", [])]
-        unremoved_media_ids = [media_id for entry in unremoved_entries for media_id in entry.metadata.get("_media_ids", [])]
-        for media_id in removed_media_ids:
-            if media_id not in unremoved_media_ids:
-                media_carrier.remove_reference(media_id, "memory", reference_key)
-
+        media_carrier.remove_references(stale_media_ids, "memory", reference_key)
@@ -5,7 +5,6 @@ import uuid
 from io import BytesIO
 from typing import Any, List, Optional
 
-import aiohttp
 from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel, ConfigDict, Field
 from starlette.routing import Route
@@ -19,6 +18,8 @@ from kirara_ai.im.message import (FileElement, ImageMessage, IMMessage, MessageE
                                   VoiceMessage)
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.logger import HypercornLoggerWrapper, get_logger
+from kirara_ai.media import MediaManager
+from kirara_ai.media.downloader import MediaDownloader
 from kirara_ai.web.app import WebServer
 from kirara_ai.workflow.core.dispatch.dispatcher import WorkflowDispatcher
 
@@ -74,8 +75,9 @@ class WecomConfig(BaseModel):
 class WeComUtils:
     """企业微信相关的工具类"""
 
-    def __init__(self, client: BaseWeChatClient):
+    def __init__(self, client: BaseWeChatClient, downloader: MediaDownloader):
         self.client = client
+        self.downloader = downloader
         self.logger = get_logger("WeComUtils")
 
     @property
@@ -100,12 +102,7 @@ class WeComUtils:
         """下载企业微信的媒体文件"""
         url = f"https://qyapi.weixin.qq.com/cgi-bin/media/get?access_token={self.access_token}&media_id={media_id}"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.read()
-                    self.logger.error(
-                        f"Failed to download media: {response.status}")
+            return await self.downloader.download(url)
         except Exception as e:
             self.logger.error(f"Failed to download media: {str(e)}")
         return None
@@ -116,6 +113,7 @@ class WecomAdapter(IMAdapter):
 
     dispatcher: WorkflowDispatcher
     web_server: WebServer
+    media_manager: MediaManager
 
     def __init__(self, config: WecomConfig):
         self.wecom_utils = None
@@ -151,7 +149,7 @@ class WecomAdapter(IMAdapter):
         self.api_delegate.setup_api(self.config)
 
         # 设置工具类
-        self.wecom_utils = WeComUtils(self.api_delegate.client)
+        self.wecom_utils = WeComUtils(self.api_delegate.client, self.media_manager.downloader)
 
     def setup_routes(self):
         if self.config.host:
@@ -248,13 +246,13 @@ class WecomAdapter(IMAdapter):
         if raw_message.type == "text":
             message_elements.append(TextMessage(text=raw_message.content))
         elif raw_message.type == "image":
-            message_elements.append(ImageMessage(url=raw_message.image))
+            message_elements.append(await ImageMessage.create(url=raw_message.image))
         elif raw_message.type == "voice" and media_path:
-            message_elements.append(VoiceMessage(url=media_path))
+            message_elements.append(await VoiceMessage.create(url=media_path))
         elif raw_message.type == "video" and media_path:
-            message_elements.append(VideoElement(path=media_path))
+            message_elements.append(await VideoElement.create(path=media_path))
         elif raw_message.type == "file" and media_path:
-            message_elements.append(FileElement(path=media_path))
+            message_elements.append(await FileElement.create(path=media_path))
         elif raw_message.type == "location":
             location_text = f"[Location] {raw_message.label} (X: {raw_message.location_x}, Y: {raw_message.location_y})"
             message_elements.append(TextMessage(text=location_text))
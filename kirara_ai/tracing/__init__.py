@@ -2,12 +2,21 @@ from kirara_ai.tracing.core import TracerBase
 from kirara_ai.tracing.decorator import trace_llm_chat
 from kirara_ai.tracing.llm_tracer import LLMTracer
 from kirara_ai.tracing.manager import TracingManager
-from kirara_ai.tracing.models import LLMRequestTrace
+from kirara_ai.tracing.models import LLMRequestPayload, LLMRequestTrace, LLMTraceRollup, TraceSpan
+from kirara_ai.tracing.span import Span, current_span, start_span
+from kirara_ai.tracing.span_tracer import SpanTracer
 
 __all__ = [
     "TracingManager", 
     "LLMRequestTrace",
+    "LLMRequestPayload",
+    "LLMTraceRollup",
     "TracerBase",
     "LLMTracer",
+    "TraceSpan",
+    "Span",
+    "SpanTracer",
+    "current_span",
+    "start_span",
     "trace_llm_chat"
 ] 
\ No newline at end of file
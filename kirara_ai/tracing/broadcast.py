@@ -0,0 +1,148 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+from kirara_ai.logger import get_logger
+
+logger = get_logger("TraceBroadcast")
+
+# 每个客户端最多积压的消息数量，超出时丢弃最旧的消息
+DEFAULT_MAX_QUEUE_SIZE = 1000
+# 其他线程产生的消息合并后投递到事件循环的间隔（秒）
+DEFAULT_BATCH_INTERVAL = 0.1
+
+
+def _coalesce_key(message: Any) -> Optional[str]:
+    """同一追踪记录的新增 / 更新消息可以合并"""
+    if not isinstance(message, dict) or message.get("type") not in ("new", "update"):
+        return None
+    data = message.get("data")
+    if isinstance(data, dict):
+        return data.get("trace_id")
+    return None
+
+
+class CoalescingQueue(asyncio.Queue):
+    """
+    WebSocket 客户端的消息队列：
+    队列已满时丢弃最旧的消息；同一追踪记录尚未发送的消息只保留一条，内容替换为最新数据。
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAX_QUEUE_SIZE):
+        super().__init__(maxsize)
+        # 被丢弃的消息数量
+        self.dropped = 0
+
+    def _init(self, maxsize):
+        super()._init(maxsize)  # type: ignore[misc]
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    def _get(self):
+        item = super()._get()  # type: ignore[misc]
+        key = _coalesce_key(item)
+        if key is not None and self._pending.get(key) is item:
+            del self._pending[key]
+        return item
+
+    def put_nowait(self, item):
+        key = _coalesce_key(item)
+        if key is not None:
+            queued = self._pending.get(key)
+            if queued is not None:
+                # 保留原消息的类型（new 仍为 new），只更新数据
+                queued["data"] = item["data"]
+                return
+            item = dict(item)
+        if self.full():
+            self.get_nowait()
+            self.dropped += 1
+        super().put_nowait(item)
+        if key is not None:
+            self._pending[key] = item
+
+
+class WebSocketBroadcaster:
+    """
+    追踪消息的 WebSocket 广播器。
+    可以在任意线程调用 broadcast：事件循环线程内直接投递，其他线程的消息先缓冲，
+    每隔 batch_interval 通过 call_soon_threadsafe 批量投递一次，避免频繁唤醒事件循环。
+    """
+
+    def __init__(self, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE, batch_interval: float = DEFAULT_BATCH_INTERVAL):
+        self.max_queue_size = max_queue_size
+        self.batch_interval = batch_interval
+        self.clients: List[CoalescingQueue] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._scheduled = False
+
+    def register(self) -> CoalescingQueue:
+        """注册客户端，需要在客户端所在的事件循环中调用"""
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        queue = CoalescingQueue(self.max_queue_size)
+        self.clients.append(queue)
+        return queue
+
+    def unregister(self, queue: asyncio.Queue) -> None:
+        if queue in self.clients:
+            self.clients.remove(queue)  # type: ignore[arg-type]
+
+    def _on_loop_thread(self, loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def broadcast(self, message: Dict[str, Any]) -> None:
+        """广播消息，线程安全"""
+        if not self.clients:
+            return
+        loop = self._loop
+        if loop is None or loop.is_closed() or self._on_loop_thread(loop):
+            self._deliver([message])
+            return
+
+        with self._lock:
+            self._buffer.append(message)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(loop.call_later, self.batch_interval, self._flush)
+        except RuntimeError:
+            # 事件循环已关闭
+            with self._lock:
+                self._buffer.clear()
+                self._scheduled = False
+
+    def _flush(self) -> None:
+        with self._lock:
+            messages, self._buffer = self._buffer, []
+            self._scheduled = False
+        self._deliver(messages)
+
+    def _deliver(self, messages: List[Dict[str, Any]]) -> None:
+        for queue in list(self.clients):
+            for message in messages:
+                try:
+                    queue.put_nowait(message)
+                except Exception as e:
+                    logger.error(f"Error broadcasting message: {e}")
+                    self.unregister(queue)
+                    break
+            if queue.dropped:
+                logger.warning(f"WebSocket client is too slow, {queue.dropped} messages dropped")
+                queue.dropped = 0
+
+    def close(self) -> None:
+        """通知所有客户端关闭连接"""
+        for queue in list(self.clients):
+            try:
+                queue.put_nowait(None)
+            except Exception:
+                pass
+        self.clients.clear()
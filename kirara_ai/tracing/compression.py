@@ -0,0 +1,32 @@
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖，未安装时退回 zlib
+    zstandard = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+
+def compress_json(text: str) -> bytes:
+    """压缩 JSON 文本，优先使用 zstd"""
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_json(data: bytes) -> str:
+    """
+    解压 JSON 文本。根据数据头识别编码：zstd 帧、zlib 流（首字节 0x78），
+    其余视为未压缩的 JSON（如迁移时从旧表搬运的数据）。
+    """
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed, cannot read zstd compressed payload")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if data[:1] == b"\x78":
+        return zlib.decompress(data).decode("utf-8")
+    return data.decode("utf-8")
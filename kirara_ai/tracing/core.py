@@ -1,7 +1,9 @@
 import abc
-import asyncio
+import base64
+import time
 import uuid
 from asyncio import Queue
+from datetime import datetime
 from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar
 
 from sqlalchemy import Column, DateTime, String, asc
@@ -12,9 +14,14 @@ from kirara_ai.events.tracing import TraceEvent
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.ioc.inject import Inject
 from kirara_ai.logger import get_logger
+from kirara_ai.tracing.broadcast import CoalescingQueue, WebSocketBroadcaster
+from kirara_ai.tracing.writer import TraceWriter
 
 logger = get_logger("Tracking")
 
+# 记录总数缓存的有效期（秒）
+COUNT_CACHE_TTL = 10.0
+
 
 class TraceRecord(Base):
     """跟踪记录基类，用于ORM映射"""
@@ -66,12 +73,19 @@ class TracerBase(Generic[R], abc.ABC):
         # 活跃追踪的映射表
         self._active_traces: Dict[str, Dict[str, Any]] = {}
 
-        # WebSocket消息队列映射表
-        self._ws_queues: List[Queue] = []
+        # WebSocket广播器，后台写入线程可以直接调用
+        self.ws_broadcaster = WebSocketBroadcaster()
+
+        # 过滤条件 -> (记录总数, 缓存时间)
+        self._count_cache: Dict[Tuple[Tuple[str, Any], ...], Tuple[int, float]] = {}
+
+        # 异步批量写入器，事件处理程序只负责入队
+        self.writer = TraceWriter(db_manager, record_class, on_written=self._on_traces_written)
 
     def initialize(self):
         """初始化追踪器，注册事件处理程序"""
         self.logger.info(f"Initializing {self.name} tracer")
+        self.writer.start()
         self._register_event_handlers()
         self.logger.info(f"{self.name} tracer initialized")
 
@@ -79,14 +93,10 @@ class TracerBase(Generic[R], abc.ABC):
         """关闭追踪器，取消事件注册"""
         self.logger.info(f"Shutting down {self.name} tracer")
         self._unregister_event_handlers()
+        self.writer.stop()
 
         # 关闭所有WebSocket连接
-        for queue in list(self._ws_queues):
-            try:
-                queue.put_nowait(None)
-            except Exception:
-                pass
-        self._ws_queues.clear()
+        self.ws_broadcaster.close()
 
     @abc.abstractmethod
     def _register_event_handlers(self):
@@ -102,7 +112,8 @@ class TracerBase(Generic[R], abc.ABC):
         page: int = 1,
         page_size: int = 20,
         order_by: str = "request_time",
-        order_desc: bool = True
+        order_desc: bool = True,
+        cursor: Optional[str] = None
     ) -> Tuple[List[R], int]:
         """统一的追踪记录查询方法
         
@@ -112,42 +123,87 @@ class TracerBase(Generic[R], abc.ABC):
             page_size: 每页记录数
             order_by: 排序字段
             order_desc: 是否降序排序
+            cursor: 翻页游标（上一页最后一条记录的 encode_cursor 结果），
+                按 request_time 排序时使用 (request_time, id) 键集分页代替 OFFSET，忽略 page
             
         Returns:
-            Tuple[List[R], int]: 记录列表和总记录数
+            Tuple[List[R], int]: 记录列表和总记录数（带缓存的近似值）
         """
-        with self.db_manager.get_session() as session:
-            from sqlalchemy import desc, func, select
+        self.writer.flush()
+        with self.db_manager.get_session(readonly=True) as session:
+            from sqlalchemy import desc, func, select, tuple_
 
             # 构建基础查询
             query = select(self.record_class)
             count_query = select(func.count()).select_from(self.record_class)
             
             # 应用过滤条件
+            applied: Dict[str, Any] = {}
             if filters:
                 for field, value in filters.items():
                     if value is not None and hasattr(self.record_class, field):
                         query = query.filter(getattr(self.record_class, field) == value)
                         count_query = count_query.filter(getattr(self.record_class, field) == value)
+                        applied[field] = value
             
-            # 应用排序
+            # 应用排序，id 作为相同时间的次级排序，保证翻页稳定
+            id_column = getattr(self.record_class, "id", None)
+            order_func = desc if order_desc else asc
             if hasattr(self.record_class, order_by):
-                order_func = desc if order_desc else asc
                 query = query.order_by(order_func(getattr(self.record_class, order_by)))
+                if id_column is not None:
+                    query = query.order_by(order_func(id_column))
             
             # 应用分页
-            if page > 0 and page_size > 0:
+            if cursor and order_by == "request_time" and id_column is not None:
+                key = tuple_(self.record_class.request_time, id_column)
+                cursor_key = tuple_(*self.decode_cursor(cursor))
+                query = query.filter(key < cursor_key if order_desc else key > cursor_key)
+                if page_size > 0:
+                    query = query.limit(page_size)
+            elif page > 0 and page_size > 0:
                 query = query.offset((page - 1) * page_size).limit(page_size)
             
             # 执行查询
-            total = session.execute(count_query).scalar() or 0
+            total = self._cached_count(session, count_query, applied)
             records = list(session.execute(query).scalars().all())
             
             return records, total
 
+    def _cached_count(self, session, count_query, filters: Dict[str, Any]) -> int:
+        """获取记录总数，短时间内复用缓存，避免每次翻页都执行 COUNT(*)"""
+        key = tuple(sorted(filters.items()))
+        now = time.monotonic()
+        cached = self._count_cache.get(key)
+        if cached and now - cached[1] < COUNT_CACHE_TTL:
+            return cached[0]
+        total = session.execute(count_query).scalar() or 0
+        self._count_cache[key] = (total, now)
+        return total
+
+    def invalidate_count_cache(self):
+        """清空记录总数缓存"""
+        self._count_cache.clear()
+
+    @staticmethod
+    def encode_cursor(record: TraceRecord) -> str:
+        """生成指向该记录之后的翻页游标"""
+        raw = f"{record.request_time.isoformat()}|{record.id}"  # type: ignore
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """解析翻页游标，格式错误时抛出 ValueError"""
+        try:
+            request_time, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(request_time), int(record_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
     def get_recent_traces(self, limit: int = 100) -> List[R]:
         """获取最近的跟踪记录"""
-        with self.db_manager.get_session() as session:
+        self.writer.flush()
+        with self.db_manager.get_session(readonly=True) as session:
             from sqlalchemy import desc, select
             stmt = select(self.record_class).order_by(desc(self.record_class.request_time)).limit(limit)
             result = session.execute(stmt)
@@ -155,7 +211,8 @@ class TracerBase(Generic[R], abc.ABC):
 
     def get_trace_by_id(self, trace_id: str) -> Optional[R]:
         """根据追踪ID获取跟踪记录"""
-        with self.db_manager.get_session() as session:
+        self.writer.flush()
+        with self.db_manager.get_session(readonly=True) as session:
             return session.query(self.record_class).filter_by(trace_id=trace_id).first()
 
     def save_trace_record(self, record: R) -> Dict[str, Any]:
@@ -163,6 +220,7 @@ class TracerBase(Generic[R], abc.ABC):
         with self.db_manager.get_session() as session:
             session.add(record)
             session.commit()
+            self.invalidate_count_cache()
             return record.to_dict()
 
     def update_trace_record(self, trace_id: str, event: TraceEvent) -> Optional[Dict[str, Any]]:
@@ -178,32 +236,37 @@ class TracerBase(Generic[R], abc.ABC):
                 return record.to_dict()
             return None
 
+    def _on_traces_written(self, inserted: List[str], updated: List[str]):
+        """批量写入完成后，向WebSocket客户端广播新增和更新的记录"""
+        # 新增记录直接计入无过滤条件的总数缓存，带过滤条件的缓存等待过期
+        if inserted and (cached := self._count_cache.get(())):
+            self._count_cache[()] = (cached[0] + len(inserted), cached[1])
+        if not self._ws_queues:
+            return
+        trace_ids = inserted + updated
+        with self.db_manager.get_session(readonly=True) as session:
+            records = session.query(self.record_class).filter(
+                self.record_class.trace_id.in_(trace_ids)  # type: ignore
+            ).all()
+            by_id = {record.trace_id: record.to_dict() for record in records}
+        messages = [{"type": "new", "data": by_id[trace_id]} for trace_id in inserted if trace_id in by_id]
+        messages += [{"type": "update", "data": by_id[trace_id]} for trace_id in updated if trace_id in by_id]
+        for message in messages:
+            self.broadcast_ws_message(message)
+
     # WebSocket相关方法
-    def register_ws_client(self) -> Queue:
-        """注册WebSocket客户端，返回一个消息队列"""
-        queue: Queue = Queue()
-        self._ws_queues.append(queue)
-        return queue
+    @property
+    def _ws_queues(self) -> List[CoalescingQueue]:
+        return self.ws_broadcaster.clients
+
+    def register_ws_client(self) -> CoalescingQueue:
+        """注册WebSocket客户端，返回一个有界的消息队列"""
+        return self.ws_broadcaster.register()
 
     def unregister_ws_client(self, queue: Queue):
         """注销WebSocket客户端"""
-        if queue in self._ws_queues:
-            self._ws_queues.remove(queue)
+        self.ws_broadcaster.unregister(queue)
 
     def broadcast_ws_message(self, message: Dict):
-        """向所有WebSocket客户端广播消息"""
-        dead_queues = []
-        for queue in self._ws_queues:
-            try:
-                queue.put_nowait(message)
-            except asyncio.QueueFull:
-                self.logger.warning(f"Queue is full, message dropped")
-                dead_queues.append(queue)
-            except Exception as e:
-                self.logger.error(f"Error broadcasting message: {e}")
-                dead_queues.append(queue)
-        
-        # 清理失效的队列
-        for queue in dead_queues:
-            if queue in self._ws_queues:
-                self._ws_queues.remove(queue)
+        """向所有WebSocket客户端广播消息，可以在任意线程调用"""
+        self.ws_broadcaster.broadcast(message)
@@ -4,6 +4,7 @@ from typing import Callable
 from kirara_ai.llm.format.request import LLMChatRequest
 from kirara_ai.llm.format.response import LLMChatResponse
 from kirara_ai.tracing.llm_tracer import LLMTracer
+from kirara_ai.tracing.span import SPAN_LLM, start_span
 
 
 def trace_llm_chat(func: Callable):
@@ -15,17 +16,21 @@ def trace_llm_chat(func: Callable):
         tracer: LLMTracer = self.tracer
         # 开始追踪
         trace_id = tracer.start_request_tracking(self.backend_name, req)
+        attributes = {"llm.backend": self.backend_name, "llm.model": req.model, "llm.trace_id": trace_id}
         
-        try:
-            # 调用原始方法
-            response = func(self, req)
-        except Exception as e:
-            # 记录错误
-            tracer.fail_request_tracking(trace_id, req, str(e))
-            raise e
-        else:
-            # 完成追踪
-            tracer.complete_request_tracking(trace_id, req, response)
-            return response
+        with start_span(f"llm {req.model}", SPAN_LLM, attributes) as span:
+            try:
+                # 调用原始方法
+                response = func(self, req)
+            except Exception as e:
+                # 记录错误
+                tracer.fail_request_tracking(trace_id, req, str(e))
+                raise e
+            else:
+                # 完成追踪
+                if response.usage:
+                    span.set_attribute("llm.total_tokens", response.usage.total_tokens)
+                tracer.complete_request_tracking(trace_id, req, response)
+                return response
             
     return wrapper
@@ -0,0 +1,86 @@
+import math
+from typing import Any, Dict, Optional
+
+
+class LatencyHistogram:
+    """
+    对数分桶的流式延迟直方图（DDSketch 风格）。
+    每个值落入 [gamma^(i-1), gamma^i) 的桶中，分位数的相对误差不超过 relative_accuracy，
+    内存占用只与数值跨度有关，与样本数量无关，且可以合并。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        # 桶编号 -> 样本数量
+        self.buckets: Dict[int, int] = {}
+        # 小于等于 0 的样本单独计数
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value: float, count: int = 1) -> None:
+        """记录一个延迟样本"""
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """合并另一个直方图，两者的精度必须一致"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """获取分位数，q 取值范围 [0, 1]，没有样本时返回 None"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # 取桶的中点，保证相对误差
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(value, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典，用于持久化"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """从持久化的字典恢复"""
+        histogram = cls(data.get("relative_accuracy", 0.01))
+        histogram.buckets = {int(index): count for index, count in data.get("buckets", {}).items()}
+        histogram.zero_count = data.get("zero_count", 0)
+        histogram.count = data.get("count", 0)
+        histogram.sum = data.get("sum", 0.0)
+        histogram.max = data.get("max", 0.0)
+        return histogram
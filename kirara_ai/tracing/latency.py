@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from kirara_ai.events.tracing import LLMRequestCompleteEvent, TraceEvent
+from kirara_ai.tracing.histogram import LatencyHistogram
+from kirara_ai.tracing.models import LLMLatencyHistogram
+
+# 统计维度
+DIMENSIONS = ("model", "backend")
+# 延迟指标，流式响应支持后可增加首 token 耗时（ttft）
+METRIC_TOTAL = "total"
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+# (日期, 维度, 名称, 指标)
+HistogramKey = Tuple[str, str, str, str]
+
+
+class LatencyRecorder:
+    """
+    按 天 × 维度（模型 / 后端）× 指标 维护LLM请求的延迟直方图。
+    直方图保存在内存中，由追踪写入器定期持久化，启动时从数据库恢复。
+    """
+
+    def __init__(self, window_days: int = 7, persist_interval: float = 60.0, relative_accuracy: float = 0.01):
+        self.window_days = window_days
+        self.persist_interval = persist_interval
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        self._histograms: Dict[HistogramKey, LatencyHistogram] = {}
+        self._dirty: Set[HistogramKey] = set()
+        self._last_persist = time.monotonic()
+
+    def record(
+        self,
+        model_id: str,
+        backend_name: str,
+        duration: float,
+        metric: str = METRIC_TOTAL,
+        when: Optional[datetime] = None,
+    ) -> None:
+        """记录一次请求的延迟（毫秒）"""
+        day = (when or datetime.now()).strftime("%Y-%m-%d")
+        with self._lock:
+            for dimension, name in (("model", model_id), ("backend", backend_name)):
+                key = (day, dimension, name, metric)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram(self.relative_accuracy)
+                histogram.record(duration)
+                self._dirty.add(key)
+
+    def record_event(self, event: TraceEvent) -> None:
+        """根据追踪事件记录延迟，只统计成功的请求"""
+        if isinstance(event, LLMRequestCompleteEvent):
+            self.record(
+                event.model_id, event.backend_name, event.duration,
+                when=datetime.fromtimestamp(event.start_time),
+            )
+
+    def _cutoff_day(self) -> str:
+        return (datetime.now() - timedelta(days=self.window_days - 1)).strftime("%Y-%m-%d")
+
+    def load(self, session: Session) -> None:
+        """从数据库恢复统计窗口内的直方图，替换内存中的数据"""
+        rows = session.execute(
+            select(LLMLatencyHistogram).where(LLMLatencyHistogram.day >= self._cutoff_day())
+        ).scalars().all()
+        histograms = {
+            (row.day, row.dimension, row.name, row.metric): LatencyHistogram.from_dict(json.loads(row.data))
+            for row in rows
+        }
+        with self._lock:
+            self._histograms = histograms  # type: ignore[assignment]
+            self._dirty.clear()
+
+    def persist(self, session: Session, force: bool = False) -> None:
+        """将有变化的直方图写入数据库，未到持久化间隔时跳过（force 时立即写入）"""
+        if not self._dirty or (not force and time.monotonic() - self._last_persist < self.persist_interval):
+            return
+        cutoff = self._cutoff_day()
+        with self._lock:
+            snapshot = {key: json.dumps(self._histograms[key].to_dict()) for key in self._dirty}
+            self._dirty.clear()
+            # 清理统计窗口外的直方图
+            for key in [key for key in self._histograms if key[0] < cutoff]:
+                del self._histograms[key]
+        self._last_persist = time.monotonic()
+
+        existing = {
+            (row.day, row.dimension, row.name, row.metric): row
+            for row in session.execute(
+                select(LLMLatencyHistogram).where(LLMLatencyHistogram.day.in_({key[0] for key in snapshot}))
+            ).scalars()
+        }
+        now = datetime.now()
+        for key, data in snapshot.items():
+            if key[0] < cutoff:
+                continue
+            if row := existing.get(key):
+                row.data = data  # type: ignore
+                row.updated_at = now  # type: ignore
+            else:
+                day, dimension, name, metric = key
+                session.add(LLMLatencyHistogram(
+                    day=day, dimension=dimension, name=name, metric=metric, data=data, updated_at=now
+                ))
+        session.execute(delete(LLMLatencyHistogram).where(LLMLatencyHistogram.day < cutoff))
+        session.flush()
+
+    def percentiles(
+        self,
+        dimension: str,
+        days: Optional[int] = None,
+        metric: str = METRIC_TOTAL,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> List[Dict[str, Any]]:
+        """获取最近若干天内各模型或后端的延迟分位数"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Invalid dimension: {dimension}")
+        days = min(days or self.window_days, self.window_days)
+        since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+        merged: Dict[str, LatencyHistogram] = {}
+        with self._lock:
+            for (day, key_dimension, name, key_metric), histogram in self._histograms.items():
+                if key_dimension != dimension or key_metric != metric or day < since:
+                    continue
+                if name not in merged:
+                    merged[name] = LatencyHistogram(self.relative_accuracy)
+                merged[name].merge(histogram)
+
+        result = []
+        for name, histogram in sorted(merged.items()):
+            item: Dict[str, Any] = {
+                "name": name,
+                "count": histogram.count,
+                "mean": histogram.mean,
+                "max": histogram.max,
+            }
+            for q in quantiles:
+                item[f"p{q * 100:g}"] = histogram.quantile(q)
+            result.append(item)
+        return result
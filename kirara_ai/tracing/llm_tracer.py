@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import case, func
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
 
 from kirara_ai.config.global_config import GlobalConfig
 from kirara_ai.events.tracing import LLMRequestCompleteEvent, LLMRequestFailEvent, LLMRequestStartEvent
@@ -12,10 +13,16 @@ from kirara_ai.llm.format.request import LLMChatRequest
 from kirara_ai.llm.format.response import LLMChatResponse, Message
 from kirara_ai.logger import get_logger
 from kirara_ai.tracing.core import TracerBase, generate_trace_id
-from kirara_ai.tracing.models import LLMRequestTrace
+from kirara_ai.tracing.latency import LatencyRecorder
+from kirara_ai.tracing.models import LLMRequestPayload, LLMRequestTrace
+from kirara_ai.tracing.retention import PeriodicTask, delete_in_batches, vacuum
+from kirara_ai.tracing.rollup import RollupDeltas, apply_deltas, apply_events, clean_old_rollups, query_rollups
 
 logger = get_logger("LLMTracer")
 
+# 启动后首次执行清理任务的延迟（秒）
+RETENTION_INITIAL_DELAY = 60
+
 UNRECORD_REQUEST = [LLMChatMessage(
     role="system",
     content=[
@@ -44,40 +51,109 @@ class LLMTracer(TracerBase[LLMRequestTrace]):
     def __init__(self, container: DependencyContainer):
         super().__init__(container, record_class=LLMRequestTrace) # type: ignore
         self.config = container.resolve(GlobalConfig)
-        
+        self.writer.batch_size = self.config.tracing.write_batch_size
+        self.writer.flush_interval = self.config.tracing.write_flush_interval
+        self.latency = LatencyRecorder(
+            window_days=self.config.tracing.latency_window_days,
+            persist_interval=self.config.tracing.latency_persist_interval,
+        )
+        # 在写入追踪记录的同一事务中维护预聚合统计，并定期持久化延迟直方图
+        self.writer.before_commit = self._before_commit
+        self._retention_task: Optional[PeriodicTask] = None
+
     def initialize(self):
-        """启动追踪器，将所有 pending 状态的任务转为 failed，并清理超过 30 天的请求"""
+        """启动追踪器，将所有 pending 状态的任务转为 failed，并在后台定期清理过期的请求"""
         super().initialize()
         
         try:
             pending_traces = self._mark_pending_as_failed()
-            deleted_count = self._clean_old_traces()
-            if pending_traces or deleted_count:
-                self.logger.info(f"已将 {pending_traces} 个 未结束状态的 LLM 请求标记为失败，并清理了 {deleted_count} 个超过 30 天的请求记录")
+            if pending_traces:
+                self.logger.info(f"已将 {pending_traces} 个 未结束状态的 LLM 请求标记为失败")
         except Exception as e:
             self.logger.opt(exception=e).error(f"处理历史追踪记录时发生错误")
 
+        try:
+            with self.db_manager.get_session(readonly=True) as session:
+                self.latency.load(session)
+        except Exception as e:
+            self.logger.opt(exception=e).error(f"加载延迟统计时发生错误")
+
+        # 清理任务延迟启动，不阻塞启动流程
+        self._retention_task = PeriodicTask(
+            "LLMTraceRetention",
+            self._run_retention,
+            interval=self.config.tracing.retention_interval,
+            initial_delay=RETENTION_INITIAL_DELAY,
+        )
+        self._retention_task.start()
+
+    def shutdown(self):
+        """关闭追踪器，并持久化内存中的延迟统计"""
+        if self._retention_task:
+            self._retention_task.stop()
+        super().shutdown()
+        try:
+            with self.db_manager.get_session() as session:
+                self.latency.persist(session, force=True)
+                session.commit()
+        except Exception as e:
+            self.logger.opt(exception=e).error(f"保存延迟统计时发生错误")
+
+    def _before_commit(self, session, events):
+        apply_events(session, events)
+        self.latency.persist(session)
+
     def _mark_pending_as_failed(self) -> int:
         """将所有 pending 状态的任务转为 failed"""
+        pending = LLMRequestTrace.status == "pending"  # type: ignore
         with self.db_manager.get_session() as session:
-            pending_traces = session.query(LLMRequestTrace).filter(
-                LLMRequestTrace.status == "pending" # type: ignore
+            # 只读取更新统计所需的列，再用一条 UPDATE 语句修改状态
+            rows = session.execute(
+                select(LLMRequestTrace.request_time, LLMRequestTrace.model_id, LLMRequestTrace.backend_name).where(pending)
             ).all()
-            for trace in pending_traces:
-                trace.status = "failed" # type: ignore
-                trace.error = "Incomplete request" # type: ignore
+            if not rows:
+                return 0
+            deltas = RollupDeltas()
+            for request_time, model_id, backend_name in rows:
+                deltas.add(request_time, model_id, backend_name, failed=1)
+            session.execute(
+                update(LLMRequestTrace).where(pending).values(status="failed", error="Incomplete request")
+            )
+            apply_deltas(session, deltas)
             session.commit()
-            return len(pending_traces)
-            
-    def _clean_old_traces(self, days: int = 30) -> int:
-        """清理超过指定天数的请求"""
+        self.invalidate_count_cache()
+        return len(rows)
+
+    def _clean_old_traces(self, days: Optional[int] = None) -> int:
+        """分批清理超过指定天数的请求，默认使用配置的保留天数"""
+        days = days or self.config.tracing.retention_days
+        batch_size = self.config.tracing.retention_batch_size
+        stop_event = self._retention_task.stop_event if self._retention_task else None
+        days_ago = datetime.now() - timedelta(days=days)
+
+        deleted_count = delete_in_batches(
+            self.db_manager, LLMRequestTrace, LLMRequestTrace.request_time, days_ago, batch_size, stop_event
+        )
+
+        # 请求内容可以比追踪记录更早清理
+        payload_days = self.config.tracing.payload_retention_days
+        payload_cutoff = datetime.now() - timedelta(days=payload_days) if 0 < payload_days < days else days_ago
+        delete_in_batches(
+            self.db_manager, LLMRequestPayload, LLMRequestPayload.request_time, payload_cutoff, batch_size, stop_event
+        )
+
         with self.db_manager.get_session() as session:
-            days_ago = datetime.now() - timedelta(days=days)
-            deleted_count = session.query(LLMRequestTrace).filter(
-                LLMRequestTrace.request_time < days_ago # type: ignore
-            ).delete()
+            clean_old_rollups(session, days_ago)
             session.commit()
-            return deleted_count
+        self.invalidate_count_cache()
+        return deleted_count
+
+    def _run_retention(self):
+        """定期执行的清理任务"""
+        deleted_count = self._clean_old_traces()
+        if deleted_count:
+            self.logger.info(f"清理了 {deleted_count} 个超过 {self.config.tracing.retention_days} 天的请求记录")
+            vacuum(self.db_manager, self.config.tracing.vacuum_mode)
 
     def _register_event_handlers(self):
         """注册事件处理程序"""
@@ -173,18 +249,8 @@ class LLMTracer(TracerBase[LLMRequestTrace]):
         if not self.config.tracing.llm_tracing_content:
             event.request.messages = UNRECORD_REQUEST
 
-        # 创建数据库记录
-        trace = LLMRequestTrace()
-        trace.update_from_event(event)
-
-        # 保存记录到数据库
-        trace_dict = self.save_trace_record(trace)
-
-        # 向WebSocket客户端广播消息
-        self.broadcast_ws_message({
-            "type": "new",
-            "data": trace_dict
-        })
+        # 交由后台批量写入，写入后再向WebSocket客户端广播
+        self.writer.submit(event)
 
     def _on_request_complete(self, event: LLMRequestCompleteEvent):
         """处理请求完成事件"""
@@ -193,11 +259,8 @@ class LLMTracer(TracerBase[LLMRequestTrace]):
         if not self.config.tracing.llm_tracing_content:
             event.request.messages = UNRECORD_REQUEST
             event.response.message = UNRECORD_RESPONSE
-        if trace := self.update_trace_record(event.trace_id, event):
-            self.broadcast_ws_message({
-                "type": "update",
-                "data": trace
-            })
+        self.latency.record_event(event)
+        self.writer.submit(event)
 
     def _on_request_fail(self, event: LLMRequestFailEvent):
         """处理请求失败事件"""
@@ -206,122 +269,76 @@ class LLMTracer(TracerBase[LLMRequestTrace]):
         if not self.config.tracing.llm_tracing_content:
             event.request.messages = UNRECORD_REQUEST
 
-        # 更新数据库记录
-        trace = self.update_trace_record(event.trace_id, event)
-
-        # 广播WebSocket消息
-        if trace:
-            self.broadcast_ws_message({
-                "type": "update",
-                "data": trace
-            })
+        self.writer.submit(event)
 
     def get_statistics(self) -> Dict:
-        """获取统计信息"""
-        with self.db_manager.get_session() as session:
+        """获取统计信息，从预聚合统计表中读取，耗时与追踪记录数量无关"""
+        self.writer.flush()
+        with self.db_manager.get_session(readonly=True) as session:
             # 基础统计
-            total_count = session.query(func.count(LLMRequestTrace.id)).scalar() or 0
-            success_count = session.query(func.count(LLMRequestTrace.id)).filter_by(status="success").scalar() or 0
-            failed_count = session.query(func.count(LLMRequestTrace.id)).filter_by(status="failed").scalar() or 0
-            pending_count = session.query(func.count(LLMRequestTrace.id)).filter_by(status="pending").scalar() or 0
-            total_tokens = session.query(func.sum(LLMRequestTrace.total_tokens)).scalar() or 0
+            overview = query_rollups(session, "day", [])[0]
+            pending_count = overview["requests"] - overview["success"] - overview["failed"]
 
             # 获取30天内的每日统计
             thirty_days_ago = datetime.now() - timedelta(days=30)
-            daily_stats = session.query(
-                func.strftime('%Y-%m-%d', LLMRequestTrace.request_time).label('date'),
-                func.count(LLMRequestTrace.id).label('requests'),
-                func.sum(LLMRequestTrace.total_tokens).label('tokens'),
-                func.sum(case((LLMRequestTrace.status == 'success', 1), else_=0)).label('success'), # type: ignore
-                func.sum(case((LLMRequestTrace.status == 'failed', 1), else_=0)).label('failed') # type: ignore
-            ).filter(
-                LLMRequestTrace.request_time >= thirty_days_ago # type: ignore
-            ).group_by(
-                func.strftime('%Y-%m-%d', LLMRequestTrace.request_time)
-            ).order_by(
-                func.strftime('%Y-%m-%d', LLMRequestTrace.request_time)
-            ).all()
-
             daily_data = [{
-                'date': str(row.date),
-                'requests': row.requests,
-                'tokens': row.tokens or 0,
-                'success': row.success,
-                'failed': row.failed
-            } for row in daily_stats]
+                'date': row['bucket'],
+                'requests': row['requests'],
+                'tokens': row['total_tokens'],
+                'success': row['success'],
+                'failed': row['failed']
+            } for row in query_rollups(session, "day", ["bucket"], since=thirty_days_ago)]
 
             # 按模型分组统计（最近30天）
-            model_stats = []
-            model_counts = session.query(
-                LLMRequestTrace.model_id, # type: ignore
-                func.count(LLMRequestTrace.id).label('count'),
-                func.sum(LLMRequestTrace.total_tokens).label('tokens'),
-                func.avg(LLMRequestTrace.duration).label('avg_duration')
-            ).filter( # type: ignore
-                LLMRequestTrace.request_time >= thirty_days_ago # type: ignore
-            ).group_by(
-                LLMRequestTrace.model_id
-            ).all()
-
-            for model_id, count, tokens, avg_duration in model_counts:
-                model_stats.append({
-                    'model_id': model_id,
-                    'count': count,
-                    'tokens': tokens or 0,
-                    'avg_duration': float(avg_duration) if avg_duration else 0
-                })
+            model_stats = [{
+                'model_id': row['model_id'],
+                'count': row['requests'],
+                'tokens': row['total_tokens'],
+                'avg_duration': self._avg_duration(row)
+            } for row in query_rollups(session, "day", ["model_id"], since=thirty_days_ago)]
 
             # 按后端分组统计（最近30天）
-            backend_stats = []
-            backend_counts = session.query(
-                LLMRequestTrace.backend_name, # type: ignore
-                func.count(LLMRequestTrace.id).label('count'),
-                func.sum(LLMRequestTrace.total_tokens).label('tokens'),
-                func.avg(LLMRequestTrace.duration).label('avg_duration')
-            ).filter( # type: ignore
-                LLMRequestTrace.request_time >= thirty_days_ago # type: ignore
-            ).group_by(
-                LLMRequestTrace.backend_name
-            ).all()
-
-            for backend_name, count, tokens, avg_duration in backend_counts:
-                backend_stats.append({
-                    'backend_name': backend_name,
-                    'count': count,
-                    'tokens': tokens or 0,
-                    'avg_duration': float(avg_duration) if avg_duration else 0
-                })
+            backend_stats = [{
+                'backend_name': row['backend_name'],
+                'count': row['requests'],
+                'tokens': row['total_tokens'],
+                'avg_duration': self._avg_duration(row)
+            } for row in query_rollups(session, "day", ["backend_name"], since=thirty_days_ago)]
 
             # 获取每小时统计（最近24小时）
             one_day_ago = datetime.now() - timedelta(hours=24)
-            hourly_stats = session.query(
-                func.strftime('%Y-%m-%d %H:00:00', LLMRequestTrace.request_time).label('hour'),
-                func.count(LLMRequestTrace.id).label('requests'),
-                func.sum(LLMRequestTrace.total_tokens).label('tokens')
-            ).filter(
-                LLMRequestTrace.request_time >= one_day_ago # type: ignore
-            ).group_by(
-                func.strftime('%Y-%m-%d %H:00:00', LLMRequestTrace.request_time)
-            ).order_by(
-                func.strftime('%Y-%m-%d %H:00:00', LLMRequestTrace.request_time)
-            ).all()
-
             hourly_data = [{
-                'hour': str(row.hour),
-                'requests': row.requests,
-                'tokens': row.tokens or 0
-            } for row in hourly_stats]
+                'hour': row['bucket'],
+                'requests': row['requests'],
+                'tokens': row['total_tokens']
+            } for row in query_rollups(session, "hour", ["bucket"], since=one_day_ago)]
 
             return {
                 'overview': {
-                    'total_requests': total_count,
-                    'success_requests': success_count,
-                    'failed_requests': failed_count,
-                    'pending_requests': pending_count,
-                    'total_tokens': total_tokens,
+                    'total_requests': overview["requests"],
+                    'success_requests': overview["success"],
+                    'failed_requests': overview["failed"],
+                    'pending_requests': max(pending_count, 0),
+                    'total_tokens': overview["total_tokens"],
                 },
                 'daily_stats': daily_data,
                 'hourly_stats': hourly_data,
                 'models': model_stats,
                 'backends': backend_stats
             }
+
+    def get_trace_by_id(self, trace_id: str) -> Optional[LLMRequestTrace]:
+        """根据追踪ID获取跟踪记录，同时加载请求和响应内容"""
+        self.writer.flush()
+        with self.db_manager.get_session(readonly=True) as session:
+            return session.query(LLMRequestTrace).options(
+                selectinload(LLMRequestTrace.payload)
+            ).filter_by(trace_id=trace_id).first()
+
+    def get_latency_percentiles(self, dimension: str, days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """获取各模型或后端的延迟分位数（p50 / p90 / p99，单位毫秒）"""
+        return self.latency.percentiles(dimension, days)
+
+    @staticmethod
+    def _avg_duration(row: Dict[str, Any]) -> float:
+        return float(row['duration_sum']) / row['duration_count'] if row['duration_count'] else 0
@@ -2,12 +2,30 @@ import json
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy import Column, DateTime, Float, Index, Integer, LargeBinary, String, Text, UniqueConstraint
+from sqlalchemy.orm import relationship
 
-from kirara_ai.events.tracing import LLMRequestCompleteEvent, LLMRequestFailEvent, LLMRequestStartEvent
+from kirara_ai.events.tracing import LLMRequestCompleteEvent, LLMRequestFailEvent, LLMRequestStartEvent, SpanEndEvent
+from kirara_ai.database import Base
+from kirara_ai.tracing.compression import compress_json, decompress_json
 from kirara_ai.tracing.core import TraceEvent, TraceRecord
 
 
+class LLMRequestPayload(Base):
+    """LLM请求的请求和响应内容，与追踪记录分表并压缩存储，仅在查看详情时加载"""
+
+    __tablename__ = "llm_request_payloads"
+
+    trace_id = Column(String(64), primary_key=True)
+    # 用于按保留策略清理
+    request_time = Column(DateTime, nullable=True, index=True)
+    request_data = Column(LargeBinary, nullable=True)
+    response_data = Column(LargeBinary, nullable=True)
+
+    def __repr__(self):
+        return f"<LLMRequestPayload trace_id={self.trace_id}>"
+
+
 class LLMRequestTrace(TraceRecord):
     """LLM请求跟踪记录"""
     
@@ -23,9 +41,13 @@ class LLMRequestTrace(TraceRecord):
     response_time = Column(DateTime, nullable=True)
     duration = Column(Float, nullable=True)
     
-    # 请求和响应内容
-    request_json = Column(Text, nullable=True)
-    response_json = Column(Text, nullable=True)
+    # 请求和响应内容，分表存储
+    payload = relationship(
+        LLMRequestPayload,
+        primaryjoin="LLMRequestTrace.trace_id == foreign(LLMRequestPayload.trace_id)",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
     
     # 令牌使用情况
     prompt_tokens = Column(Integer, nullable=True)
@@ -37,11 +59,13 @@ class LLMRequestTrace(TraceRecord):
     error = Column(Text, nullable=True)
     status = Column(String(20), nullable=False, default="pending")
     
-    # 创建索引
+    # 创建索引，与列表接口的过滤条件对应；SQLite 索引隐式包含 id（rowid），可直接用于 (request_time, id) 键集分页
     __table_args__ = (
         Index('idx_request_model', 'model_id', 'request_time'),
         Index('idx_backend_time', 'backend_name', 'request_time'),
         Index('idx_status_time', 'status', 'request_time'),
+        Index('idx_model_status_time', 'model_id', 'status', 'request_time'),
+        Index('idx_backend_status_time', 'backend_name', 'status', 'request_time'),
     )
     
     def __repr__(self):
@@ -55,6 +79,7 @@ class LLMRequestTrace(TraceRecord):
             self.backend_name = event.backend_name
             self.request_time = datetime.fromtimestamp(event.start_time)
             self.status = "pending"
+            self.payload = LLMRequestPayload(request_time=self.request_time)
             if event.request:
                 self.request = event.request.model_dump()
         
@@ -105,24 +130,168 @@ class LLMRequestTrace(TraceRecord):
         result["response"] = self.response
         return result
     
+    def _get_payload(self) -> LLMRequestPayload:
+        if self.payload is None:
+            payload = LLMRequestPayload()
+            # 只更新内容时不覆盖原有的请求时间
+            if self.request_time is not None:
+                payload.request_time = self.request_time
+            self.payload = payload
+        return self.payload
+
     @property
     def request(self) -> Optional[Dict[str, Any]]:
         """获取请求内容"""
-        return json.loads(self.request_json) if self.request_json else None  # type: ignore
+        if self.payload is None or not self.payload.request_data:
+            return None
+        return json.loads(decompress_json(self.payload.request_data))  # type: ignore
     
     @request.setter
     def request(self, value: Any):
         """设置请求内容"""
         if value:
-            self.request_json = json.dumps(value, ensure_ascii=False, default=str)
+            self._get_payload().request_data = compress_json(json.dumps(value, ensure_ascii=False, default=str))
     
     @property
     def response(self) -> Optional[Dict[str, Any]]:
         """获取响应内容"""
-        return json.loads(self.response_json) if self.response_json else None  # type: ignore
+        if self.payload is None or not self.payload.response_data:
+            return None
+        return json.loads(decompress_json(self.payload.response_data))  # type: ignore
     
     @response.setter
     def response(self, value: Any):
         """设置响应内容"""
         if value:
-            self.response_json = json.dumps(value, ensure_ascii=False, default=str)
\ No newline at end of file
+            self._get_payload().response_data = compress_json(json.dumps(value, ensure_ascii=False, default=str))
+
+
+class LLMTraceRollup(Base):
+    """LLM请求的预聚合统计，按时间粒度 × 模型 × 后端增量维护"""
+
+    __tablename__ = "llm_trace_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # 时间粒度：minute / hour / day
+    granularity = Column(String(8), nullable=False)
+    # 时间桶的起始时间，格式与粒度对应，如 2025-01-01 / 2025-01-01 08:00:00
+    bucket = Column(String(19), nullable=False)
+    model_id = Column(String(64), nullable=False)
+    backend_name = Column(String(64), nullable=False)
+
+    # 请求数量
+    requests = Column(Integer, nullable=False, default=0)
+    success = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+    # 令牌使用情况
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+
+    # 耗时（毫秒）
+    duration_sum = Column(Float, nullable=False, default=0)
+    duration_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket', 'model_id', 'backend_name', name='uq_rollup_bucket'),
+    )
+
+    def __repr__(self):
+        return f"<LLMTraceRollup {self.granularity} {self.bucket} model={self.model_id} backend={self.backend_name}>"
+
+
+class LLMLatencyHistogram(Base):
+    """按天持久化的LLM请求延迟直方图，内存中的直方图定期写入"""
+
+    __tablename__ = "llm_latency_histograms"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(String(10), nullable=False, index=True)
+    # 统计维度：model / backend
+    dimension = Column(String(16), nullable=False)
+    # 模型 ID 或后端名称
+    name = Column(String(64), nullable=False)
+    # 延迟指标：total（总耗时）
+    metric = Column(String(16), nullable=False)
+    # 直方图的 JSON 序列化
+    data = Column(Text, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('day', 'dimension', 'name', 'metric', name='uq_latency_histogram'),
+    )
+
+    def __repr__(self):
+        return f"<LLMLatencyHistogram {self.day} {self.dimension}={self.name} metric={self.metric}>"
+
+
+class TraceSpan(TraceRecord):
+    """
+    链路中单个节点（消息调度 / 工作流 / 区块 / LLM / MCP / 媒体调用）的耗时记录。
+    trace_id 为 span 的唯一标识（对应 OpenTelemetry 的 span_id），otel_trace_id 为所属链路。
+    """
+
+    __tablename__ = "trace_spans"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    trace_id = Column(String(64), nullable=False, index=True, unique=True)
+    otel_trace_id = Column(String(32), nullable=False, index=True)
+    parent_span_id = Column(String(16), nullable=True)
+    name = Column(String(128), nullable=False)
+    span_type = Column(String(16), nullable=False)
+
+    # 时间相关，request_time 为开始时间
+    request_time = Column(DateTime, nullable=False, index=True)
+    end_time = Column(DateTime, nullable=True)
+    duration = Column(Float, nullable=True)
+
+    # 属性的 JSON 序列化
+    attributes = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False, default="ok")
+
+    __table_args__ = (
+        Index('idx_span_type_time', 'span_type', 'request_time'),
+    )
+
+    def __repr__(self):
+        return f"<TraceSpan id={self.id} name={self.name} span_id={self.trace_id}>"
+
+    def update_from_event(self, event: TraceEvent) -> None:
+        """从事件更新记录"""
+        if isinstance(event, SpanEndEvent):
+            span = event.span
+            self.trace_id = span.span_id
+            self.otel_trace_id = span.trace_id
+            self.parent_span_id = span.parent_span_id
+            self.name = span.name[:128]
+            self.span_type = span.span_type
+            self.request_time = datetime.fromtimestamp(span.start_time_ns / 1e9)
+            self.end_time = datetime.fromtimestamp(span.end_time_ns / 1e9) if span.end_time_ns else None
+            self.duration = span.duration_ms
+            self.attributes = json.dumps(span.attributes, ensure_ascii=False, default=str) if span.attributes else None
+            self.error = span.status_message
+            self.status = span.status
+
+    def to_dict(self) -> Dict[str, Any]:
+        """将记录转换为字典，用于JSON序列化"""
+        return {
+            "id": self.id,
+            "span_id": self.trace_id,
+            "trace_id": self.otel_trace_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "span_type": self.span_type,
+            "start_time": self.request_time.isoformat() if self.request_time else None, # type: ignore
+            "end_time": self.end_time.isoformat() if self.end_time else None, # type: ignore
+            "duration": self.duration,
+            "attributes": json.loads(self.attributes) if self.attributes else {}, # type: ignore
+            "status": self.status,
+            "error": self.error
+        }
+
+    def to_detail_dict(self) -> Dict[str, Any]:
+        """span 没有额外的详细内容"""
+        return self.to_dict()
@@ -0,0 +1,109 @@
+import json
+import os
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from kirara_ai.logger import get_logger
+from kirara_ai.tracing.span import SPAN_LLM, SPAN_MCP, SPAN_MEDIA, Span
+
+logger = get_logger("OTLPExporter")
+
+SERVICE_NAME = "kirara-ai"
+SCOPE_NAME = "kirara_ai.tracing"
+
+# OTLP 的 SpanKind：1 INTERNAL，3 CLIENT
+_SPAN_KIND_INTERNAL = 1
+_SPAN_KIND_CLIENT = 3
+_CLIENT_SPAN_TYPES = (SPAN_LLM, SPAN_MCP, SPAN_MEDIA)
+
+# OTLP 的 StatusCode：0 UNSET，1 OK，2 ERROR
+_STATUS_CODES = {"unset": 0, "ok": 1, "error": 2}
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP JSON 中 64 位整数以字符串表示
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def span_to_otlp(span: Span) -> Dict[str, Any]:
+    """将 span 转换为 OTLP JSON 格式"""
+    data: Dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": _SPAN_KIND_CLIENT if span.span_type in _CLIENT_SPAN_TYPES else _SPAN_KIND_INTERNAL,
+        "startTimeUnixNano": str(span.start_time_ns),
+        "endTimeUnixNano": str(span.end_time_ns or span.start_time_ns),
+        "attributes": _attributes({"kirara.span_type": span.span_type, **span.attributes}),
+        "status": {"code": _STATUS_CODES.get(span.status, 0)},
+    }
+    if span.parent_span_id:
+        data["parentSpanId"] = span.parent_span_id
+    if span.status_message:
+        data["status"]["message"] = span.status_message
+    return data
+
+
+def build_export_request(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """构建 OTLP ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": service_name})},
+            "scopeSpans": [{
+                "scope": {"name": SCOPE_NAME},
+                "spans": [span_to_otlp(span) for span in spans],
+            }],
+        }]
+    }
+
+
+class OTLPJsonExporter:
+    """
+    以 OTLP JSON 格式导出 span。
+    写入文件时每次导出追加一行（与 OpenTelemetry Collector 的 file exporter 格式一致），
+    或通过 OTLP/HTTP 发送到本地 Collector（如 http://localhost:4318/v1/traces）。
+    """
+
+    def __init__(self, path: Optional[str] = None, endpoint: Optional[str] = None, timeout: float = 5.0):
+        self.path = path
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        body = json.dumps(build_export_request(spans), ensure_ascii=False, default=str)
+        if self.path:
+            self._write_file(body)
+        if self.endpoint:
+            self._post(body)
+
+    def _write_file(self, body: str) -> None:
+        assert self.path is not None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(body + "\n")
+
+    def _post(self, body: str) -> None:
+        assert self.endpoint is not None
+        req = urllib.request.Request(
+            self.endpoint,
+            data=body.encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            if response.status >= 300:
+                logger.warning(f"OTLP collector responded with status {response.status}")
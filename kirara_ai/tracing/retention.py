@@ -0,0 +1,89 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from sqlalchemy import delete, inspect, select, text
+
+from kirara_ai.database import DatabaseManager
+from kirara_ai.logger import get_logger
+
+logger = get_logger("TraceRetention")
+
+# 两批删除之间的间隔（秒），让出写入连接给追踪写入器
+BATCH_PAUSE = 0.05
+
+
+def delete_in_batches(
+    db_manager: DatabaseManager,
+    model: Any,
+    time_column: Any,
+    cutoff: datetime,
+    batch_size: int = 1000,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """按主键分批删除早于 cutoff 的记录，每批一个短事务，返回删除的数量"""
+    primary_key = inspect(model).primary_key[0]
+    total = 0
+    while True:
+        with db_manager.get_session() as session:
+            batch = select(primary_key).where(time_column < cutoff).limit(batch_size).scalar_subquery()
+            deleted = session.execute(delete(model).where(primary_key.in_(batch))).rowcount or 0  # type: ignore[attr-defined]
+            session.commit()
+        total += deleted
+        if deleted < batch_size or (stop_event is not None and stop_event.is_set()):
+            return total
+        time.sleep(BATCH_PAUSE)
+
+
+def vacuum(db_manager: DatabaseManager, mode: str) -> None:
+    """
+    回收 SQLite 数据库文件中的空闲页。
+    incremental 模式首次使用时需要切换 auto_vacuum 并执行一次完整的 VACUUM。
+    """
+    engine = db_manager.engine
+    if mode == "none" or engine is None or engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if mode == "incremental":
+            if connection.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                logger.info("Enabling incremental auto_vacuum, running a full VACUUM once")
+                connection.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+                connection.execute(text("VACUUM"))
+            connection.execute(text("PRAGMA incremental_vacuum"))
+        elif mode == "full":
+            connection.execute(text("VACUUM"))
+
+
+class PeriodicTask:
+    """在后台线程中按固定间隔执行的任务"""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float, initial_delay: float = 0):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self.stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = self.initial_delay
+        while not self.stop_event.wait(delay):
+            try:
+                self.func()
+            except Exception as e:
+                logger.opt(exception=e).error(f"Periodic task {self.name} failed: {e}")
+            delay = self.interval
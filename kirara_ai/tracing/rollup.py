@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from kirara_ai.events.tracing import (LLMRequestCompleteEvent, LLMRequestFailEvent, LLMRequestStartEvent,
+                                      TraceEvent)
+from kirara_ai.tracing.models import LLMTraceRollup
+
+# 时间粒度 -> 时间桶格式，与 SQLite strftime 的格式保持一致，便于迁移时回填
+GRANULARITIES: Dict[str, str] = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d",
+}
+
+# 各粒度统计的保留时长，按天粒度保留的时长由追踪记录的保留策略决定
+ROLLUP_RETENTION: Dict[str, timedelta] = {
+    "minute": timedelta(days=2),
+    "hour": timedelta(days=7),
+}
+
+COUNTERS = (
+    "requests", "success", "failed",
+    "prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens",
+    "duration_sum", "duration_count",
+)
+
+RollupKey = Tuple[str, str, str, str]
+
+
+def format_bucket(granularity: str, time: datetime) -> str:
+    """获取时间所在的时间桶"""
+    return time.strftime(GRANULARITIES[granularity])
+
+
+class RollupDeltas:
+    """一批统计增量，按 (粒度, 时间桶, 模型, 后端) 合并"""
+
+    def __init__(self):
+        self.rows: Dict[RollupKey, Dict[str, float]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def add(self, request_time: datetime, model_id: str, backend_name: str, **counters: float) -> None:
+        for granularity in GRANULARITIES:
+            key = (granularity, format_bucket(granularity, request_time), model_id, backend_name)
+            row = self.rows.setdefault(key, dict.fromkeys(COUNTERS, 0))
+            for name, value in counters.items():
+                row[name] += value
+
+    def add_event(self, event: TraceEvent) -> None:
+        """根据追踪事件累加统计，统计归入请求开始时间所在的时间桶"""
+        if isinstance(event, LLMRequestStartEvent):
+            counters = {"requests": 1}
+        elif isinstance(event, LLMRequestCompleteEvent):
+            counters = {"success": 1, "duration_sum": event.duration, "duration_count": 1}
+            if event.response and event.response.usage:
+                usage = event.response.usage
+                counters.update(
+                    prompt_tokens=usage.prompt_tokens or 0,
+                    completion_tokens=usage.completion_tokens or 0,
+                    total_tokens=usage.total_tokens or 0,
+                    cached_tokens=usage.cached_tokens or 0,
+                )
+        elif isinstance(event, LLMRequestFailEvent):
+            counters = {"failed": 1, "duration_sum": event.duration, "duration_count": 1}
+        else:
+            return
+        self.add(datetime.fromtimestamp(event.start_time), event.model_id, event.backend_name, **counters)
+
+
+def apply_events(session: Session, events: Iterable[TraceEvent]) -> None:
+    """在当前事务中将一批追踪事件计入预聚合统计"""
+    deltas = RollupDeltas()
+    for event in events:
+        deltas.add_event(event)
+    apply_deltas(session, deltas)
+
+
+def apply_deltas(session: Session, deltas: RollupDeltas) -> None:
+    """在当前事务中以 upsert 的方式累加统计增量"""
+    if not deltas:
+        return
+    table = LLMTraceRollup.__table__
+    rows = [
+        {"granularity": key[0], "bucket": key[1], "model_id": key[2], "backend_name": key[3], **counters}
+        for key, counters in deltas.rows.items()
+    ]
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert  # type: ignore[assignment]
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "bucket", "model_id", "backend_name"],
+            set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+        )
+        session.execute(stmt, rows)
+        return
+
+    # 其他数据库：先尝试累加，不存在时再插入
+    for row in rows:
+        key_filter = (
+            (table.c.granularity == row["granularity"])
+            & (table.c.bucket == row["bucket"])
+            & (table.c.model_id == row["model_id"])
+            & (table.c.backend_name == row["backend_name"])
+        )
+        result = session.execute(
+            update(table).where(key_filter).values({name: table.c[name] + row[name] for name in COUNTERS})
+        )
+        if result.rowcount == 0:  # type: ignore[attr-defined]
+            session.execute(table.insert().values(**row))
+
+
+def clean_old_rollups(session: Session, day_cutoff: datetime) -> int:
+    """清理过期的统计，天粒度按追踪记录的保留时长清理"""
+    now = datetime.now()
+    cutoffs = {granularity: now - retention for granularity, retention in ROLLUP_RETENTION.items()}
+    cutoffs["day"] = day_cutoff
+    deleted = 0
+    for granularity, cutoff in cutoffs.items():
+        result = session.execute(
+            delete(LLMTraceRollup).where(
+                LLMTraceRollup.granularity == granularity,
+                LLMTraceRollup.bucket < format_bucket(granularity, cutoff),
+            )
+        )
+        deleted += result.rowcount or 0  # type: ignore[attr-defined]
+    return deleted
+
+
+def query_rollups(
+    session: Session,
+    granularity: str,
+    group_by: List[str],
+    since: Optional[datetime] = None,
+) -> List[Dict[str, float]]:
+    """按指定维度汇总统计，返回每组的计数器合计"""
+    columns = [getattr(LLMTraceRollup, name) for name in group_by]
+    stmt = select(
+        *columns,
+        *[func.coalesce(func.sum(getattr(LLMTraceRollup, name)), 0).label(name) for name in COUNTERS],
+    ).where(LLMTraceRollup.granularity == granularity)
+    if since is not None:
+        stmt = stmt.where(LLMTraceRollup.bucket >= format_bucket(granularity, since))
+    if columns:
+        stmt = stmt.group_by(*columns).order_by(*columns)
+    return [dict(row._mapping) for row in session.execute(stmt)]
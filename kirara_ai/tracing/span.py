@@ -0,0 +1,111 @@
+import contextvars
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from kirara_ai.events.event_bus import EventBus
+from kirara_ai.events.tracing.span import SpanEndEvent
+
+# 链路中的节点类型，从外到内依次嵌套：消息调度 → 工作流 → 区块 → 外部调用
+SPAN_DISPATCH = "dispatch"
+SPAN_WORKFLOW = "workflow"
+SPAN_BLOCK = "block"
+SPAN_LLM = "llm"
+SPAN_MCP = "mcp"
+SPAN_MEDIA = "media"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("kirara_current_span", default=None)
+
+
+class Span:
+    """
+    一次操作的耗时记录，字段与 OpenTelemetry 的 Span 对应。
+    trace_id 标识一条完整的链路（如一条消息的处理过程），span_id 标识链路中的单个节点。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        span_type: str,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        event_bus: Optional[EventBus] = None,
+    ):
+        self.name = name
+        self.span_type = span_type
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+        # unset / ok / error
+        self.status = "unset"
+        self.status_message: Optional[str] = None
+        # span 结束时通过事件总线发布，为 None 时只参与上下文传播而不记录
+        self.event_bus = event_bus
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        self.status = "error"
+        self.status_message = str(error)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1e6
+
+    def end(self) -> None:
+        """结束 span 并发布 SpanEndEvent，重复调用无效"""
+        if self.end_time_ns is not None:
+            return
+        self.end_time_ns = time.time_ns()
+        if self.status == "unset":
+            self.status = "ok"
+        if self.event_bus is not None:
+            self.event_bus.post(SpanEndEvent(self))
+
+    def __repr__(self):
+        return f"Span(name={self.name}, type={self.span_type}, trace_id={self.trace_id}, span_id={self.span_id})"
+
+
+def current_span() -> Optional[Span]:
+    """获取当前上下文中的 span"""
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(
+    name: str,
+    span_type: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    event_bus: Optional[EventBus] = None,
+) -> Iterator[Span]:
+    """
+    在当前上下文中开始一个 span，退出时自动结束并记录异常。
+    有父 span 时作为其子节点，并沿用父 span 的事件总线；
+    没有父 span 也没有传入事件总线时，span 不会被记录（如不在消息处理链路中的媒体下载）。
+    """
+    parent = _current_span.get()
+    span = Span(
+        name,
+        span_type,
+        trace_id=parent.trace_id if parent else None,
+        parent_span_id=parent.span_id if parent else None,
+        attributes=attributes,
+        event_bus=event_bus or (parent.event_bus if parent else None),
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
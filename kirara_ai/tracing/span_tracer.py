@@ -0,0 +1,147 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, select
+
+from kirara_ai.config.global_config import GlobalConfig
+from kirara_ai.events.tracing import SpanEndEvent
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.ioc.inject import Inject
+from kirara_ai.tracing.core import TracerBase
+from kirara_ai.tracing.models import TraceSpan
+from kirara_ai.tracing.otlp import OTLPJsonExporter
+from kirara_ai.tracing.retention import PeriodicTask, delete_in_batches
+from kirara_ai.tracing.span import SPAN_BLOCK, SPAN_DISPATCH, Span
+
+# 启动后首次执行清理任务的延迟（秒）
+RETENTION_INITIAL_DELAY = 60
+
+
+class SpanTracer(TracerBase[TraceSpan]):
+    """链路追踪器，记录消息调度、工作流、区块及外部调用的嵌套耗时，并可导出为 OTLP JSON"""
+
+    name = "span"
+    record_class = TraceSpan
+
+    @Inject()
+    def __init__(self, container: DependencyContainer):
+        super().__init__(container, record_class=TraceSpan)  # type: ignore
+        self.config = container.resolve(GlobalConfig)
+        self.writer.batch_size = self.config.tracing.write_batch_size
+        self.writer.flush_interval = self.config.tracing.write_flush_interval
+
+        tracing = self.config.tracing
+        self.exporter: Optional[OTLPJsonExporter] = None
+        if tracing.span_export == "file":
+            self.exporter = OTLPJsonExporter(path=tracing.span_export_path)
+        elif tracing.span_export == "otlp":
+            self.exporter = OTLPJsonExporter(endpoint=tracing.span_export_endpoint)
+        self._export_lock = threading.Lock()
+        self._export_buffer: List[Span] = []
+        self._export_task: Optional[PeriodicTask] = None
+        self._retention_task: Optional[PeriodicTask] = None
+
+    def initialize(self):
+        super().initialize()
+        if self.exporter:
+            self._export_task = PeriodicTask("SpanExport", self.export_pending, self.config.tracing.span_export_interval)
+            self._export_task.start()
+        self._retention_task = PeriodicTask(
+            "SpanRetention",
+            self._clean_old_spans,
+            interval=self.config.tracing.retention_interval,
+            initial_delay=RETENTION_INITIAL_DELAY,
+        )
+        self._retention_task.start()
+
+    def shutdown(self):
+        for task in (self._export_task, self._retention_task):
+            if task:
+                task.stop()
+        super().shutdown()
+        self.export_pending()
+
+    def _register_event_handlers(self):
+        """注册事件处理程序，未启用链路追踪时不记录"""
+        if self.config.tracing.span_tracing:
+            self.event_bus.register(SpanEndEvent, self._on_span_end)
+
+    def _unregister_event_handlers(self):
+        """取消事件处理程序注册"""
+        if self.config.tracing.span_tracing:
+            self.event_bus.unregister(SpanEndEvent, self._on_span_end)
+
+    def _on_span_end(self, event: SpanEndEvent):
+        """处理 span 结束事件"""
+        self.writer.submit(event)
+        if self.exporter:
+            with self._export_lock:
+                self._export_buffer.append(event.span)
+
+    def export_pending(self):
+        """导出缓冲区中的 span"""
+        if not self.exporter:
+            return
+        with self._export_lock:
+            spans, self._export_buffer = self._export_buffer, []
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            self.logger.opt(exception=e).error(f"导出 {len(spans)} 个 span 失败: {e}")
+
+    def _clean_old_spans(self) -> int:
+        """分批清理超过保留天数的 span"""
+        stop_event = self._retention_task.stop_event if self._retention_task else None
+        cutoff = datetime.now() - timedelta(days=self.config.tracing.retention_days)
+        deleted = delete_in_batches(
+            self.db_manager, TraceSpan, TraceSpan.request_time, cutoff,
+            self.config.tracing.retention_batch_size, stop_event,
+        )
+        self.invalidate_count_cache()
+        return deleted
+
+    def get_trace_spans(self, otel_trace_id: str) -> List[TraceSpan]:
+        """获取一条链路中的所有 span，按开始时间排序"""
+        self.writer.flush()
+        with self.db_manager.get_session(readonly=True) as session:
+            return list(session.execute(
+                select(TraceSpan)
+                .where(TraceSpan.otel_trace_id == otel_trace_id)
+                .order_by(TraceSpan.request_time, TraceSpan.id)
+            ).scalars().all())
+
+    def get_span_summary(self, hours: int = 24, span_type: str = SPAN_BLOCK, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        按名称汇总最近一段时间内某类 span 的耗时，按总耗时降序排列。
+        share 为该节点总耗时占同期消息处理（dispatch）总耗时的比例，用于找出拖慢端到端延迟的区块。
+        """
+        self.writer.flush()
+        since = datetime.now() - timedelta(hours=hours)
+        with self.db_manager.get_session(readonly=True) as session:
+            dispatch_total = session.execute(
+                select(func.sum(TraceSpan.duration))
+                .where(TraceSpan.span_type == SPAN_DISPATCH, TraceSpan.request_time >= since)
+            ).scalar() or 0
+            rows = session.execute(
+                select(
+                    TraceSpan.name,
+                    func.count(),
+                    func.sum(TraceSpan.duration),
+                    func.max(TraceSpan.duration),
+                    func.sum(case((TraceSpan.status == "error", 1), else_=0)),
+                )
+                .where(TraceSpan.span_type == span_type, TraceSpan.request_time >= since)
+                .group_by(TraceSpan.name)
+                .order_by(func.sum(TraceSpan.duration).desc())
+                .limit(limit)
+            ).all()
+        return [{
+            "name": name,
+            "count": count,
+            "total_duration": total or 0,
+            "avg_duration": (total or 0) / count if count else 0,
+            "max_duration": max_duration,
+            "errors": errors or 0,
+            "share": (total or 0) / dispatch_total if dispatch_total else None,
+        } for name, count, total, max_duration, errors in rows]
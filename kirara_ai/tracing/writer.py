@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import OrderedDict
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from sqlalchemy import Table, bindparam, insert, inspect, update
+from sqlalchemy.orm import Session
+
+from kirara_ai.database import DatabaseManager
+from kirara_ai.events.tracing import TraceEvent, TraceStartEvent
+from kirara_ai.logger import get_logger
+
+logger = get_logger("TraceWriter")
+
+# 写入完成回调：(新插入的 trace_id 列表, 被更新的 trace_id 列表)
+WrittenCallback = Callable[[List[str], List[str]], None]
+# 提交前回调：在写入追踪记录的同一事务中处理这批事件（如更新预聚合统计）
+BatchCallback = Callable[[Session, List[TraceEvent]], None]
+
+
+class _FlushMarker:
+    """刷新标记，工作线程遇到后立即写入当前批次并通知等待方"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class TraceWriter:
+    """
+    追踪记录的异步批量写入器。
+    事件处理程序只负责入队，后台线程按批次（数量或时间间隔）合并同一 trace_id 的事件，
+    开始事件生成 INSERT，其余事件生成按 trace_id 的批量 UPDATE，无需先查询记录再写回；
+    记录的一对一关联对象（如分表存储的请求内容）按同样的方式写入各自的表。
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        record_class: Type[Any],
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        on_written: Optional[WrittenCallback] = None,
+        before_commit: Optional[BatchCallback] = None,
+    ):
+        self.db_manager = db_manager
+        self.record_class = record_class
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+        self.before_commit = before_commit
+        self._queue: "Queue[Union[TraceEvent, _FlushMarker, None]]" = Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+        mapper = inspect(record_class)
+        # ORM 属性名 -> 数据库列名
+        self._columns = self._mapper_columns(mapper)
+        self._table: Table = record_class.__table__
+        # 一对一关联的子表（如分表存储的请求内容），需通过 trace_id 与追踪记录关联
+        self._related: List[Tuple[str, Table, Dict[str, str]]] = [
+            (rel.key, rel.mapper.local_table, self._mapper_columns(rel.mapper))  # type: ignore[misc]
+            for rel in mapper.relationships
+            if not rel.uselist
+        ]
+
+    @staticmethod
+    def _mapper_columns(mapper: Any) -> Dict[str, str]:
+        return {prop.key: prop.columns[0].name for prop in mapper.column_attrs}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动后台写入线程"""
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._worker, name="TraceWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """写入剩余事件并停止后台线程"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        # 线程退出后仍可能有新入队的事件
+        self._drain_inline()
+
+    def submit(self, event: TraceEvent) -> None:
+        """提交追踪事件，后台线程未运行时直接写入"""
+        if self.running:
+            self._queue.put(event)
+        else:
+            self.write_batch([event])
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """等待此前提交的事件全部写入数据库"""
+        if not self.running:
+            self._drain_inline()
+            return
+        if threading.current_thread() is self._thread:
+            return
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        if not marker.done.wait(timeout):
+            logger.warning(f"Flushing traces timed out after {timeout}s")
+
+    def _drain_inline(self) -> None:
+        batch: List[TraceEvent] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except Empty:
+                break
+            if isinstance(item, _FlushMarker):
+                item.done.set()
+            elif item is not None:
+                batch.append(item)
+        if batch:
+            self.write_batch(batch)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch: List[TraceEvent] = []
+            markers: List[_FlushMarker] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, _FlushMarker):
+                    markers.append(item)
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+
+            if batch:
+                try:
+                    self.write_batch(batch)
+                except Exception as e:
+                    logger.opt(exception=e).error(f"Failed to write {len(batch)} trace events")
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                return
+
+    @staticmethod
+    def _column_values(obj: Any, columns: Dict[str, str]) -> Dict[str, Any]:
+        return {column: obj.__dict__[key] for key, column in columns.items() if key in obj.__dict__}
+
+    def _event_values(self, event: TraceEvent) -> Dict[Table, Dict[str, Any]]:
+        """将事件转换为各表的列值，只包含事件实际设置的字段"""
+        record = self.record_class()
+        record.update_from_event(event)
+        values = {self._table: self._column_values(record, self._columns)}
+        for key, table, columns in self._related:
+            child = record.__dict__.get(key)
+            if child is not None:
+                values[table] = self._column_values(child, columns)
+        for table_values in values.values():
+            table_values["trace_id"] = event.trace_id
+        return values
+
+    def _merge(self, events: List[TraceEvent]) -> "OrderedDict[str, Tuple[bool, Dict[Table, Dict[str, Any]]]]":
+        """按 trace_id 合并事件，返回 trace_id -> (是否需要插入, 各表的列值)"""
+        merged: "OrderedDict[str, Tuple[bool, Dict[Table, Dict[str, Any]]]]" = OrderedDict()
+        for event in events:
+            values = self._event_values(event)
+            is_insert = isinstance(event, TraceStartEvent)
+            if event.trace_id in merged:
+                prev_insert, prev_values = merged[event.trace_id]
+                for table, table_values in values.items():
+                    prev_values.setdefault(table, {}).update(table_values)
+                merged[event.trace_id] = (prev_insert or is_insert, prev_values)
+            else:
+                merged[event.trace_id] = (is_insert, values)
+        return merged
+
+    def _execute(self, session, rows: List[Tuple[bool, Dict[Table, Dict[str, Any]]]]) -> None:
+        # 按 表 × 列集合 分组，使每组可以使用 executemany
+        insert_groups: Dict[Tuple[Table, frozenset], List[Dict[str, Any]]] = {}
+        update_groups: Dict[Tuple[Table, frozenset], List[Dict[str, Any]]] = {}
+        for is_insert, values in rows:
+            groups = insert_groups if is_insert else update_groups
+            for table, table_values in values.items():
+                groups.setdefault((table, frozenset(table_values)), []).append(table_values)
+
+        for (table, _), group in insert_groups.items():
+            session.execute(insert(table), group)
+
+        for (table, keys), group in update_groups.items():
+            columns = sorted(key for key in keys if key != "trace_id")
+            if not columns:
+                continue
+            stmt = (
+                update(table)
+                .where(table.c.trace_id == bindparam("_trace_id"))
+                .values({column: bindparam(f"_v_{column}") for column in columns})
+            )
+            params = [
+                {"_trace_id": row["trace_id"], **{f"_v_{column}": row[column] for column in columns}}
+                for row in group
+            ]
+            session.connection().execute(stmt, params)
+
+    def write_batch(self, events: List[TraceEvent]) -> None:
+        """将一批事件写入数据库"""
+        merged = self._merge(events)
+        inserted = [trace_id for trace_id, (is_insert, _) in merged.items() if is_insert]
+        updated = [trace_id for trace_id, (is_insert, _) in merged.items() if not is_insert]
+
+        with self._write_lock:
+            try:
+                with self.db_manager.get_session() as session:
+                    self._execute(session, list(merged.values()))
+                    if self.before_commit:
+                        self.before_commit(session, events)
+                    session.commit()
+            except Exception as e:
+                # 批量写入失败时（如重复的 trace_id）逐条重试，避免整批丢失
+                logger.warning(f"Batch trace write failed, retrying one by one: {e}")
+                for trace_id, row in merged.items():
+                    try:
+                        with self.db_manager.get_session() as session:
+                            self._execute(session, [row])
+                            if self.before_commit:
+                                self.before_commit(session, [event for event in events if event.trace_id == trace_id])
+                            session.commit()
+                    except Exception as e:
+                        logger.error(f"Failed to write trace {trace_id}: {e}")
+
+        if self.on_written:
+            try:
+                self.on_written(inserted, updated)
+            except Exception as e:
+                logger.opt(exception=e).error(f"Trace write callback failed: {e}")
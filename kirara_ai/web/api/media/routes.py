@@ -1,4 +1,3 @@
-import asyncio
 import io
 import os
 from typing import Optional
@@ -17,31 +16,6 @@ from .models import MediaBatchDeleteRequest, MediaItem, MediaListResponse, Media
 media_bp = Blueprint("media", __name__)
 
 
-# 生成缩略图
-async def generate_thumbnail(image_data: bytes) -> io.BytesIO:
-    """生成图片缩略图，并返回BytesIO对象"""
-    from PIL import Image
-
-    def _generate_thumbnail(image_data: bytes) -> io.BytesIO:
-        """在线程中运行的同步缩略图生成函数"""
-        with Image.open(io.BytesIO(image_data)) as img:
-            width, height = img.size
-            if width > height:
-                new_width = 300
-                new_height = int(height * (300 / width))
-            else:
-                new_height = 300
-                new_width = int(width * (300 / height))
-
-            img.thumbnail((new_width, new_height))
-            output = io.BytesIO()
-            img = img.convert("RGB")
-            img.save(output, format="WEBP", optimize=True, quality=65)
-            output.seek(0)
-            return output
-
-    return await asyncio.to_thread(_generate_thumbnail, image_data)
-
 def _get_media_manager() -> MediaManager:
     """获取媒体管理器实例"""
     return g.container.resolve(MediaManager)
@@ -166,24 +140,22 @@ async def get_media_file(media_id):
 @require_auth
 async def get_thumbnail(media_id):
     """获取缩略图"""
-    config = g.container.resolve(GlobalConfig)
     media_manager = _get_media_manager()
     media = media_manager.get_media(media_id)
     if not media:
         return jsonify({"error": "Media not found"}), 404
     
-    data = await media.get_data()
-    
-    if not data:
-        return jsonify({"error": "Media not found"}), 404
-    
     if media.metadata.media_type == MediaType.IMAGE:
-        if media.metadata.format == "gif":
-            return await send_file(io.BytesIO(data), mimetype="image/gif")
-        thumbnail = await generate_thumbnail(data)
-        return await send_file(thumbnail, mimetype="image/webp")
+        if media.metadata.format != "gif":
+            thumbnail_path = await media_manager.get_thumbnail_path(media_id)
+            if not thumbnail_path:
+                return jsonify({"error": "Media not found"}), 404
+            return await send_file(thumbnail_path, mimetype="image/webp")
+        data = await media.get_data()
+        return await send_file(io.BytesIO(data), mimetype="image/gif")
     elif media.metadata.media_type == MediaType.VIDEO:
         # 视频类型直接返回原始数据，不做缩略图处理
+        data = await media.get_data()
         return await send_file(io.BytesIO(data), mimetype="video/mp4")
     else:
         return jsonify({"error": "Unsupported media type"}), 400
@@ -8,6 +8,7 @@ from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.logger import get_logger
 from kirara_ai.tracing.llm_tracer import LLMTracer
 from kirara_ai.tracing.manager import TracingManager
+from kirara_ai.tracing.span_tracer import SpanTracer
 from kirara_ai.web.auth.middleware import require_auth
 from kirara_ai.web.auth.services import AuthService
 
@@ -15,6 +16,9 @@ tracing_bp = Blueprint("tracing", __name__, url_prefix="/api/tracing")
 
 logger = get_logger("Tracing-API")
 
+# 批量模式下每帧最多包含的消息数量
+WS_MAX_BATCH_SIZE = 200
+
 
 @tracing_bp.route("/types", methods=["GET"])
 @require_auth
@@ -39,6 +43,7 @@ async def get_llm_traces():
     model_id = data.get("model_id")
     backend_name = data.get("backend_name")
     status = data.get("status")
+    cursor = data.get("cursor")
 
     # 构建过滤条件
     filters = {}
@@ -56,19 +61,26 @@ async def get_llm_traces():
     if not llm_tracer:
         return jsonify({"error": "LLM tracer not found"}), 404
 
-    # 使用统一的查询接口
-    records, total = llm_tracer.get_traces(
-        filters=filters,
-        page=page,
-        page_size=page_size
-    )
+    # 使用统一的查询接口，传入 cursor 时使用键集分页
+    try:
+        records, total = llm_tracer.get_traces(
+            filters=filters,
+            page=page,
+            page_size=page_size,
+            cursor=cursor
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    next_cursor = llm_tracer.encode_cursor(records[-1]) if len(records) == page_size else None
 
     return jsonify({
         "items": [record.to_dict() for record in records],
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
+        "total_pages": (total + page_size - 1) // page_size,
+        "next_cursor": next_cursor
     })
 
 
@@ -105,6 +117,70 @@ async def get_llm_statistics():
     return jsonify(stats)
 
 
+@tracing_bp.route("/llm/latency", methods=["GET"])
+@require_auth
+async def get_llm_latency():
+    """获取各模型或后端的延迟分位数"""
+    dimension = request.args.get("dimension", "backend")
+    days = request.args.get("days", type=int)
+
+    container: DependencyContainer = g.container
+    tracing_manager = container.resolve(TracingManager)
+    llm_tracer = tracing_manager.get_tracer("llm")
+
+    if not llm_tracer:
+        return jsonify({"error": "LLM tracer not found"}), 404
+    assert isinstance(llm_tracer, LLMTracer)
+    try:
+        items = llm_tracer.get_latency_percentiles(dimension, days)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "dimension": dimension,
+        "items": items
+    })
+
+
+@tracing_bp.route("/span/trace/<trace_id>", methods=["GET"])
+@require_auth
+async def get_span_trace(trace_id: str):
+    """获取一条链路（如一条消息的处理过程）中的所有 span"""
+    container: DependencyContainer = g.container
+    tracing_manager = container.resolve(TracingManager)
+    span_tracer = tracing_manager.get_tracer("span")
+
+    if not span_tracer:
+        return jsonify({"error": "Span tracer not found"}), 404
+    assert isinstance(span_tracer, SpanTracer)
+    spans = span_tracer.get_trace_spans(trace_id)
+    if not spans:
+        return jsonify({"error": "Trace not found"}), 404
+    return jsonify({
+        "trace_id": trace_id,
+        "spans": [span.to_dict() for span in spans]
+    })
+
+
+@tracing_bp.route("/span/summary", methods=["GET"])
+@require_auth
+async def get_span_summary():
+    """按名称汇总一段时间内区块等节点的耗时"""
+    hours = request.args.get("hours", 24, type=int)
+    span_type = request.args.get("span_type", "block")
+
+    container: DependencyContainer = g.container
+    tracing_manager = container.resolve(TracingManager)
+    span_tracer = tracing_manager.get_tracer("span")
+
+    if not span_tracer:
+        return jsonify({"error": "Span tracer not found"}), 404
+    assert isinstance(span_tracer, SpanTracer)
+    return jsonify({
+        "span_type": span_type,
+        "items": span_tracer.get_span_summary(hours=hours, span_type=span_type)
+    })
+
+
 @tracing_bp.websocket("/ws")
 async def tracing_ws():
     """WebSocket接口，用于实时推送追踪日志"""
@@ -148,6 +224,8 @@ async def tracing_ws():
             if tracer:
                 # 注册WebSocket客户端
                 queue: asyncio.Queue = tracer.register_ws_client()
+                # 客户端声明支持批量消息时，多条消息合并为一帧发送
+                batch = bool(cmd.get("batch", False))
                 await websocket.send(json.dumps({
                     "type": "subscribe_success",
                     "message": "Subscribed to tracing websocket",
@@ -172,7 +250,19 @@ async def tracing_ws():
             message = await queue.get()
             if message is None:
                 break
-            await websocket.send(json.dumps(message))
+            if not batch:
+                await websocket.send(json.dumps(message))
+                continue
+            # 批量模式：把队列中已积压的消息合并为一帧发送
+            messages = [message]
+            while len(messages) < WS_MAX_BATCH_SIZE and not queue.empty():
+                message = queue.get_nowait()
+                if message is None:
+                    break
+                messages.append(message)
+            await websocket.send(json.dumps({"type": "batch", "data": messages}))
+            if message is None:
+                break
     finally:
         if tracer:
             tracer.unregister_ws_client(queue)
@@ -1,9 +1,10 @@
 import os
 from typing import List
 
-from quart import Blueprint, g, jsonify, request
+from quart import Blueprint, Response, g, jsonify, request
 
 from kirara_ai.workflow.core.block.registry import BlockRegistry
+from kirara_ai.workflow.core.execution.profiler import WorkflowProfiler
 from kirara_ai.workflow.core.workflow import WorkflowRegistry
 from kirara_ai.workflow.core.workflow.builder import WorkflowBuilder
 
@@ -231,3 +232,29 @@ async def delete_workflow(group_id: str, workflow_id: str):
         return jsonify({"message": "Workflow deleted successfully"})
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+
+
+@workflow_bp.route("/<group_id>/<workflow_id>/profile", methods=["GET"])
+@require_auth
+async def get_workflow_profile(group_id: str, workflow_id: str):
+    """获取工作流逐块的性能统计，format=collapsed 时返回 collapsed stack 格式的文本"""
+    profiler: WorkflowProfiler = g.container.resolve(WorkflowProfiler)
+    full_id = f"{group_id}:{workflow_id}"
+
+    if request.args.get("format") == "collapsed":
+        try:
+            text = profiler.export_collapsed(full_id, request.args.get("metric", "wall_ms"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return Response(text, mimetype="text/plain")
+
+    return jsonify(profiler.get_profile(full_id))
+
+
+@workflow_bp.route("/<group_id>/<workflow_id>/profile", methods=["DELETE"])
+@require_auth
+async def reset_workflow_profile(group_id: str, workflow_id: str):
+    """清空工作流的性能统计"""
+    profiler: WorkflowProfiler = g.container.resolve(WorkflowProfiler)
+    profiler.reset(f"{group_id}:{workflow_id}")
+    return jsonify({"message": "Profile reset successfully"})
@@ -1,4 +1,5 @@
-from typing import Any, Callable, Dict, List, Optional
+import copy
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
 
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.workflow.core.block.input_output import Input, Output
@@ -18,6 +19,10 @@ class Block:
     
     container: DependencyContainer
 
+    # 每次执行需要独立副本的可变属性名称。
+    # 工作流模板中的 block 在每次执行时被浅复制，execute 中会原地修改的属性需要在此声明
+    per_run_state: ClassVar[Tuple[str, ...]] = ()
+
     def __init__(
         self,
         name: Optional[str] = None,
@@ -32,6 +37,15 @@ class Block:
         if outputs is not None:
             self.outputs = outputs
 
+    def instantiate(self, container: DependencyContainer) -> "Block":
+        """从模板复制出一个绑定到指定容器的 block，不会重新调用 __init__"""
+        block = copy.copy(self)
+        for attr in self.per_run_state:
+            if attr in self.__dict__:
+                setattr(block, attr, copy.deepcopy(self.__dict__[attr]))
+        block.container = container
+        return block
+
     def execute(self, **kwargs) -> Dict[str, Any]:
         # Placeholder for block logic
         return {output: f"Processed {kwargs}" for output in self.outputs}
@@ -1,7 +1,12 @@
+from typing import TYPE_CHECKING, Optional
+
+from kirara_ai.config.global_config import DispatchConfig, GlobalConfig
+from kirara_ai.events.event_bus import EventBus
 from kirara_ai.im.adapter import IMAdapter
 from kirara_ai.im.message import IMMessage
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.logger import get_logger
+from kirara_ai.tracing.span import SPAN_DISPATCH, Span, start_span
 from kirara_ai.workflow.core.dispatch.models.dispatch_rules import CombinedDispatchRule
 from kirara_ai.workflow.core.dispatch.registry import DispatchRuleRegistry
 from kirara_ai.workflow.core.dispatch.rules.base import DispatchRule
@@ -10,6 +15,10 @@ from kirara_ai.workflow.core.workflow.base import Workflow
 from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
 
 from .exceptions import WorkflowNotFoundException
+from .queue import DispatchQueue
+
+if TYPE_CHECKING:
+    from .workers import DispatchWorkerPool
 
 
 class WorkflowDispatcher:
@@ -23,6 +32,12 @@ class WorkflowDispatcher:
         self.workflow_registry = container.resolve(WorkflowRegistry)
         self.dispatch_registry = container.resolve(DispatchRuleRegistry)
 
+        # 按发送者排队，避免同一用户的多条消息并发触发工作流
+        config = container.resolve(GlobalConfig).dispatch if container.has(GlobalConfig) else DispatchConfig()
+        self.queue = DispatchQueue(config)
+        # 启用多进程调度时由 entry 设置，消息按发送者转发给工作进程处理
+        self.worker_pool: Optional["DispatchWorkerPool"] = None
+
     def register_rule(self, rule: CombinedDispatchRule):
         """注册一个调度规则"""
         self.dispatch_registry.register(rule)
@@ -30,29 +45,44 @@ class WorkflowDispatcher:
 
     async def dispatch(self, source: IMAdapter, message: IMMessage):
         """
-        根据消息内容选择第一个匹配的规则进行处理
+        根据消息内容选择第一个匹配的规则进行处理。
+        消息先按发送者排队，被合并或丢弃的消息返回 None。
+        启用多进程调度时，消息转发给负责该发送者的工作进程，在工作进程中排队和执行。
         """
+        if self.worker_pool is not None and self.worker_pool.can_dispatch(source):
+            return await self.worker_pool.dispatch(source, message, self.queue.get_key(message.sender))
+        return await self.queue.submit(message, lambda queued: self._dispatch_with_span(source, queued))
+
+    async def _dispatch_with_span(self, source: IMAdapter, message: IMMessage):
+        event_bus = self.container.resolve(EventBus) if self.container.has(EventBus) else None
+        attributes = {"message.sender": str(message.sender.user_id), "im.adapter": type(source).__name__}
+        with start_span("dispatch", SPAN_DISPATCH, attributes, event_bus) as span:
+            return await self._dispatch(source, message, span)
+
+    async def _dispatch(self, source: IMAdapter, message: IMMessage, span: Span):
         with self.container.scoped() as scoped_container:
             scoped_container.register(IMAdapter, source)
             scoped_container.register(IMMessage, message)
             
-            # 获取所有已启用的规则，按优先级排序
-            active_rules = self.dispatch_registry.get_active_rules()
-
-            for rule in active_rules:
-                if rule.match(message, self.workflow_registry, scoped_container):
-                    scoped_container.register(DispatchRule, rule)
-                    try:
-                        self.logger.debug(f"Matched rule {rule}, executing workflow")
-                        workflow = rule.get_workflow(scoped_container)
-                        if workflow is None:
-                            raise WorkflowNotFoundException(f"Workflow for rule {rule.name} not found, please check the rule configuration")
-                        scoped_container.register(Workflow, workflow)
-                        executor = WorkflowExecutor(scoped_container)
-                        scoped_container.register(WorkflowExecutor, executor)
-                        return await executor.run()
-                    except Exception as e:
-                        self.logger.opt(exception=e).error(f"Workflow execution failed: {e}")
-                        return None
+            # 通过索引找出候选规则，再按优先级依次匹配
+            matcher = self.dispatch_registry.get_matcher()
+
+            for compiled in matcher.iter_matches(message, scoped_container):
+                rule = compiled.rule
+                span.set_attribute("dispatch.rule", rule.rule_id)
+                scoped_container.register(DispatchRule, rule)
+                try:
+                    self.logger.debug(f"Matched rule {rule}, executing workflow")
+                    workflow = rule.get_workflow(scoped_container)
+                    if workflow is None:
+                        raise WorkflowNotFoundException(f"Workflow for rule {rule.name} not found, please check the rule configuration")
+                    scoped_container.register(Workflow, workflow)
+                    executor = WorkflowExecutor(scoped_container)
+                    scoped_container.register(WorkflowExecutor, executor)
+                    return await executor.run()
+                except Exception as e:
+                    span.set_error(e)
+                    self.logger.opt(exception=e).error(f"Workflow execution failed: {e}")
+                    return None
             self.logger.debug("No matching rule found for message")
             return None
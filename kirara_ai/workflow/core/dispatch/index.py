@@ -0,0 +1,168 @@
+import re
+from collections import deque
+from typing import Dict, Generic, Iterator, List, Optional, Set, Tuple, TypeVar
+
+try:
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # Python < 3.11
+    import sre_parse  # type: ignore[no-redef]
+
+from .rules.base import DispatchRule
+from .rules.message_rules import KeywordMatchRule, PrefixMatchRule, RegexMatchRule
+
+T = TypeVar("T")
+
+
+class _TrieNode(Generic[T]):
+    __slots__ = ("children", "outputs", "fail")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode[T]"] = {}
+        self.outputs: List[T] = []
+        self.fail: Optional["_TrieNode[T]"] = None
+
+
+class PrefixTrie(Generic[T]):
+    """前缀树，沿消息文本走一遍即可找到所有作为其前缀的模式"""
+
+    def __init__(self):
+        self.root: _TrieNode[T] = _TrieNode()
+
+    def add(self, prefix: str, value: T) -> None:
+        node = self.root
+        for char in prefix:
+            node = node.children.setdefault(char, _TrieNode())
+        node.outputs.append(value)
+
+    def iter_matches(self, text: str) -> Iterator[T]:
+        node = self.root
+        yield from node.outputs
+        for char in text:
+            child = node.children.get(char)
+            if child is None:
+                return
+            node = child
+            yield from node.outputs
+
+
+class AhoCorasick(Generic[T]):
+    """Aho-Corasick 自动机，扫描一遍消息文本找到所有出现的子串模式"""
+
+    def __init__(self):
+        self.root: _TrieNode[T] = _TrieNode()
+        self._built = False
+
+    def add(self, pattern: str, value: T) -> None:
+        node = self.root
+        for char in pattern:
+            node = node.children.setdefault(char, _TrieNode())
+        node.outputs.append(value)
+        self._built = False
+
+    def build(self) -> None:
+        """构建失败指针，并把失败链上的输出合并到节点上"""
+        queue: deque = deque()
+        for child in self.root.children.values():
+            child.fail = self.root
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in node.children.items():
+                fail = node.fail
+                while fail is not None and char not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children[char] if fail is not None else self.root
+                child.outputs = child.outputs + child.fail.outputs
+                queue.append(child)
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[T]:
+        if not self._built:
+            self.build()
+        root = self.root
+        node = root
+        yield from root.outputs
+        for char in text:
+            while char not in node.children and node is not root:
+                node = node.fail  # type: ignore[assignment]
+            node = node.children.get(char, root)
+            yield from node.outputs
+
+
+def required_literal(pattern: "re.Pattern[str]") -> Optional[str]:
+    """
+    从正则表达式中提取任何匹配都必须包含的最长字面量子串，用于预筛选。
+    只分析顶层的连续字面量，忽略大小写的表达式或无法分析时返回 None。
+    """
+    if pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+    best = ""
+    current: List[str] = []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        if len("".join(current)) > len(best):
+            best = "".join(current)
+        current = []
+    if len("".join(current)) > len(best):
+        best = "".join(current)
+    return best or None
+
+
+# 文本类规则的预筛选条件：("prefix" | "substring", 字面量)
+Gate = Tuple[str, str]
+
+
+def text_gates(rule: DispatchRule) -> Optional[List[Gate]]:
+    """
+    获取文本类规则匹配的必要条件：规则匹配时，消息文本至少满足其中一个条件。
+    非文本类规则或无法预筛选的规则返回 None。子类可能重写匹配逻辑，因此只处理内置类型本身。
+    """
+    rule_type = type(rule)
+    if rule_type is PrefixMatchRule:
+        return [("prefix", rule.prefix)]  # type: ignore[attr-defined]
+    if rule_type is KeywordMatchRule:
+        return [("substring", keyword) for keyword in rule.keywords]  # type: ignore[attr-defined]
+    if rule_type is RegexMatchRule:
+        literal = required_literal(rule.pattern)  # type: ignore[attr-defined]
+        return [("substring", literal)] if literal else None
+    return None
+
+
+class RuleIndex:
+    """
+    文本规则的多模式索引。
+    前缀规则放入前缀树，关键词和正则中提取的必需字面量放入 Aho-Corasick 自动机，
+    扫描一遍消息文本即可得到所有可能匹配的规则编号；无法预筛选的规则总是作为候选。
+    """
+
+    def __init__(self):
+        self._prefixes: PrefixTrie[int] = PrefixTrie()
+        self._substrings: AhoCorasick[int] = AhoCorasick()
+        # 无法预筛选、每条消息都需要检查的规则编号
+        self._always: List[int] = []
+
+    def add(self, index: int, gates: Optional[List[Gate]]) -> None:
+        if gates is None or any(not literal for _, literal in gates):
+            self._always.append(index)
+            return
+        for kind, literal in gates:
+            if kind == "prefix":
+                self._prefixes.add(literal, index)
+            else:
+                self._substrings.add(literal, index)
+
+    def build(self) -> None:
+        self._substrings.build()
+
+    def candidates(self, text: str) -> List[int]:
+        """返回可能匹配的规则编号，按编号升序（即优先级顺序）排列"""
+        found: Set[int] = set(self._always)
+        found.update(self._prefixes.iter_matches(text))
+        found.update(self._substrings.iter_matches(text))
+        return sorted(found)
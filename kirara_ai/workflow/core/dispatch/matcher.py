@@ -0,0 +1,241 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from kirara_ai.im.adapter import IMAdapter
+from kirara_ai.im.message import IMMessage
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.logger import get_logger
+from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
+
+from .index import Gate, RuleIndex, text_gates
+from .rules.base import DispatchRule
+
+if TYPE_CHECKING:
+    from .models.dispatch_rules import CombinedDispatchRule
+
+logger = get_logger("DispatchRule")
+
+
+# 发送者静态结果：每个规则组中 sender_static 规则的有效匹配结果
+StaticResults = Tuple[Tuple[bool, ...], ...]
+
+# 发送者缓存中尚未计算的条目
+_UNSET: Any = object()
+
+
+def _evaluate(rule: DispatchRule, message: IMMessage, container: DependencyContainer) -> Optional[bool]:
+    """执行单条规则，出错时返回 None"""
+    try:
+        return rule.match(message, container)
+    except Exception as e:
+        # 如果规则匹配过程出错，视为不匹配
+        logger.error(f"Rule {rule.type_name} matching failed: {e}")
+        return None
+
+
+class CompiledRuleGroup:
+    """编译后的规则组，规则实例只在编译时创建一次"""
+
+    __slots__ = ("operator", "rules", "empty", "static_rules", "dynamic_rules")
+
+    def __init__(self, operator: str, rules: Tuple[DispatchRule, ...], empty: bool):
+        self.operator = operator
+        self.rules = rules
+        # 配置中没有任何规则（与编译失败导致没有有效规则区分）
+        self.empty = empty
+        # 只取决于发送者的规则和取决于消息内容的规则
+        self.static_rules = tuple(rule for rule in rules if rule.sender_static)
+        self.dynamic_rules = tuple(rule for rule in rules if not rule.sender_static)
+
+
+class CompiledDispatchRule:
+    """编译后的组合规则，创建后不再修改；配置变化时整体重新编译"""
+
+    __slots__ = ("rule", "groups", "has_static")
+
+    def __init__(self, rule: "CombinedDispatchRule", groups: Tuple[CompiledRuleGroup, ...]):
+        self.rule = rule
+        self.groups = groups
+        self.has_static = any(group.static_rules for group in groups)
+
+    def evaluate_static(self, message: IMMessage, container: DependencyContainer) -> Optional[StaticResults]:
+        """
+        计算只取决于发送者的规则结果，同一发送者和 IM 实例的后续消息可以复用。
+        仅凭这些结果即可确定不匹配时返回 None。
+        """
+        results = []
+        for group in self.groups:
+            # 空规则组直接视为匹配，其后的规则组不会被检查
+            if group.empty:
+                break
+            group_results = tuple(
+                result for result in (_evaluate(rule, message, container) for rule in group.static_rules)
+                if result is not None
+            )
+            check = all if group.operator == "and" else any
+            if not group.dynamic_rules:
+                # 组内只有发送者规则，结果已经确定；没有有效规则时视为不匹配
+                if not group_results or not check(group_results):
+                    return None
+            elif group.operator == "and" and not all(group_results):
+                return None
+            results.append(group_results)
+        results.extend(() for _ in range(len(self.groups) - len(results)))
+        return tuple(results)
+
+    def match(
+        self, message: IMMessage, container: DependencyContainer, static: Optional[StaticResults] = None
+    ) -> bool:
+        """
+        判断消息是否匹配，不检查规则是否启用。
+        规则组之间是 AND 关系，规则组内部根据 operator 决定是 AND 还是 OR 关系。
+        static 为 evaluate_static 的结果，未提供时重新计算。
+        """
+        if static is None:
+            static = self.evaluate_static(message, container)
+            if static is None:
+                return False
+
+        for group, static_results in zip(self.groups, static):
+            # 如果组内没有规则，视为匹配
+            if group.empty:
+                return True
+
+            if group.operator == "and":
+                if not all(static_results):
+                    return False
+            elif any(static_results):
+                continue
+
+            # 获取组内其余规则的匹配结果，出错的规则跳过
+            rule_results = list(static_results)
+            for rule in group.dynamic_rules:
+                result = _evaluate(rule, message, container)
+                if result is not None:
+                    rule_results.append(result)
+
+            # 如果组内没有有效规则，视为不匹配
+            if not rule_results:
+                return False
+
+            if group.operator == "and":
+                if not all(rule_results):
+                    return False
+            elif not any(rule_results):
+                return False
+
+        return True
+
+    def gates(self) -> Optional[List[Gate]]:
+        """
+        获取规则匹配的文本必要条件，供索引预筛选使用，无法预筛选时返回 None。
+        规则组之间是 AND 关系，任意一个可预筛选的组都是必要条件；
+        但空规则组会直接视为匹配，其后的规则组不再是必要条件。
+        """
+        for group in self.groups:
+            if group.empty:
+                return None
+            if not group.rules:
+                continue
+            if group.operator == "and":
+                # AND 组中任意一个文本规则都是必要条件
+                for rule in group.rules:
+                    gates = text_gates(rule)
+                    if gates is not None:
+                        return gates
+            else:
+                # OR 组只有全部是文本规则时才能预筛选
+                group_gates: List[Gate] = []
+                for rule in group.rules:
+                    gates = text_gates(rule)
+                    if gates is None:
+                        break
+                    group_gates.extend(gates)
+                else:
+                    return group_gates
+        return None
+
+
+def compile_rule(rule: "CombinedDispatchRule", workflow_registry: WorkflowRegistry) -> CompiledDispatchRule:
+    """编译组合规则，创建失败的子规则会被记录并跳过"""
+    groups = []
+    for group in rule.rule_groups:
+        instances = []
+        for simple_rule in group.rules:
+            try:
+                rule_class = DispatchRule.get_rule_type(simple_rule.type)
+                instances.append(rule_class.from_config(
+                    rule_class.config_class(**simple_rule.config),
+                    workflow_registry,
+                    rule.workflow_id,
+                ))
+            except Exception as e:
+                logger.error(f"Rule {simple_rule.type} from config {simple_rule.config} creation failed: {e}")
+        groups.append(CompiledRuleGroup(group.operator, tuple(instances), not group.rules))
+    return CompiledDispatchRule(rule, tuple(groups))
+
+
+class DispatchMatcher:
+    """
+    已启用规则的不可变快照，按优先级降序排列；规则变化时由注册表重新构建。
+    前缀 / 关键词 / 正则规则建立多模式索引，每条消息只需扫描一遍文本找出候选规则，
+    再对候选规则检查其余条件（发送者、聊天类型、IM 实例等）。
+    发送者相关条件的结果按 (IM 实例, 发送者) 缓存在有界 LRU 中，随快照一起在规则变化时失效。
+    """
+
+    SENDER_CACHE_SIZE = 4096
+
+    def __init__(self, rules: Sequence[CompiledDispatchRule]):
+        self.rules: Tuple[CompiledDispatchRule, ...] = tuple(rules)
+        self._index = RuleIndex()
+        for i, compiled in enumerate(self.rules):
+            self._index.add(i, compiled.gates())
+        self._index.build()
+        self._has_static = any(compiled.has_static for compiled in self.rules)
+        self._sender_cache: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def candidates(self, message: IMMessage) -> Iterator[CompiledDispatchRule]:
+        """按优先级顺序返回可能匹配该消息的规则"""
+        for i in self._index.candidates(message.content):
+            yield self.rules[i]
+
+    def _sender_entry(self, message: IMMessage, container: DependencyContainer) -> Optional[List[Any]]:
+        """获取发送者的缓存条目，按规则下标保存 evaluate_static 的结果"""
+        if not self._has_static:
+            return None
+        sender = message.sender
+        adapter = container.resolve(IMAdapter) if container.has(IMAdapter) else None
+        key = (adapter, sender.chat_type, sender.user_id, sender.group_id)
+        entry = self._sender_cache.get(key)
+        if entry is None:
+            self.cache_misses += 1
+            entry = self._sender_cache[key] = [_UNSET] * len(self.rules)
+            if len(self._sender_cache) > self.SENDER_CACHE_SIZE:
+                self._sender_cache.popitem(last=False)
+        else:
+            self.cache_hits += 1
+            self._sender_cache.move_to_end(key)
+        return entry
+
+    def iter_matches(self, message: IMMessage, container: DependencyContainer) -> Iterator[CompiledDispatchRule]:
+        """按优先级顺序返回匹配该消息的规则"""
+        entry = self._sender_entry(message, container)
+        for i in self._index.candidates(message.content):
+            compiled = self.rules[i]
+            static = None
+            if entry is not None and compiled.has_static:
+                static = entry[i]
+                if static is _UNSET:
+                    static = entry[i] = compiled.evaluate_static(message, container)
+                if static is None:
+                    continue
+            if compiled.match(message, container, static):
+                yield compiled
+
+    def match(self, message: IMMessage, container: DependencyContainer) -> Optional["CombinedDispatchRule"]:
+        """返回第一个匹配的规则"""
+        for compiled in self.iter_matches(message, container):
+            return compiled.rule
+        return None
@@ -1,14 +1,15 @@
-from typing import Any, Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from kirara_ai.im.message import IMMessage
 from kirara_ai.ioc.container import DependencyContainer
-from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.workflow import Workflow
 from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
 
-logger = get_logger("DispatchRule")
+if TYPE_CHECKING:
+    from ..matcher import CompiledDispatchRule
+
 
 class SimpleDispatchRule(BaseModel):
     """简单规则，包含规则类型和配置"""
@@ -31,6 +32,20 @@ class CombinedDispatchRule(BaseModel):
     rule_groups: List[RuleGroup]  # 规则组之间是 AND 关系
     metadata: Dict[str, Any] = {}
 
+    # 编译后的规则，首次使用时创建，配置变化后需调用 invalidate
+    _compiled: Optional["CompiledDispatchRule"] = PrivateAttr(default=None)
+
+    def compile(self, workflow_registry: WorkflowRegistry) -> "CompiledDispatchRule":
+        """获取编译后的规则，子规则实例只创建一次"""
+        if self._compiled is None:
+            from ..matcher import compile_rule
+            self._compiled = compile_rule(self, workflow_registry)
+        return self._compiled
+
+    def invalidate(self):
+        """丢弃编译结果，下次使用时重新编译"""
+        self._compiled = None
+
     def match(self, message: IMMessage, workflow_registry: WorkflowRegistry, container: DependencyContainer) -> bool:
         """
         判断消息是否匹配该规则。
@@ -39,46 +54,7 @@ class CombinedDispatchRule(BaseModel):
         # 如果规则被禁用，直接返回 False
         if not self.enabled:
             return False
-
-        # 所有规则组都必须匹配（AND 关系）
-        for group in self.rule_groups:
-            
-            # 如果组内没有规则，视为匹配
-            if len(group.rules) == 0:
-                return True
-
-            # 获取组内所有规则的匹配结果
-            rule_results = []
-            for rule in group.rules:
-                try:
-                    from ..rules.base import DispatchRule
-
-                    # 创建具体的规则实例
-                    rule_class = DispatchRule.get_rule_type(rule.type)
-                    rule_instance = rule_class.from_config(
-                        rule_class.config_class(**rule.config),
-                        workflow_registry,
-                        self.workflow_id,
-                    )
-                    rule_results.append(rule_instance.match(message, container))
-                except Exception as e:
-                    # 如果规则创建或匹配过程出错，视为不匹配
-                    logger.error(f"Rule {rule.type} from config {rule.config} creation or matching failed: {e}")
-                    continue
-
-            # 根据操作符确定组的匹配结果
-            if not rule_results:  # 如果组内没有有效规则，视为不匹配
-                return False
-
-            if group.operator == "and":
-                if not all(rule_results):  # AND 关系：所有规则都必须匹配
-                    return False
-            else:  # operator == "or"
-                if not any(rule_results):  # OR 关系：至少一个规则匹配
-                    return False
-
-        # 所有规则组都匹配成功
-        return True
+        return self.compile(workflow_registry).match(message, container)
 
     def get_workflow(self, container: DependencyContainer) -> Optional[Workflow]:
         """获取该规则对应的工作流实例。"""
@@ -0,0 +1,118 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from kirara_ai.config.global_config import DispatchConfig
+from kirara_ai.im.message import IMMessage
+from kirara_ai.im.sender import ChatSender, ChatType
+from kirara_ai.logger import get_logger
+
+T = TypeVar("T")
+
+Handler = Callable[[IMMessage], Awaitable[T]]
+
+
+def merge_messages(messages: List[IMMessage]) -> IMMessage:
+    """合并同一发送者的连续消息，发送者和原始消息取最后一条"""
+    if len(messages) == 1:
+        return messages[0]
+    elements = [element for message in messages for element in message.message_elements]
+    last = messages[-1]
+    return IMMessage(sender=last.sender, message_elements=elements, raw_message=last.raw_message)
+
+
+class _KeyState:
+    """单个发送者（或作用域）的排队状态"""
+
+    __slots__ = ("lock", "busy", "pending", "generation", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.busy = False
+        # 防抖窗口内等待合并的消息
+        self.pending: List[IMMessage] = []
+        self.generation = 0
+        # 正在使用该状态的调用数，归零时回收
+        self.users = 0
+
+
+class DispatchQueue:
+    """
+    按发送者 / 作用域排队的调度队列。
+    - serialize：同一发送者的消息依次处理
+    - debounce：合并 debounce_ms 内的连续消息后再处理一次，被合并的调用返回 None
+    - drop：同一发送者的消息正在处理时丢弃新消息
+    - none：不排队
+    另外通过 max_concurrency 限制全局同时处理的消息数量，超出时调用方等待（背压）。
+    """
+
+    def __init__(self, config: DispatchConfig):
+        self.config = config
+        self.logger = get_logger("DispatchQueue")
+        self._states: Dict[str, _KeyState] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = (
+            asyncio.Semaphore(config.max_concurrency) if config.max_concurrency > 0 else None
+        )
+        self.dropped = 0
+        self.merged = 0
+
+    def get_key(self, sender: ChatSender) -> str:
+        """根据配置的作用域计算排队的键"""
+        scope = self.config.queue_scope
+        if scope == "global":
+            return "global"
+        if scope == "group" and sender.chat_type == ChatType.GROUP:
+            return f"group:{sender.group_id}"
+        return str(sender)
+
+    async def submit(self, message: IMMessage, handler: Handler[T]) -> Optional[T]:
+        """提交消息，按策略排队后调用 handler 处理"""
+        policy = self.config.queue_policy
+        if policy == "none":
+            return await self._run(handler, message)
+
+        key = self.get_key(message.sender)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _KeyState()
+        state.users += 1
+        try:
+            if policy == "drop":
+                return await self._submit_drop(key, state, message, handler)
+            if policy == "debounce":
+                return await self._submit_debounce(state, message, handler)
+            async with state.lock:
+                return await self._run(handler, message)
+        finally:
+            state.users -= 1
+            if state.users == 0 and self._states.get(key) is state:
+                del self._states[key]
+
+    async def _submit_drop(self, key: str, state: _KeyState, message: IMMessage, handler: Handler[T]) -> Optional[T]:
+        if state.busy:
+            self.dropped += 1
+            self.logger.debug(f"Dropped message from {key}, previous message is still being processed")
+            return None
+        state.busy = True
+        try:
+            return await self._run(handler, message)
+        finally:
+            state.busy = False
+
+    async def _submit_debounce(self, state: _KeyState, message: IMMessage, handler: Handler[T]) -> Optional[T]:
+        state.pending.append(message)
+        state.generation += 1
+        generation = state.generation
+        await asyncio.sleep(self.config.debounce_ms / 1000)
+        if generation != state.generation:
+            # 窗口内有更新的消息，由最后一条消息的调用统一处理
+            return None
+        messages, state.pending = state.pending, []
+        self.merged += len(messages) - 1
+        async with state.lock:
+            return await self._run(handler, merge_messages(messages))
+
+    async def _run(self, handler: Handler[T], message: IMMessage) -> T:
+        if self._semaphore is None:
+            return await handler(message)
+        async with self._semaphore:
+            return await handler(message)
@@ -7,6 +7,7 @@ from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
 
+from .matcher import DispatchMatcher
 from .models.dispatch_rules import CombinedDispatchRule, RuleGroup, SimpleDispatchRule
 from .rules.base import DispatchRule
 from .rules.message_rules import BotMentionMatchRule, KeywordMatchRule, PrefixMatchRule, RegexMatchRule
@@ -23,14 +24,34 @@ class DispatchRuleRegistry:
         self.rules: Dict[str, CombinedDispatchRule] = {}
         self.logger = get_logger("DispatchRuleRegistry")
         self.rules_dir = "data/dispatch_rules"
+        # 已启用规则的匹配器快照，规则变化时置空，下次使用时重新构建
+        self._matcher: Optional[DispatchMatcher] = None
 
     def register(self, rule: CombinedDispatchRule):
-        """注册一个调度规则"""
+        """注册一个调度规则，并立即编译"""
         if not rule.rule_id:
             raise ValueError("Rule must have an ID")
+        rule.invalidate()
+        rule.compile(self.workflow_registry)
         self.rules[rule.rule_id] = rule
+        self.invalidate()
         self.logger.info(f"Registered dispatch rule: {rule}")
 
+    def invalidate(self):
+        """规则变化后丢弃匹配器快照"""
+        self._matcher = None
+
+    def get_matcher(self) -> DispatchMatcher:
+        """获取已启用规则的匹配器"""
+        matcher = self._matcher
+        if matcher is None:
+            active_rules = [rule for rule in self.rules.values() if rule.enabled]
+            active_rules.sort(key=lambda x: x.priority, reverse=True)
+            matcher = self._matcher = DispatchMatcher(
+                [rule.compile(self.workflow_registry) for rule in active_rules]
+            )
+        return matcher
+
     def get_rule(self, rule_id: str) -> Optional[CombinedDispatchRule]:
         """获取指定ID的规则"""
         return self.rules.get(rule_id)
@@ -41,8 +62,7 @@ class DispatchRuleRegistry:
 
     def get_active_rules(self) -> List[CombinedDispatchRule]:
         """获取所有已启用的规则，按优先级降序排序"""
-        active_rules = [rule for rule in self.rules.values() if rule.enabled]
-        return sorted(active_rules, key=lambda x: x.priority, reverse=True)
+        return [compiled.rule for compiled in self.get_matcher().rules]
 
     def create_rule(self, rule: CombinedDispatchRule) -> CombinedDispatchRule:
         """创建并注册一个新规则"""
@@ -71,6 +91,7 @@ class DispatchRuleRegistry:
         if rule_id not in self.rules:
             raise ValueError(f"Rule {rule_id} not found")
         del self.rules[rule_id]
+        self.invalidate()
 
     def enable_rule(self, rule_id: str):
         """启用规则"""
@@ -78,6 +99,7 @@ class DispatchRuleRegistry:
         if not rule:
             raise ValueError(f"Rule {rule_id} not found")
         rule.enabled = True
+        self.invalidate()
 
     def disable_rule(self, rule_id: str):
         """禁用规则"""
@@ -85,6 +107,7 @@ class DispatchRuleRegistry:
         if not rule:
             raise ValueError(f"Rule {rule_id} not found")
         rule.enabled = False
+        self.invalidate()
 
     def _convert_old_rule(self, rule_data: Dict[str, Any]) -> CombinedDispatchRule:
         """将旧版本规则数据转换为新版本格式"""
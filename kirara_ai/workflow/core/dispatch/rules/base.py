@@ -21,6 +21,8 @@ class DispatchRule(ABC):
     rule_types: ClassVar[Dict[str, Type["DispatchRule"]]] = {}
     config_class: ClassVar[Type[RuleConfig]]
     type_name: ClassVar[str]
+    # 匹配结果只取决于发送者和消息来源的 IM 实例，与消息内容无关，调度时可按发送者缓存
+    sender_static: ClassVar[bool] = False
 
     def __init__(self, workflow_registry: WorkflowRegistry, workflow_id: str):
         """初始化调度规则。"""
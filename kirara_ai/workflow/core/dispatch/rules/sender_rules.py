@@ -21,6 +21,7 @@ class ChatSenderMatchRule(DispatchRule):
     """根据聊天发送者匹配的规则"""
     config_class = ChatSenderMatchRuleConfig
     type_name = "sender"
+    sender_static = True
 
     def __init__(
         self,
@@ -62,6 +63,7 @@ class ChatSenderMismatchRule(DispatchRule):
     """根据聊天发送者不匹配的规则"""
     config_class = ChatSenderMatchRuleConfig
     type_name = "sender_mismatch"
+    sender_static = True
 
     def __init__(
         self,
@@ -74,7 +76,7 @@ class ChatSenderMismatchRule(DispatchRule):
         self.sender_id = sender_id
         self.sender_group = sender_group
 
-    def match(self, message: IMMessage) -> bool:
+    def match(self, message: IMMessage, container: DependencyContainer) -> bool:
         # 如果设置了群组ID，则必须不匹配
         if self.sender_group and message.sender.group_id == self.sender_group:
             return False
@@ -109,12 +111,13 @@ class ChatTypeMatchRule(DispatchRule):
     """根据聊天类型匹配的规则"""
     config_class = ChatTypeMatchRuleConfig
     type_name = "chat_type"
+    sender_static = True
 
     def __init__(self, chat_type: ChatType, workflow_registry: WorkflowRegistry, workflow_id: str):
         super().__init__(workflow_registry, workflow_id)
         self.chat_type = chat_type
 
-    def match(self, message: IMMessage) -> bool:
+    def match(self, message: IMMessage, container: DependencyContainer) -> bool:
         return message.sender.chat_type == self.chat_type
 
     def get_config(self) -> ChatTypeMatchRuleConfig:
@@ -48,6 +48,7 @@ class IMInstanceMatchRule(DispatchRule):
     """根据IM实例匹配的规则"""
     config_class = IMInstanceMatchRuleConfig
     type_name = "im_instance"
+    sender_static = True
 
     def __init__(self, im_instance: str, workflow_registry: WorkflowRegistry, workflow_id: str):
         super().__init__(workflow_registry, workflow_id)
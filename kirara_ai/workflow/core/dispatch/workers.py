@@ -0,0 +1,414 @@
+import asyncio
+import bisect
+import dataclasses
+import hashlib
+import itertools
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from kirara_ai.im.adapter import IMAdapter
+from kirara_ai.im.manager import IMManager
+from kirara_ai.im.message import IMMessage
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.logger import get_logger
+from kirara_ai.workflow.core.workflow.builder import WorkflowBuilder
+from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
+
+from .registry import DispatchRuleRegistry
+
+# 适配器的可选能力，工作进程中的代理适配器只暴露前台适配器实际支持的方法
+ADAPTER_CAPABILITIES = ("set_chat_editing_state", "query_user_profile", "get_bot_profile")
+
+# 工作进程检查工作流和调度规则文件变化的最短间隔（秒）
+REFRESH_INTERVAL = 1.0
+
+logger = get_logger("DispatchWorker")
+
+
+class RemoteCallError(Exception):
+    """前台进程执行适配器调用失败"""
+
+
+class ConsistentHashRing:
+    """一致性哈希环，同一个键总是路由到同一个节点，节点数量变化时只有少量键迁移"""
+
+    def __init__(self, nodes: Iterable[int], replicas: int = 64):
+        ring = sorted((self._hash(f"{node}:{i}"), node) for node in nodes for i in range(replicas))
+        self._hashes = [item[0] for item in ring]
+        self._nodes = [item[1] for item in ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def get(self, key: str) -> int:
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+def _dumps(payload: Tuple[Any, ...]) -> bytes:
+    """序列化发往其他进程的数据，原始消息等无法序列化的平台数据会被丢弃"""
+    try:
+        return pickle.dumps(payload)
+    except Exception:
+        stripped = tuple(_strip(item) for item in payload)
+        return pickle.dumps(stripped)
+
+
+def _strip(value: Any) -> Any:
+    if isinstance(value, IMMessage):
+        sender = dataclasses.replace(value.sender, raw_metadata={})
+        return IMMessage(sender=sender, message_elements=value.message_elements)
+    return value
+
+
+class _Channel:
+    """对 Connection 的线程安全封装"""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, *payload: Any) -> None:
+        data = _dumps(payload)
+        with self._lock:
+            self.conn.send_bytes(data)
+
+    def recv(self) -> Tuple[Any, ...]:
+        return pickle.loads(self.conn.recv_bytes())
+
+
+class RemoteIMAdapter(IMAdapter):
+    """工作进程中的适配器代理，把调用转发给前台进程中的真实适配器"""
+
+    is_running = True
+
+    def __init__(self, name: str, worker: "DispatchWorker"):
+        self.name = name
+        self._worker = worker
+
+    async def convert_to_message(self, raw_message: Any) -> IMMessage:
+        raise NotImplementedError("Remote adapters do not receive raw messages")
+
+    async def send_message(self, message: IMMessage, recipient: Any):
+        return await self._worker.call(self.name, "send_message", (message, recipient))
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+_remote_classes: Dict[Tuple[str, Tuple[str, ...]], Type[RemoteIMAdapter]] = {}
+
+
+def create_remote_adapter(name: str, class_name: str, capabilities: Tuple[str, ...], worker: "DispatchWorker") -> RemoteIMAdapter:
+    """创建代理适配器，类名和可选能力与前台适配器一致，isinstance 协议检查结果保持不变"""
+    cls = _remote_classes.get((class_name, capabilities))
+    if cls is None:
+        methods: Dict[str, Any] = {}
+        for method in capabilities:
+            async def forward(self, *args, _method=method):
+                return await self._worker.call(self.name, _method, args)
+            forward.__name__ = method
+            methods[method] = forward
+        cls = _remote_classes[(class_name, capabilities)] = type(class_name, (RemoteIMAdapter,), methods)
+    return cls(name, worker)
+
+
+def describe_adapters(adapters: Dict[str, IMAdapter]) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+    """描述前台适配器的类名和可选能力，随消息发送给工作进程"""
+    return {
+        name: (type(adapter).__name__, tuple(cap for cap in ADAPTER_CAPABILITIES if hasattr(adapter, cap)))
+        for name, adapter in adapters.items()
+    }
+
+
+class DispatchWorker:
+    """
+    调度工作进程：接收前台进程转发的消息，用本进程的 WorkflowDispatcher 处理。
+    工作流中对 IM 适配器的调用通过 RemoteIMAdapter 转发回前台进程执行。
+    """
+
+    def __init__(self, container: DependencyContainer, conn: Connection):
+        from .dispatcher import WorkflowDispatcher
+
+        self.container = container
+        self.channel = _Channel(conn)
+        self.loop = container.resolve(asyncio.AbstractEventLoop)
+        self.dispatcher = container.resolve(WorkflowDispatcher)
+        self.im_manager = container.resolve(IMManager)
+        self._calls: Dict[int, Future] = {}
+        self._call_ids = itertools.count()
+        self._stopped: Optional[asyncio.Event] = None
+        self._adapters: Dict[str, RemoteIMAdapter] = {}
+        self._last_refresh = time.monotonic()
+        self._rules_signature = self._scan_rules()
+        self._workflow_files = self._scan_workflows()
+
+    async def call(self, adapter_name: str, method: str, args: Tuple[Any, ...]) -> Any:
+        """调用前台进程中适配器的方法"""
+        call_id = next(self._call_ids)
+        future: Future = Future()
+        self._calls[call_id] = future
+        self.channel.send("call", call_id, adapter_name, method, args)
+        return await asyncio.wrap_future(future)
+
+    def _get_adapter(self, name: str, adapters: Dict[str, Tuple[str, Tuple[str, ...]]]) -> RemoteIMAdapter:
+        # 同步前台的适配器列表，SendIMMessage 等区块可以按名称获取其他适配器
+        for adapter_name, (class_name, capabilities) in adapters.items():
+            adapter = self._adapters.get(adapter_name)
+            if adapter is None or type(adapter).__name__ != class_name:
+                adapter = self._adapters[adapter_name] = create_remote_adapter(adapter_name, class_name, capabilities, self)
+            self.im_manager.adapters[adapter_name] = adapter
+        return self._adapters[name]
+
+    def _scan_rules(self) -> Tuple[Tuple[str, float], ...]:
+        if not self.container.has(DispatchRuleRegistry):
+            return ()
+        rules_dir = self.container.resolve(DispatchRuleRegistry).rules_dir
+        if not os.path.isdir(rules_dir):
+            return ()
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime) for entry in os.scandir(rules_dir) if entry.name.endswith(".yaml")
+        ))
+
+    def _scan_workflows(self) -> Dict[Tuple[str, str], str]:
+        workflows_dir = WorkflowRegistry.WORKFLOWS_DIR
+        files: Dict[Tuple[str, str], str] = {}
+        if not os.path.isdir(workflows_dir):
+            return files
+        for group in os.scandir(workflows_dir):
+            if not group.is_dir():
+                continue
+            for entry in os.scandir(group.path):
+                if entry.name.endswith(".yaml"):
+                    files[(group.name, os.path.splitext(entry.name)[0])] = entry.path
+        return files
+
+    def _refresh(self) -> None:
+        """WebUI 在前台进程修改调度规则或增删工作流后，工作进程重新加载"""
+        now = time.monotonic()
+        if now - self._last_refresh < REFRESH_INTERVAL:
+            return
+        self._last_refresh = now
+
+        rules_signature = self._scan_rules()
+        if rules_signature != self._rules_signature:
+            self._rules_signature = rules_signature
+            dispatch_registry = self.container.resolve(DispatchRuleRegistry)
+            dispatch_registry.rules.clear()
+            dispatch_registry.invalidate()
+            dispatch_registry.load_rules()
+
+        # 已有工作流文件的修改由 WorkflowRegistry 根据修改时间重新加载
+        workflow_files = self._scan_workflows()
+        if workflow_files.keys() != self._workflow_files.keys():
+            workflow_registry = self.container.resolve(WorkflowRegistry)
+            for group_id, workflow_id in self._workflow_files.keys() - workflow_files.keys():
+                workflow_registry.unregister(group_id, workflow_id)
+            for key in workflow_files.keys() - self._workflow_files.keys():
+                try:
+                    builder = WorkflowBuilder.load_from_yaml(workflow_files[key], self.container)
+                    workflow_registry.register(key[0], key[1], builder)
+                except Exception as e:
+                    logger.error(f"Failed to load workflow from {workflow_files[key]}: {e}")
+            self._workflow_files = workflow_files
+
+    async def _handle(self, request_id: int, adapter_name: str, adapters: Dict[str, Tuple[str, Tuple[str, ...]]], message: IMMessage) -> None:
+        error: Optional[str] = None
+        try:
+            self._refresh()
+            await self.dispatcher.dispatch(self._get_adapter(adapter_name, adapters), message)
+        except Exception as e:
+            logger.opt(exception=e).error(f"Failed to dispatch message: {e}")
+            error = str(e)
+        self.channel.send("done", request_id, error)
+
+    def _read(self) -> None:
+        try:
+            while True:
+                try:
+                    payload = self.channel.recv()
+                except (EOFError, OSError):
+                    break
+                kind = payload[0]
+                if kind == "dispatch":
+                    asyncio.run_coroutine_threadsafe(self._handle(*payload[1:]), self.loop)
+                elif kind == "result":
+                    _, call_id, error, value = payload
+                    future = self._calls.pop(call_id, None)
+                    if future is None:
+                        continue
+                    if error is None:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(RemoteCallError(error))
+                elif kind == "stop":
+                    break
+        finally:
+            for future in self._calls.values():
+                future.set_exception(RemoteCallError("Front process disconnected"))
+            self._calls.clear()
+            if self._stopped is not None:
+                self.loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _serve(self) -> None:
+        self._stopped = asyncio.Event()
+        threading.Thread(target=self._read, name="DispatchWorkerReader", daemon=True).start()
+        self.channel.send("ready")
+        await self._stopped.wait()
+
+    def run(self) -> None:
+        self.loop.run_until_complete(self._serve())
+
+
+def run_dispatch_worker(index: int, conn: Connection) -> None:
+    """工作进程入口：初始化应用（不启动 Web 服务和 IM 适配器），然后处理前台转发的消息"""
+    # 由前台进程通过 stop 消息统一停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from kirara_ai.entry import init_application
+    from kirara_ai.mcp.manager import MCPServerManager
+
+    container = init_application()
+    loop = container.resolve(asyncio.AbstractEventLoop)
+    asyncio.set_event_loop(loop)
+    container.resolve(MCPServerManager).connect_all_servers(loop=loop)
+    logger.info(f"Dispatch worker {index} started (pid {os.getpid()})")
+    DispatchWorker(container, conn).run()
+    logger.info(f"Dispatch worker {index} stopped")
+
+
+class _WorkerHandle:
+    def __init__(self, index: int, conn: Connection, process: Optional[Any] = None):
+        self.index = index
+        self.channel = _Channel(conn)
+        self.process = process
+        self.alive = True
+
+
+class DispatchWorkerPool:
+    """
+    前台进程中的调度工作进程池。
+    消息按发送者（或作用域）的一致性哈希路由到固定的工作进程，对话的记忆始终在同一个进程中。
+    """
+
+    def __init__(self, container: DependencyContainer, workers: int):
+        self.container = container
+        self.size = workers
+        self.loop = container.resolve(asyncio.AbstractEventLoop)
+        self.im_manager = container.resolve(IMManager)
+        self.ring = ConsistentHashRing(range(workers))
+        self._workers: List[Optional[_WorkerHandle]] = [None] * workers
+        self._pending: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._request_ids = itertools.count()
+
+    def start(self) -> None:
+        """以 spawn 方式启动工作进程，避免复制前台进程中已启动的线程和连接"""
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.size):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=run_dispatch_worker, args=(index, child_conn), name=f"DispatchWorker-{index}", daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.attach(index, parent_conn, process)
+
+    def attach(self, index: int, conn: Connection, process: Optional[Any] = None) -> None:
+        """接入一个工作进程的连接"""
+        handle = _WorkerHandle(index, conn, process)
+        self._workers[index] = handle
+        threading.Thread(target=self._read, args=(handle,), name=f"DispatchWorkerPool-{index}", daemon=True).start()
+
+    def get_adapter_name(self, source: IMAdapter) -> Optional[str]:
+        for name, adapter in self.im_manager.adapters.items():
+            if adapter is source:
+                return name
+        return None
+
+    def can_dispatch(self, source: IMAdapter) -> bool:
+        """只有 IMManager 管理的适配器可以在工作进程中通过代理访问"""
+        return self.get_adapter_name(source) is not None
+
+    async def dispatch(self, source: IMAdapter, message: IMMessage, key: str) -> None:
+        """把消息转发给负责该键的工作进程，等待处理完成"""
+        handle = self._workers[self.ring.get(key)]
+        if handle is None or not handle.alive:
+            raise RuntimeError(f"Dispatch worker for {key} is not available")
+        request_id = next(self._request_ids)
+        future = self.loop.create_future()
+        self._pending[request_id] = (handle.index, future)
+        try:
+            handle.channel.send(
+                "dispatch", request_id, self.get_adapter_name(source), describe_adapters(self.im_manager.adapters), message
+            )
+            error = await future
+        finally:
+            self._pending.pop(request_id, None)
+        if error:
+            logger.error(f"Dispatch worker {handle.index} failed to process message: {error}")
+
+    async def _invoke(self, handle: _WorkerHandle, call_id: int, adapter_name: str, method: str, args: Tuple[Any, ...]) -> None:
+        try:
+            adapter = self.im_manager.get_adapter(adapter_name)
+            value = await getattr(adapter, method)(*args)
+            error = None
+        except Exception as e:
+            logger.opt(exception=e).error(f"Remote call {adapter_name}.{method} failed: {e}")
+            value, error = None, str(e) or type(e).__name__
+        try:
+            handle.channel.send("result", call_id, error, value)
+        except Exception:
+            # 返回值无法序列化时只通知调用完成
+            handle.channel.send("result", call_id, error, None)
+
+    def _resolve(self, request_id: int, error: Optional[str]) -> None:
+        pending = self._pending.get(request_id)
+        if pending is not None and not pending[1].done():
+            pending[1].set_result(error)
+
+    def _read(self, handle: _WorkerHandle) -> None:
+        try:
+            while True:
+                try:
+                    payload = handle.channel.recv()
+                except (EOFError, OSError):
+                    break
+                kind = payload[0]
+                if kind == "ready":
+                    logger.info(f"Dispatch worker {handle.index} is ready")
+                elif kind == "done":
+                    self.loop.call_soon_threadsafe(self._resolve, payload[1], payload[2])
+                elif kind == "call":
+                    asyncio.run_coroutine_threadsafe(self._invoke(handle, *payload[1:]), self.loop)
+        finally:
+            handle.alive = False
+            logger.warning(f"Dispatch worker {handle.index} disconnected")
+            for request_id, (index, _) in list(self._pending.items()):
+                if index == handle.index:
+                    self.loop.call_soon_threadsafe(self._resolve, request_id, "Dispatch worker disconnected")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """通知工作进程退出，超时后强制结束"""
+        for handle in self._workers:
+            if handle is None:
+                continue
+            if handle.alive:
+                try:
+                    handle.channel.send("stop")
+                except Exception:
+                    pass
+            if handle.process is not None:
+                handle.process.join(timeout)
+                if handle.process.is_alive():
+                    handle.process.terminate()
@@ -1,16 +1,20 @@
 import asyncio
+import contextvars
 import functools
+import time
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from kirara_ai.events.event_bus import EventBus
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.ioc.inject import Inject
 from kirara_ai.logger import get_logger
+from kirara_ai.tracing.span import SPAN_BLOCK, SPAN_WORKFLOW, start_span
 from kirara_ai.workflow.core.block import Block, ConditionBlock, LoopBlock
 from kirara_ai.workflow.core.block.registry import BlockRegistry
 from kirara_ai.workflow.core.execution.exceptions import BlockExecutionFailedException
+from kirara_ai.workflow.core.execution.profiler import WorkflowProfiler
 from kirara_ai.workflow.core.workflow import Workflow
 
 
@@ -31,6 +35,9 @@ class WorkflowExecutor:
         self.event_bus = event_bus
         self.results: Dict[str, Any] = {}
         self.variables: Dict[str, Any] = {}  # 存储工作流变量
+        # 启用性能分析时记录每个块的执行统计
+        profiler = container.resolve(WorkflowProfiler) if container.has(WorkflowProfiler) else None
+        self.profiler: Optional[WorkflowProfiler] = profiler if profiler and profiler.enabled else None
         self.logger.info(
             f"Initializing WorkflowExecutor for workflow '{workflow.name}'"
         )
@@ -42,7 +49,15 @@ class WorkflowExecutor:
         self.execution_graph = defaultdict(list)
         # self.logger.debug("Building execution graph...")
 
+        # 同一模板的实例连线相同，类型检查只需进行一次
+        template = self.workflow.template or self.workflow
+        validate = not template.wires_validated
+
         for wire in self.workflow.wires:
+            if not validate:
+                self.execution_graph[wire.source_block].append(wire.target_block)
+                continue
+
             # self.logger.debug(f"Processing wire: {wire.source_block.name}.{wire.source_output} -> "
             #                  f"{wire.target_block.name}.{wire.target_input}")
 
@@ -67,6 +82,8 @@ class WorkflowExecutor:
             self.execution_graph[wire.source_block].append(wire.target_block)
             # self.logger.debug(f"Added edge: {wire.source_block.name} -> {wire.target_block.name}")
 
+        template.wires_validated = True
+
     async def run(self) -> Dict[str, Any]:
         """
         执行工作流，返回每个块的执行结果。
@@ -74,19 +91,38 @@ class WorkflowExecutor:
         :return: 包含每个块执行结果的字典，键为块名，值为块的输出
         """
         from kirara_ai.events import WorkflowExecutionBegin, WorkflowExecutionEnd
-        self.event_bus.post(WorkflowExecutionBegin(self.workflow, self))
-        self.logger.info("Starting workflow execution")
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            # 从入口节点开始执行
-            entry_blocks = [block for block in self.workflow.blocks if not block.inputs]
-            # self.logger.debug(f"Identified entry blocks: {[b.name for b in entry_blocks]}")
-            await self._execute_nodes(entry_blocks, executor, loop)
-
-        self.logger.info("Workflow execution completed")
-        self.event_bus.post(WorkflowExecutionEnd(self.workflow, self, self.results))
+        attributes = {"workflow.id": self.workflow.id, "workflow.name": self.workflow.name}
+        with start_span(f"workflow {self.workflow.id or self.workflow.name}", SPAN_WORKFLOW, attributes, self.event_bus):
+            self.event_bus.post(WorkflowExecutionBegin(self.workflow, self))
+            self.logger.info("Starting workflow execution")
+            loop = asyncio.get_event_loop()
+            with ThreadPoolExecutor() as executor:
+                # 从入口节点开始执行
+                entry_blocks = [block for block in self.workflow.blocks if not block.inputs]
+                # self.logger.debug(f"Identified entry blocks: {[b.name for b in entry_blocks]}")
+                await self._execute_nodes(entry_blocks, executor, loop)
+
+            self.logger.info("Workflow execution completed")
+            self.event_bus.post(WorkflowExecutionEnd(self.workflow, self, self.results))
         return self.results
 
+    async def _run_block(self, block: Block, executor, loop, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """在线程池中执行块并记录耗时，块内的 LLM / MCP 等调用作为其子 span"""
+        attributes = {"workflow.id": self.workflow.id, "block.name": block.name, "block.type": block.id}
+        with start_span(f"{self.workflow.id}:{block.name}", SPAN_BLOCK, attributes):
+            # run_in_executor 不会传递 contextvars，需要手动复制当前上下文
+            context = contextvars.copy_context()
+            if self.profiler is None:
+                func = functools.partial(context.run, block.execute, **inputs)
+            else:
+                func = functools.partial(
+                    context.run, self.profiler.call,
+                    self.workflow.id or self.workflow.name, block.name,
+                    self.registry.get_block_type_name(type(block)), time.perf_counter(),
+                    block.execute, inputs
+                )
+            return await loop.run_in_executor(executor, func)
+
     async def _execute_nodes(self, blocks: List[Block], executor, loop):
         """执行一组节点"""
         # self.logger.debug(f"Executing node group: {[b.name for b in blocks]}")
@@ -106,7 +142,7 @@ class WorkflowExecutor:
         inputs = self._gather_inputs(block)
         # self.logger.debug(f"ConditionBlock inputs: {list(inputs.keys())}")
 
-        result = await loop.run_in_executor(executor, block.execute, **inputs)
+        result = await self._run_block(block, executor, loop, inputs)
         self.results[block.name] = result
         self.logger.info(
             f"ConditionBlock {block.name} evaluation result: {result['condition_result']}"
@@ -134,7 +170,7 @@ class WorkflowExecutor:
             inputs = self._gather_inputs(block)
             # self.logger.debug(f"LoopBlock inputs: {list(inputs.keys())}")
 
-            result = await loop.run_in_executor(executor, block.execute, **inputs)
+            result = await self._run_block(block, executor, loop, inputs)
             self.results[block.name] = result
             self.logger.info(
                 f"LoopBlock {block.name} continuation check: {result['should_continue']}"
@@ -160,9 +196,7 @@ class WorkflowExecutor:
             self.logger.info(f"Executing Block: {block.name}")
             # self.logger.debug(f"Input parameters: {list(inputs.keys())}")
 
-            future = loop.run_in_executor(
-                executor, functools.partial(block.execute, **inputs)
-            )
+            future = self._run_block(block, executor, loop, inputs)
             futures.append((future, block))
         else:
             # self.logger.debug(f"Block {block.name} dependencies not met, skipping execution")
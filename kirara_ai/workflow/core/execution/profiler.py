@@ -0,0 +1,181 @@
+import itertools
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from kirara_ai.config.global_config import GlobalConfig
+from kirara_ai.ioc.container import DependencyContainer
+
+# 统计的指标：耗时 / 线程池排队等待 / CPU 时间（毫秒），内存分配（字节）
+METRICS = ("wall_ms", "queue_wait_ms", "cpu_ms", "alloc_bytes")
+
+
+class BlockStats:
+    """单个块的累计执行统计"""
+
+    def __init__(self, block_type: str):
+        self.block_type = block_type
+        self.count = 0
+        self.errors = 0
+        # 内存只在采样的执行中统计
+        self.memory_samples = 0
+        self.totals: Dict[str, float] = {metric: 0.0 for metric in METRICS}
+        self.maxima: Dict[str, float] = {metric: 0.0 for metric in METRICS}
+
+    def add(self, sample: Dict[str, float], failed: bool) -> None:
+        self.count += 1
+        if failed:
+            self.errors += 1
+        if "alloc_bytes" in sample:
+            self.memory_samples += 1
+        for metric, value in sample.items():
+            self.totals[metric] += value
+            self.maxima[metric] = max(self.maxima[metric], value)
+
+    def merge(self, other: "BlockStats") -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.memory_samples += other.memory_samples
+        for metric in METRICS:
+            self.totals[metric] += other.totals[metric]
+            self.maxima[metric] = max(self.maxima[metric], other.maxima[metric])
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"block_type": self.block_type, "count": self.count, "errors": self.errors}
+        for metric in METRICS:
+            samples = self.memory_samples if metric == "alloc_bytes" else self.count
+            result[metric] = {
+                "total": self.totals[metric],
+                "avg": self.totals[metric] / samples if samples else None,
+                "max": self.maxima[metric],
+            }
+        return result
+
+
+class WorkflowProfiler:
+    """
+    工作流的逐块性能分析器。
+    启用后 WorkflowExecutor 在块执行时记录耗时、线程池排队等待、CPU 时间，
+    并每隔 memory_sample_interval 次执行用 tracemalloc 统计一次内存分配；
+    tracemalloc 只在采样的块执行期间开启，避免常驻的追踪开销。
+    """
+
+    def __init__(self, container: DependencyContainer):
+        config = container.resolve(GlobalConfig).profiling
+        self.enabled = config.enabled
+        self.memory_sample_interval = config.memory_sample_interval
+        self._lock = threading.Lock()
+        # 工作流 ID -> 块名称 -> 统计
+        self._stats: Dict[str, Dict[str, BlockStats]] = {}
+        self._counter = itertools.count()
+        # 正在进行内存采样的块数量，归零时停止 tracemalloc
+        self._tracing = 0
+        self._started_tracemalloc = False
+
+    def _should_sample_memory(self) -> bool:
+        interval = self.memory_sample_interval
+        return interval > 0 and next(self._counter) % interval == 0
+
+    def _start_memory_trace(self) -> int:
+        with self._lock:
+            if self._tracing == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._tracing += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def _stop_memory_trace(self, before: int) -> int:
+        with self._lock:
+            allocated = max(tracemalloc.get_traced_memory()[0] - before, 0)
+            self._tracing -= 1
+            if self._tracing == 0 and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            return allocated
+
+    def call(
+        self,
+        workflow_id: str,
+        block_name: str,
+        block_type: str,
+        submitted_at: float,
+        func: Callable[..., Any],
+        inputs: Dict[str, Any],
+    ) -> Any:
+        """
+        在线程池中执行块并记录统计。submitted_at 为提交到线程池时的 time.perf_counter()。
+        并发执行的块之间的内存分配无法区分，alloc_bytes 为近似值。
+        """
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        memory_before = self._start_memory_trace() if self._should_sample_memory() else None
+        failed = True
+        try:
+            result = func(**inputs)
+            failed = False
+            return result
+        finally:
+            sample = {
+                "wall_ms": (time.perf_counter() - start) * 1000,
+                "queue_wait_ms": (start - submitted_at) * 1000,
+                "cpu_ms": (time.thread_time() - cpu_start) * 1000,
+            }
+            if memory_before is not None:
+                sample["alloc_bytes"] = self._stop_memory_trace(memory_before)
+            self.record(workflow_id, block_name, block_type, sample, failed)
+
+    def record(self, workflow_id: str, block_name: str, block_type: str, sample: Dict[str, float], failed: bool = False) -> None:
+        """记录一次块执行"""
+        with self._lock:
+            blocks = self._stats.setdefault(workflow_id, {})
+            stats = blocks.get(block_name)
+            if stats is None:
+                stats = blocks[block_name] = BlockStats(block_type)
+            stats.add(sample, failed)
+
+    def _snapshot(self, workflow_id: str) -> List[Tuple[str, BlockStats]]:
+        with self._lock:
+            return list(self._stats.get(workflow_id, {}).items())
+
+    def get_profile(self, workflow_id: str) -> Dict[str, Any]:
+        """获取工作流的统计，包括逐块统计和按块类型汇总的统计"""
+        blocks = self._snapshot(workflow_id)
+        by_type: Dict[str, BlockStats] = {}
+        for _, stats in blocks:
+            if stats.block_type not in by_type:
+                by_type[stats.block_type] = BlockStats(stats.block_type)
+            by_type[stats.block_type].merge(stats)
+
+        def sort_key(item: Dict[str, Any]) -> float:
+            return -item["wall_ms"]["total"]
+
+        return {
+            "workflow_id": workflow_id,
+            "enabled": self.enabled,
+            "blocks": sorted(({"name": name, **stats.to_dict()} for name, stats in blocks), key=sort_key),
+            "block_types": sorted((stats.to_dict() for stats in by_type.values()), key=sort_key),
+        }
+
+    def export_collapsed(self, workflow_id: str, metric: str = "wall_ms") -> str:
+        """
+        导出为 collapsed stack 格式（每行 "工作流;块类型;块名称 数值"），可直接交给 flamegraph.pl 或 speedscope。
+        时间指标以微秒为单位取整。
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Invalid metric: {metric}")
+        scale = 1 if metric == "alloc_bytes" else 1000
+        lines = []
+        for name, stats in self._snapshot(workflow_id):
+            value = int(stats.totals[metric] * scale)
+            if value > 0:
+                lines.append(f"{workflow_id};{stats.block_type};{name} {value}")
+        return "\n".join(lines)
+
+    def reset(self, workflow_id: Optional[str] = None) -> None:
+        """清空统计"""
+        with self._lock:
+            if workflow_id is None:
+                self._stats.clear()
+            else:
+                self._stats.pop(workflow_id, None)
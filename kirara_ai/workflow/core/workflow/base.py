@@ -1,5 +1,6 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.workflow.core.block import Block
 
 
@@ -9,6 +10,21 @@ class Workflow:
         self.blocks = blocks
         self.wires = wires
         self.id = id
+        # 从模板复制出的实例指向其模板
+        self.template: Optional["Workflow"] = None
+        # 连线的类型检查是否已通过，模板的所有实例共享检查结果
+        self.wires_validated = False
+
+    def instantiate(self, container: DependencyContainer) -> "Workflow":
+        """复制出一个绑定到指定容器的工作流实例，block 的执行状态与模板相互独立"""
+        copies: Dict[int, Block] = {id(block): block.instantiate(container) for block in self.blocks}
+        wires = [
+            Wire(copies[id(wire.source_block)], wire.source_output, copies[id(wire.target_block)], wire.target_input)
+            for wire in self.wires
+        ]
+        workflow = Workflow(name=self.name, blocks=list(copies.values()), wires=wires, id=self.id)
+        workflow.template = self.template or self
+        return workflow
 
 
 class Wire:
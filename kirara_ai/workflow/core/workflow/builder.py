@@ -1,4 +1,5 @@
 import importlib
+import os
 import random
 import string
 import warnings
@@ -182,6 +183,15 @@ class WorkflowBuilder:
         self.nodes: List[Node] = []  # 存储所有节点
         self.nodes_by_name: Dict[str, Node] = {}
         self.wire_specs: List[Tuple[str, str, str, str]] = []  # (source_name, source_output, target_name, target_input)
+        # 从 YAML 加载时记录文件路径和修改时间，文件变化后由注册表重新加载
+        self.source_path: Optional[str] = None
+        self.source_mtime: Optional[float] = None
+        # 已构建的工作流模板，每次执行从模板复制出独立的实例
+        self._template: Optional[Workflow] = None
+
+    def invalidate(self):
+        """工作流结构变化后丢弃已构建的模板"""
+        self._template = None
 
     def _generate_unique_name(self, base_name: str) -> str:
         """生成唯一的块名称"""
@@ -272,6 +282,7 @@ class WorkflowBuilder:
         # 存储匹配的连接
         for source_output, target_input in matches:
             self.wire_specs.append((source_name, source_output, target_name, target_input))
+        self.invalidate()
 
     def _create_node(self, spec: BlockSpec, is_parallel: bool = False) -> Node:
         """创建一个新的节点，但不实例化 Block"""
@@ -282,6 +293,7 @@ class WorkflowBuilder:
         node = Node(spec=spec, is_parallel=is_parallel)
         self.nodes.append(node)
         self.nodes_by_name[node.name] = node
+        self.invalidate()
 
         # 处理连接
         if spec.wire_from:
@@ -356,6 +368,7 @@ class WorkflowBuilder:
         node = Node(spec=spec, is_conditional=True)
         self.nodes.append(node)
         self.nodes_by_name[node.name] = node
+        self.invalidate()
 
         if self.current:
             self._store_wire_spec(self.current.name, "output", self.current, node)
@@ -400,6 +413,7 @@ class WorkflowBuilder:
         node = Node(spec=spec, is_loop=True)
         self.nodes.append(node)
         self.nodes_by_name[node.name] = node
+        self.invalidate()
 
         if self.current:
             self._store_wire_spec(self.current.name, "output", self.current, node)
@@ -424,6 +438,7 @@ class WorkflowBuilder:
         node = Node(spec=spec)
         self.nodes.append(node)
         self.nodes_by_name[node.name] = node
+        self.invalidate()
 
         if self.current:
             self._store_wire_spec(self.current.name, "output", self.current, node)
@@ -434,7 +449,17 @@ class WorkflowBuilder:
         return self
 
     def build(self, container: DependencyContainer) -> Workflow:
-        """构建工作流，在此阶段实例化所有 Block 并创建 Wire"""
+        """
+        构建工作流。Block 只在首次构建时实例化，之后从缓存的模板复制，
+        每个副本绑定到传入的容器，执行状态互不影响。
+        """
+        template = self._template
+        if template is None:
+            template = self._template = self._build_template()
+        return template.instantiate(container)
+
+    def _build_template(self) -> Workflow:
+        """实例化所有 Block 并创建 Wire"""
         blocks: List[Block] = []
         wires: List[Wire] = []
         name_to_block: Dict[str, Block] = {}
@@ -452,7 +477,6 @@ class WorkflowBuilder:
                 block = node.spec.block_class(**node.spec.kwargs)
                 if node.name:
                     block.name = node.name
-                block.container = container
                 blocks.append(block)
                 name_to_block[node.name] = block
                 name_to_node[node.name] = node
@@ -477,6 +501,7 @@ class WorkflowBuilder:
     ):
         """强制存储特定的连接规格"""
         self.wire_specs.append((source_name, source_output, target_name, target_input))
+        self.invalidate()
 
     def _find_parallel_nodes(self, start_node: Node) -> List[Node]:
         """查找所有并行节点"""
@@ -553,6 +578,8 @@ class WorkflowBuilder:
         # 保存到文件
         with open(file_path, "w", encoding="utf-8") as f:
             yaml.dump(workflow_data, f)
+        self.source_path = file_path
+        self.source_mtime = os.path.getmtime(file_path)
 
         return self
 
@@ -575,6 +602,8 @@ class WorkflowBuilder:
 
         builder: WorkflowBuilder = cls(workflow_data["name"])
         builder.description = workflow_data.get("description", "")
+        builder.source_path = file_path
+        builder.source_mtime = os.path.getmtime(file_path)
         registry: BlockRegistry = container.resolve(BlockRegistry)
 
         # 第一遍：创建所有块
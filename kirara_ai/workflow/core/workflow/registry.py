@@ -75,8 +75,31 @@ class WorkflowRegistry:
         self._workflows[full_name] = workflow_builder
         self.logger.info(f"Registered preset workflow: {full_name}")
     
-    def get_workflow(self, name: str, container: DependencyContainer) -> Optional[Workflow]:
+    def _get_builder(self, name: str) -> Optional[WorkflowBuilder]:
+        """获取工作流构建器，YAML 文件在外部被修改时重新加载"""
         builder = self._workflows.get(name)
+        if builder is None or builder.source_path is None:
+            return builder
+        try:
+            mtime = os.path.getmtime(builder.source_path)
+        except OSError:
+            return builder
+        if mtime == builder.source_mtime:
+            return builder
+        try:
+            reloaded = WorkflowBuilder.load_from_yaml(builder.source_path, self.container)
+        except Exception as e:
+            # 保留旧的构建器，文件再次修改时重试
+            builder.source_mtime = mtime
+            self.logger.error(f"Failed to reload workflow {name} from {builder.source_path}: {str(e)}")
+            return builder
+        reloaded.id = builder.id
+        self._workflows[name] = reloaded
+        self.logger.info(f"Reloaded workflow {name} from {builder.source_path}")
+        return reloaded
+
+    def get_workflow(self, name: str, container: DependencyContainer) -> Optional[Workflow]:
+        builder = self._get_builder(name)
         if builder:
             return builder.build(container)
         return None
@@ -85,7 +108,7 @@ class WorkflowRegistry:
         self, name: str, container: Optional[DependencyContainer] = None
     ) -> Optional[WorkflowBuilder | Workflow]:
         """获取工作流构建器或实例"""
-        builder = self._workflows.get(name)
+        builder = self._get_builder(name)
         if builder and container:
             return builder.build(container)
         return builder
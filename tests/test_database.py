@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import Column, Integer, String, text
+
+from kirara_ai.config.global_config import DatabaseConfig, GlobalConfig
+from kirara_ai.database import Base, DatabaseManager
+from kirara_ai.ioc.container import DependencyContainer
+
+
+class ConcurrencyRecord(Base):
+    """用于测试并发写入的记录"""
+    __tablename__ = "test_concurrency_records"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(32))
+
+
+class TestDatabaseManager(unittest.TestCase):
+    """数据库管理器测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.container = DependencyContainer()
+        self.container.register(GlobalConfig, GlobalConfig())
+        self.db_manager = DatabaseManager(
+            self.container, database_url=f"sqlite:///{os.path.join(self.temp_dir, 'test.db')}"
+        )
+        self.db_manager.initialize()
+        Base.metadata.create_all(self.db_manager.engine)
+
+    def tearDown(self):
+        self.db_manager.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_sqlite_pragmas(self):
+        """测试 SQLite 连接的性能设置"""
+        for readonly in (False, True):
+            with self.db_manager.get_session(readonly=readonly) as session:
+                self.assertEqual(session.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                # NORMAL = 1
+                self.assertEqual(session.execute(text("PRAGMA synchronous")).scalar(), 1)
+                self.assertEqual(session.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+
+    def test_separate_read_pool(self):
+        """测试只读会话使用独立的连接池"""
+        self.assertIsNot(self.db_manager.read_engine, self.db_manager.engine)
+        with self.db_manager.get_session() as session:
+            session.add(ConcurrencyRecord(name="a"))
+            session.commit()
+        with self.db_manager.get_session(readonly=True) as session:
+            self.assertEqual(session.query(ConcurrencyRecord).count(), 1)
+
+    def test_concurrent_writes_and_reads(self):
+        """测试多线程并发读写不会出现锁冲突"""
+        errors = []
+
+        def write(n: int):
+            try:
+                for i in range(20):
+                    with self.db_manager.get_session() as session:
+                        session.add(ConcurrencyRecord(name=f"{n}-{i}"))
+                        session.commit()
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(20):
+                    with self.db_manager.get_session(readonly=True) as session:
+                        session.query(ConcurrencyRecord).count()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        threads += [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with self.db_manager.get_session(readonly=True) as session:
+            self.assertEqual(session.query(ConcurrencyRecord).count(), 80)
+
+    def test_async_engine_requires_config(self):
+        """测试未启用异步引擎时获取异步会话会报错"""
+        with self.assertRaises(RuntimeError):
+            self.db_manager.get_async_session()
+
+    def test_config_from_container(self):
+        """测试从全局配置读取数据库配置"""
+        config = GlobalConfig(database=DatabaseConfig(synchronous="FULL"))
+        container = DependencyContainer()
+        container.register(GlobalConfig, config)
+        self.assertEqual(DatabaseManager(container).config.synchronous, "FULL")
@@ -0,0 +1,175 @@
+import re
+
+import pytest
+
+from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.sender import ChatSender
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.workflow.core.dispatch import CombinedDispatchRule, DispatchRuleRegistry
+from kirara_ai.workflow.core.dispatch.index import AhoCorasick, PrefixTrie, required_literal
+from kirara_ai.workflow.core.dispatch.models.dispatch_rules import RuleGroup, SimpleDispatchRule
+from kirara_ai.workflow.core.workflow import WorkflowRegistry
+
+
+def make_rule(rule_id: str, prefix: str, priority: int = 5) -> CombinedDispatchRule:
+    return CombinedDispatchRule(
+        rule_id=rule_id,
+        name=rule_id,
+        workflow_id="test:workflow",
+        priority=priority,
+        rule_groups=[RuleGroup(operator="or", rules=[SimpleDispatchRule(type="prefix", config={"prefix": prefix})])],
+    )
+
+
+def make_message(text: str, user_id: str = "user1") -> IMMessage:
+    return IMMessage(sender=ChatSender.from_c2c_chat(user_id, "user"), message_elements=[TextMessage(text)])
+
+
+@pytest.fixture
+def container():
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(WorkflowRegistry, WorkflowRegistry(container))
+    return container
+
+
+@pytest.fixture
+def registry(container):
+    registry = DispatchRuleRegistry(container)
+    registry.register(make_rule("low", "/", priority=1))
+    registry.register(make_rule("high", "/help", priority=10))
+    return registry
+
+
+def test_matcher_priority_order(registry, container):
+    """测试匹配器按优先级选择规则"""
+    matcher = registry.get_matcher()
+    assert [rule.rule_id for rule in registry.get_active_rules()] == ["high", "low"]
+    assert matcher.match(make_message("/help me"), container).rule_id == "high"
+    assert matcher.match(make_message("/other"), container).rule_id == "low"
+    assert matcher.match(make_message("hello"), container) is None
+
+
+def test_matcher_reused_until_changed(registry, container):
+    """测试规则实例只编译一次，规则变化后匹配器重新构建"""
+    matcher = registry.get_matcher()
+    assert registry.get_matcher() is matcher
+    compiled = registry.get_rule("high").compile(registry.workflow_registry)
+    assert compiled is matcher.rules[0]
+
+    registry.disable_rule("high")
+    matcher = registry.get_matcher()
+    assert [compiled.rule.rule_id for compiled in matcher.rules] == ["low"]
+    assert matcher.match(make_message("/help me"), container).rule_id == "low"
+
+    registry.enable_rule("high")
+    assert registry.get_matcher().match(make_message("/help me"), container).rule_id == "high"
+
+    # 更新规则后重新编译
+    registry.update_rule("high", make_rule("high", "/other", priority=10))
+    matcher = registry.get_matcher()
+    assert matcher.match(make_message("/help me"), container).rule_id == "low"
+    assert matcher.match(make_message("/other"), container).rule_id == "high"
+
+    registry.delete_rule("low")
+    assert registry.get_matcher().match(make_message("/help me"), container) is None
+
+
+def test_pattern_index():
+    """测试前缀树、Aho-Corasick 自动机和正则字面量提取"""
+    trie: PrefixTrie[str] = PrefixTrie()
+    for prefix in ["/", "/help", "/hello", "#"]:
+        trie.add(prefix, prefix)
+    assert sorted(trie.iter_matches("/help me")) == ["/", "/help"]
+    assert list(trie.iter_matches("hello")) == []
+
+    automaton: AhoCorasick[str] = AhoCorasick()
+    for keyword in ["he", "she", "his", "hers"]:
+        automaton.add(keyword, keyword)
+    assert sorted(automaton.iter_matches("ushers")) == ["he", "hers", "she"]
+
+    assert required_literal(re.compile(r"^(?:run|exec)\s+task12\b")) == "task12"
+    assert required_literal(re.compile(r"^画\d+张")) == "画"
+    assert required_literal(re.compile(r"foo|bar")) is None
+    assert required_literal(re.compile(r"(?i)hello")) is None
+
+
+def test_indexed_matching(registry, container):
+    """测试索引预筛选后仍然保持规则的原有语义和优先级"""
+    registry.register(CombinedDispatchRule(
+        rule_id="keyword_sender",
+        name="keyword_sender",
+        workflow_id="test:workflow",
+        priority=20,
+        rule_groups=[
+            RuleGroup(operator="or", rules=[
+                SimpleDispatchRule(type="keyword", config={"keywords": ["天气", "weather"]}),
+                SimpleDispatchRule(type="regex", config={"pattern": r"温度\d+"}),
+            ]),
+            RuleGroup(operator="and", rules=[SimpleDispatchRule(type="sender", config={"sender_id": "vip"})]),
+        ],
+    ))
+    registry.register(CombinedDispatchRule(
+        rule_id="sender_only",
+        name="sender_only",
+        workflow_id="test:workflow",
+        priority=3,
+        rule_groups=[RuleGroup(operator="or", rules=[SimpleDispatchRule(type="sender", config={"sender_id": "boss"})])],
+    ))
+    matcher = registry.get_matcher()
+
+    assert matcher.match(make_message("今天天气如何", "vip"), container).rule_id == "keyword_sender"
+    assert matcher.match(make_message("/weather", "vip"), container).rule_id == "keyword_sender"
+    assert matcher.match(make_message("温度25", "vip"), container).rule_id == "keyword_sender"
+    assert matcher.match(make_message("温度", "vip"), container) is None
+    assert matcher.match(make_message("/weather", "user1"), container).rule_id == "low"
+    # 无法预筛选的规则总是作为候选，并按优先级参与匹配
+    assert matcher.match(make_message("hello", "boss"), container).rule_id == "sender_only"
+    assert matcher.match(make_message("/help", "boss"), container).rule_id == "high"
+
+
+def test_sender_static_cache(registry, container):
+    """测试发送者相关条件按发送者缓存，且与逐条计算的结果一致"""
+    registry.register(CombinedDispatchRule(
+        rule_id="group_keyword",
+        name="group_keyword",
+        workflow_id="test:workflow",
+        priority=20,
+        rule_groups=[
+            RuleGroup(operator="and", rules=[
+                SimpleDispatchRule(type="chat_type", config={"chat_type": "群聊"}),
+                SimpleDispatchRule(type="keyword", config={"keywords": ["天气"]}),
+            ]),
+            RuleGroup(operator="or", rules=[
+                SimpleDispatchRule(type="sender_mismatch", config={"sender_id": "blocked"}),
+                SimpleDispatchRule(type="keyword", config={"keywords": ["紧急"]}),
+            ]),
+        ],
+    ))
+    matcher = registry.get_matcher()
+
+    def group_message(text: str, user_id: str) -> IMMessage:
+        return IMMessage(sender=ChatSender.from_group_chat(user_id, "g1", "user"), message_elements=[TextMessage(text)])
+
+    cases = [
+        (group_message("今天天气", "user1"), "group_keyword"),
+        (group_message("今天天气", "user1"), "group_keyword"),
+        (group_message("/help", "user1"), "high"),
+        (group_message("今天天气", "blocked"), None),
+        (group_message("紧急 天气", "blocked"), "group_keyword"),
+        (make_message("今天天气", "user1"), None),
+    ]
+    for message, expected in cases:
+        result = matcher.match(message, container)
+        assert (result.rule_id if result else None) == expected
+        # 不使用缓存逐条计算的结果相同
+        uncached = next((c.rule for c in matcher.rules if c.match(message, container)), None)
+        assert uncached is result
+    assert matcher.cache_misses == 3
+    assert matcher.cache_hits == 3
+
+    # 规则变化后重新构建匹配器，缓存随之失效；没有发送者规则时不使用缓存
+    registry.disable_rule("group_keyword")
+    matcher = registry.get_matcher()
+    assert matcher.match(group_message("今天天气", "user1"), container) is None
+    assert matcher.cache_hits == matcher.cache_misses == 0
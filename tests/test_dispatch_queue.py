@@ -0,0 +1,95 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from kirara_ai.config.global_config import DispatchConfig
+from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.sender import ChatSender
+from kirara_ai.workflow.core.dispatch.queue import DispatchQueue
+
+
+def make_message(text: str, user_id: str = "user1") -> IMMessage:
+    return IMMessage(sender=ChatSender.from_group_chat(user_id, "group1", user_id), message_elements=[TextMessage(text)])
+
+
+class RecordingHandler:
+    """记录处理过的消息和最大并发数"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.handled: List[str] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, message: IMMessage) -> str:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            self.handled.append(message.content)
+            return message.content
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_serialize_per_sender():
+    """测试同一发送者的消息依次处理，不同发送者并发处理"""
+    queue = DispatchQueue(DispatchConfig(queue_policy="serialize"))
+    handler = RecordingHandler()
+    results = await asyncio.gather(*(queue.submit(make_message(str(i)), handler) for i in range(4)))
+    assert results == ["0", "1", "2", "3"]
+    assert handler.handled == ["0", "1", "2", "3"]
+    assert handler.max_running == 1
+
+    handler = RecordingHandler()
+    await asyncio.gather(*(queue.submit(make_message("hi", f"user{i}"), handler) for i in range(4)))
+    assert handler.max_running == 4
+    assert queue._states == {}
+
+
+@pytest.mark.asyncio
+async def test_group_scope_and_max_concurrency():
+    """测试按群排队和全局并发上限"""
+    queue = DispatchQueue(DispatchConfig(queue_policy="serialize", queue_scope="group"))
+    handler = RecordingHandler()
+    await asyncio.gather(*(queue.submit(make_message("hi", f"user{i}"), handler) for i in range(3)))
+    assert handler.max_running == 1
+
+    queue = DispatchQueue(DispatchConfig(queue_policy="none", max_concurrency=2))
+    handler = RecordingHandler()
+    await asyncio.gather(*(queue.submit(make_message("hi"), handler) for _ in range(5)))
+    assert handler.max_running == 2
+    assert len(handler.handled) == 5
+
+
+@pytest.mark.asyncio
+async def test_debounce_merges_messages():
+    """测试防抖窗口内的连续消息合并为一条处理"""
+    queue = DispatchQueue(DispatchConfig(queue_policy="debounce", debounce_ms=30))
+    handler = RecordingHandler()
+
+    async def send(text: str, delay: float):
+        await asyncio.sleep(delay)
+        return await queue.submit(make_message(text), handler)
+
+    results = await asyncio.gather(send("a", 0), send("b", 0.005), send("c", 0.01), send("other", 0.2))
+    assert results == [None, None, "a\nb\nc", "other"]
+    assert handler.handled == ["a\nb\nc", "other"]
+    assert queue.merged == 2
+
+
+@pytest.mark.asyncio
+async def test_drop_while_busy():
+    """测试处理中丢弃同一发送者的新消息"""
+    queue = DispatchQueue(DispatchConfig(queue_policy="drop"))
+    handler = RecordingHandler(delay=0.05)
+    results = await asyncio.gather(
+        queue.submit(make_message("first"), handler),
+        queue.submit(make_message("second"), handler),
+        queue.submit(make_message("other", "user2"), handler),
+    )
+    assert results == ["first", None, "other"]
+    assert queue.dropped == 1
+    assert await queue.submit(make_message("third"), handler) == "third"
@@ -0,0 +1,149 @@
+import asyncio
+import multiprocessing
+import pickle
+import threading
+from collections import Counter
+
+import pytest
+
+from kirara_ai.config.global_config import GlobalConfig
+from kirara_ai.events.event_bus import EventBus
+from kirara_ai.im.adapter import EditStateAdapter, IMAdapter, UserProfileAdapter
+from kirara_ai.im.im_registry import IMRegistry
+from kirara_ai.im.manager import IMManager
+from kirara_ai.im.message import IMMessage, MentionElement, TextMessage
+from kirara_ai.im.sender import ChatSender
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.workflow.core.dispatch import WorkflowDispatcher
+from kirara_ai.workflow.core.dispatch.workers import (ConsistentHashRing, DispatchWorker, DispatchWorkerPool,
+                                                      RemoteCallError)
+
+
+class FakeAdapter(IMAdapter):
+    def __init__(self):
+        self.sent = []
+        self.editing = []
+
+    async def convert_to_message(self, raw_message):
+        raise NotImplementedError
+
+    async def send_message(self, message, recipient):
+        self.sent.append((message.content, recipient.user_id))
+        return "ok"
+
+    async def set_chat_editing_state(self, chat_sender, is_editing=True):
+        if chat_sender.user_id == "broken":
+            raise ValueError("cannot edit")
+        self.editing.append(is_editing)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class EchoDispatcher:
+    """替代工作进程中的 WorkflowDispatcher，通过代理适配器回复消息"""
+
+    def __init__(self):
+        self.sources = []
+
+    async def dispatch(self, source, message):
+        self.sources.append(source)
+        try:
+            await source.set_chat_editing_state(message.sender)
+        except RemoteCallError:
+            return
+        result = await source.send_message(IMMessage(sender=message.sender, message_elements=[TextMessage("pong")]), message.sender)
+        assert result == "ok"
+
+
+def make_container(loop) -> DependencyContainer:
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(asyncio.AbstractEventLoop, loop)
+    container.register(GlobalConfig, GlobalConfig())
+    container.register(EventBus, EventBus())
+    container.register(IMRegistry, IMRegistry())
+    container.register(IMManager, IMManager(container))
+    return container
+
+
+def test_consistent_hash_ring():
+    """测试一致性哈希的分布和节点变化时的键迁移比例"""
+    keys = [f"c2c:{i}" for i in range(4000)]
+    ring = ConsistentHashRing(range(4))
+    assignment = {key: ring.get(key) for key in keys}
+    counts = Counter(assignment.values())
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > len(keys) / 4 * 0.6
+
+    # 同一个键总是路由到同一节点
+    assert all(ConsistentHashRing(range(4)).get(key) == node for key, node in assignment.items())
+
+    # 增加一个节点时只有约 1/5 的键迁移，且都迁移到新节点
+    grown = ConsistentHashRing(range(5))
+    moved = [key for key in keys if grown.get(key) != assignment[key]]
+    assert len(moved) < len(keys) * 0.35
+    assert all(grown.get(key) == 4 for key in moved)
+
+
+def test_message_pickle():
+    """测试消息可以序列化后发送给其他进程"""
+    sender = ChatSender.from_group_chat("u1", "g1", "Alice")
+    message = IMMessage(
+        sender=sender,
+        message_elements=[TextMessage("hello"), MentionElement(ChatSender.from_c2c_chat("u2", "Bob"))],
+        raw_message={"id": 1},
+    )
+    restored = pickle.loads(pickle.dumps(message))
+    assert restored.content == message.content
+    assert restored.sender == sender
+    assert restored.raw_message == {"id": 1}
+
+
+@pytest.mark.asyncio
+async def test_worker_round_trip():
+    """测试消息转发给工作进程，工作进程通过代理适配器调用前台适配器"""
+    front = make_container(asyncio.get_running_loop())
+    adapter = FakeAdapter()
+    front.resolve(IMManager).adapters["fake"] = adapter
+
+    worker_loop = asyncio.new_event_loop()
+    worker_container = make_container(worker_loop)
+    dispatcher = EchoDispatcher()
+    worker_container.register(WorkflowDispatcher, dispatcher)
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    worker = DispatchWorker(worker_container, child_conn)
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+
+    pool = DispatchWorkerPool(front, 1)
+    pool.attach(0, parent_conn)
+    assert pool.can_dispatch(adapter)
+    assert not pool.can_dispatch(FakeAdapter())
+
+    sender = ChatSender.from_c2c_chat("u1", "Alice")
+    # 原始消息无法序列化时丢弃后发送
+    message = IMMessage(sender=sender, message_elements=[TextMessage("ping")], raw_message=threading.Lock())
+    await asyncio.wait_for(pool.dispatch(adapter, message, "c2c:u1"), 5)
+    assert adapter.sent == [("pong", "u1")]
+    assert adapter.editing == [True]
+
+    source = dispatcher.sources[0]
+    assert type(source).__name__ == "FakeAdapter"
+    assert isinstance(source, EditStateAdapter)
+    assert not isinstance(source, UserProfileAdapter)
+    assert worker_container.resolve(IMManager).get_adapter("fake") is source
+
+    # 前台调用失败时异常传回工作进程
+    broken = IMMessage(sender=ChatSender.from_c2c_chat("broken", "Bob"), message_elements=[TextMessage("ping")])
+    await asyncio.wait_for(pool.dispatch(adapter, broken, "c2c:broken"), 5)
+    assert adapter.sent == [("pong", "u1")]
+
+    pool.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    worker_loop.close()
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from kirara_ai.events.event_bus import EventBus
+
+
+class Ping:
+    def __init__(self, value: int = 0):
+        self.value = value
+
+
+class Pong:
+    pass
+
+
+def test_register_during_post():
+    """测试监听器在投递过程中注册 / 注销不影响本次投递"""
+    bus = EventBus()
+    calls = []
+
+    def second(event):
+        calls.append("second")
+
+    def first(event):
+        calls.append("first")
+        bus.unregister(Ping, first)
+        bus.register(Ping, second)
+
+    bus.register(Ping, first)
+    bus.post(Ping())
+    assert calls == ["first"]
+    bus.post(Ping())
+    assert calls == ["first", "second"]
+
+    bus.unregister(Ping, second)
+    assert Ping not in bus._listeners
+    # 注销不存在的监听器不报错
+    bus.unregister(Ping, second)
+
+
+def test_concurrent_register_and_post():
+    """测试多线程同时注册和发布事件"""
+    bus = EventBus()
+    received = []
+    lock = threading.Lock()
+
+    def make_listener(i):
+        def listener(event):
+            with lock:
+                received.append(i)
+        return listener
+
+    def register_many(offset):
+        for i in range(200):
+            bus.register(Ping, make_listener(offset + i))
+
+    def post_many():
+        for _ in range(200):
+            bus.post(Ping())
+
+    threads = [threading.Thread(target=register_many, args=(n * 1000,)) for n in range(4)]
+    threads += [threading.Thread(target=post_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(bus._listeners[Ping]) == 800
+
+
+@pytest.mark.asyncio
+async def test_async_listener():
+    """测试 async 监听器被调度到事件循环，包括从其他线程发布"""
+    loop = asyncio.get_running_loop()
+    bus = EventBus(loop=loop)
+    received = []
+    done = asyncio.Event()
+
+    async def listener(event: Ping):
+        await asyncio.sleep(0)
+        received.append((event.value, threading.current_thread() is threading.main_thread()))
+        if len(received) == 2:
+            done.set()
+
+    bus.register(Ping, listener)
+    bus.post(Ping(1))
+    await loop.run_in_executor(None, bus.post, Ping(2))
+    await asyncio.wait_for(done.wait(), 1)
+    assert sorted(received) == [(1, True), (2, True)]
+
+
+def test_background_delivery():
+    """测试后台投递不阻塞发布者，同一队列的事件保持顺序"""
+    bus = EventBus()
+    received = []
+
+    def slow(event):
+        time.sleep(0.05)
+        received.append(type(event).__name__)
+
+    bus.register(Ping, slow)
+    bus.register(Pong, slow)
+    bus.enable_background(Ping, "test")
+    bus.enable_background(Pong, "test")
+
+    start = time.monotonic()
+    bus.post(Ping())
+    bus.post(Pong())
+    bus.post(Ping())
+    assert time.monotonic() - start < 0.05
+
+    assert bus.flush(timeout=2)
+    assert received == ["Ping", "Pong", "Ping"]
+    bus.shutdown()
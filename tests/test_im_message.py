@@ -0,0 +1,49 @@
+import copy
+import pickle
+
+from kirara_ai.im.message import IMMessage, MentionElement, TextMessage
+from kirara_ai.im.sender import ChatSender
+
+
+def make_message(*texts: str) -> IMMessage:
+    return IMMessage(sender=ChatSender.from_c2c_chat("u1", "Alice"), message_elements=[TextMessage(t) for t in texts])
+
+
+def test_content_cached_until_elements_change():
+    """测试派生属性缓存在元素列表被修改或替换后失效"""
+    message = make_message("hello")
+    assert message.content == "hello"
+    assert message.content is message.content
+    assert message.images is message.images
+
+    message.message_elements.append(MentionElement(ChatSender.from_c2c_chat("bot", "Bot")))
+    assert message.content == "hello\n@Bot"
+
+    message.message_elements[0] = TextMessage("bye")
+    del message.message_elements[1:]
+    assert message.content == "bye"
+
+    message.message_elements += [TextMessage("again")]
+    assert message.content == "bye\nagain"
+
+    message.message_elements = [TextMessage("new")]
+    assert message.content == "new"
+    message.message_elements.clear()
+    assert message.content == ""
+
+
+def test_copy_and_pickle_keep_invalidation():
+    """测试复制和反序列化后的消息仍然能在修改时失效缓存"""
+    message = make_message("hello")
+    assert message.content == "hello"
+    for restored in (copy.copy(message), copy.deepcopy(message), pickle.loads(pickle.dumps(message))):
+        assert restored.content == "hello"
+        restored.message_elements.append(TextMessage("world"))
+        assert restored.content == "hello\nworld"
+    assert message.content == "hello"
+
+
+def test_element_slots():
+    """测试轻量消息元素不创建实例字典"""
+    assert not hasattr(TextMessage("a"), "__dict__")
+    assert not hasattr(MentionElement(ChatSender.get_bot_sender()), "__dict__")
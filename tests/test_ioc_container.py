@@ -0,0 +1,71 @@
+import pytest
+
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.ioc.inject import Inject
+
+
+class ServiceA:
+    pass
+
+
+class ServiceB:
+    pass
+
+
+def test_scoped_cache_invalidation():
+    """测试作用域容器缓存的解析结果在祖先容器变化后失效"""
+    container = DependencyContainer()
+    first = ServiceA()
+    container.register(ServiceA, first)
+
+    with container.scoped() as scoped:
+        with scoped.scoped() as nested:
+            assert nested.resolve(ServiceA) is first
+
+            second = ServiceA()
+            container.register(ServiceA, second)
+            assert nested.resolve(ServiceA) is second
+
+            # 中间作用域覆盖后优先使用中间作用域的对象
+            third = ServiceA()
+            scoped.register(ServiceA, third)
+            assert nested.resolve(ServiceA) is third
+
+            scoped.destroy(ServiceA)
+            assert nested.resolve(ServiceA) is second
+
+            container.destroy(ServiceA)
+            assert not nested.has(ServiceA)
+            with pytest.raises(KeyError):
+                nested.resolve(ServiceA)
+
+            # 当前作用域自身注册后立即可见
+            nested.register(ServiceB, None)
+            assert nested.has(ServiceB)
+            assert nested.resolve(ServiceB) is None
+
+
+def test_inject_function():
+    """测试注入函数的各种调用方式"""
+    container = DependencyContainer()
+    a, b = ServiceA(), ServiceB()
+    container.register(ServiceA, a)
+    container.register(ServiceB, b)
+
+    @Inject(container)
+    def simple(x, service_a: ServiceA, *, service_b: ServiceB, y=1):
+        return x, service_a, service_b, y
+
+    assert simple(0) == (0, a, b, 1)
+    assert simple(0, y=2) == (0, a, b, 2)
+    other = ServiceB()
+    assert simple(0, service_b=other) == (0, a, other, 1)
+
+    @Inject(container)
+    def variadic(service_a: ServiceA, *args, **kwargs):
+        return service_a, args, kwargs
+
+    assert variadic(None, 1, 2, z=3) == (a, (1, 2), {"z": 3})
+
+    with pytest.raises(TypeError):
+        simple(0, 1, 2)
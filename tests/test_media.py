@@ -2,6 +2,7 @@ import asyncio
 import os
 import shutil
 import tempfile
+import time
 import unittest
 from pathlib import Path
 
@@ -74,6 +75,7 @@ class TestMediaManager(unittest.TestCase):
 
     def tearDown(self):
         """测试后清理"""
+        self.media_manager.shutdown()
         # 删除临时目录
         shutil.rmtree(self.temp_dir)
 
@@ -237,6 +239,73 @@ class TestMediaManager(unittest.TestCase):
         # 验证媒体是否被删除
         self.assertIsNone(self.media_manager.get_metadata(media_id))
 
+    def test_gc_reference_index(self):
+        """测试引用计数索引随引用变化更新"""
+        gc = self.media_manager.gc
+        media_id = asyncio.run(self.media_manager.register_from_path(self.test_image_path))
+        self.assertEqual(gc.get_ref_count(media_id), 0)
+        self.assertIn(media_id, gc.get_unreferenced())
+
+        self.media_manager.add_reference(media_id, "ref1")
+        self.assertEqual(gc.get_ref_count(media_id), 1)
+        self.assertNotIn(media_id, gc.get_unreferenced())
+
+        size = gc.total_size
+        self.assertGreater(size, 0)
+        self.media_manager.delete_media(media_id)
+        self.assertEqual(gc.get_ref_count(media_id), 0)
+        self.assertEqual(gc.total_size, 0)
+
+    def test_gc_collect(self):
+        """测试后台回收只删除超过保留时长的无引用媒体"""
+        from kirara_ai.config.global_config import MediaConfig
+
+        gc = self.media_manager.gc
+        gc.configure(MediaConfig(gc_min_unreferenced_age=60, gc_batch_size=1, gc_batch_interval=0))
+        old_id = asyncio.run(self.media_manager.register_from_path(self.format_files["png"]))
+        new_id = asyncio.run(self.media_manager.register_from_path(self.format_files["gif"]))
+        referenced_id = asyncio.run(self.media_manager.register_from_path(self.format_files["webp"], reference_id="ref"))
+        gc._last_access[old_id] -= 120
+        gc._last_access[referenced_id] -= 120
+
+        self.assertEqual(asyncio.run(gc.collect()), 1)
+        self.assertIsNone(self.media_manager.get_metadata(old_id))
+        self.assertIsNotNone(self.media_manager.get_metadata(new_id))
+        self.assertIsNotNone(self.media_manager.get_metadata(referenced_id))
+
+    def test_gc_disk_quota(self):
+        """测试超出磁盘配额时按最近最少使用顺序淘汰无引用媒体"""
+        from kirara_ai.config.global_config import MediaConfig
+
+        gc = self.media_manager.gc
+        ids = []
+        for format_name in ["jpeg", "png", "gif", "webp"]:
+            ids.append(asyncio.run(self.media_manager.register_from_path(self.format_files[format_name])))
+        referenced_id = asyncio.run(self.media_manager.register_from_path(self.format_files["pdf"], reference_id="ref"))
+        now = time.time()
+        for i, media_id in enumerate(ids + [referenced_id]):
+            gc._last_access[media_id] = now - 100 + i
+        # 最早注册的图片最近被访问过
+        asyncio.run(self.media_manager.get_data(ids[0]))
+
+        # 配额只够保留一部分，应淘汰最久未访问的无引用媒体
+        quota_bytes = gc.total_size - self.media_manager.get_metadata(ids[1]).size
+        gc.configure(MediaConfig(gc_min_unreferenced_age=3600, gc_batch_interval=0))
+        gc.config.disk_quota_mb = quota_bytes / (1024 * 1024)
+
+        self.assertEqual(asyncio.run(gc.collect()), 1)
+        self.assertIsNone(self.media_manager.get_metadata(ids[1]))
+        for media_id in [ids[0], ids[2], ids[3], referenced_id]:
+            self.assertIsNotNone(self.media_manager.get_metadata(media_id))
+
+    def test_cleanup_unreferenced(self):
+        """测试立即清理所有无引用媒体"""
+        unreferenced_id = asyncio.run(self.media_manager.register_from_path(self.test_image_path))
+        referenced_id = asyncio.run(self.media_manager.register_from_path(self.test_audio_path, reference_id="ref"))
+        self.assertEqual(self.media_manager.cleanup_unreferenced(), 1)
+        self.assertIsNone(self.media_manager.get_metadata(unreferenced_id))
+        self.assertIsNotNone(self.media_manager.get_metadata(referenced_id))
+
     def test_search(self):
         """测试搜索功能"""
         # 注册多个媒体
@@ -278,6 +347,102 @@ class TestMediaManager(unittest.TestCase):
         results = self.media_manager.search_by_type(MediaType.AUDIO)
         self.assertEqual(results, [media_id2])
 
+    def test_concurrent_url_registration_is_coalesced(self):
+        """测试相同 URL 的并发注册只下载一次"""
+        with open(self.test_image_path, "rb") as f:
+            image_data = f.read()
+        download_count = 0
+
+        async def fake_download(url):
+            nonlocal download_count
+            download_count += 1
+            await asyncio.sleep(0.05)
+            return image_data
+
+        self.media_manager._download_file_async = fake_download
+        url = "https://example.com/sticker.jpg"
+
+        async def register_concurrently():
+            return await asyncio.gather(*[
+                self.media_manager.register_from_url(url, reference_id=f"ref_{i}")
+                for i in range(5)
+            ])
+
+        media_ids = asyncio.run(register_concurrently())
+        self.assertEqual(len(set(media_ids)), 1)
+        self.assertEqual(download_count, 1)
+
+        # 短时间内重复出现的 URL 不再下载
+        media_id = asyncio.run(self.media_manager.register_from_url(url))
+        self.assertEqual(media_id, media_ids[0])
+        self.assertEqual(download_count, 1)
+
+        # 媒体被删除后映射失效，需要重新下载
+        self.media_manager.delete_media(media_id)
+        asyncio.run(self.media_manager.register_from_url(url))
+        self.assertEqual(download_count, 2)
+
+    def test_concurrent_ensure_file_exists_is_coalesced(self):
+        """测试相同媒体的并发文件补全只下载一次"""
+        with open(self.test_image_path, "rb") as f:
+            image_data = f.read()
+        download_count = 0
+
+        async def fake_download(url):
+            nonlocal download_count
+            download_count += 1
+            await asyncio.sleep(0.05)
+            return image_data
+
+        self.media_manager._download_file_async = fake_download
+        media_id = asyncio.run(self.media_manager.register_from_url("https://example.com/a.jpg"))
+        file_path = asyncio.run(self.media_manager.ensure_file_exists(media_id))
+        file_path.unlink()
+
+        async def ensure_concurrently():
+            return await asyncio.gather(*[
+                self.media_manager.ensure_file_exists(media_id) for _ in range(5)
+            ])
+
+        paths = asyncio.run(ensure_concurrently())
+        self.assertEqual(set(paths), {file_path})
+        self.assertTrue(file_path.exists())
+        self.assertEqual(download_count, 2)
+
+    def test_thumbnail_cache(self):
+        """测试缩略图缓存"""
+        from PIL import Image
+
+        image_path = os.path.join(self.temp_dir, "large.png")
+        Image.new("RGB", (1200, 600), color="red").save(image_path)
+        media_id = asyncio.run(self.media_manager.register_from_path(image_path, reference_id="thumb_ref"))
+
+        # 获取缩略图，应生成 webp 文件
+        thumbnail_path = asyncio.run(self.media_manager.get_thumbnail_path(media_id))
+        self.assertIsNotNone(thumbnail_path)
+        self.assertTrue(thumbnail_path.exists())
+        self.assertEqual(thumbnail_path.parent, self.media_manager.thumbnails_dir)
+        with Image.open(thumbnail_path) as thumbnail:
+            self.assertEqual(thumbnail.format, "WEBP")
+            self.assertEqual(thumbnail.size, (300, 150))
+
+        # 再次获取应命中缓存，不重新生成
+        mtime = thumbnail_path.stat().st_mtime_ns
+        self.assertEqual(asyncio.run(self.media_manager.get_thumbnail_path(media_id)), thumbnail_path)
+        self.assertEqual(thumbnail_path.stat().st_mtime_ns, mtime)
+
+        # 缩略图被删除后按需重建
+        thumbnail_path.unlink()
+        self.assertTrue(asyncio.run(self.media_manager.get_thumbnail_path(media_id)).exists())
+
+        # 删除媒体时一并删除缩略图
+        self.media_manager.delete_media(media_id)
+        self.assertFalse(thumbnail_path.exists())
+
+        # 非图片媒体没有缩略图
+        audio_id = asyncio.run(self.media_manager.register_from_path(self.test_audio_path, reference_id="audio_ref"))
+        self.assertIsNone(asyncio.run(self.media_manager.get_thumbnail_path(audio_id)))
+
     def test_media_message(self):
         """测试MediaMessage类"""
         # 创建只有URL的媒体消息
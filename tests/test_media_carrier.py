@@ -0,0 +1,93 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.media import MediaManager
+from kirara_ai.media.carrier import MediaCarrierRegistry, MediaCarrierService, MediaReferenceProvider
+
+
+class DummyProvider(MediaReferenceProvider[str]):
+    def get_reference_owner(self, reference_key: str):
+        return f"owner of {reference_key}"
+
+
+class TestMediaCarrierService(unittest.TestCase):
+    """测试媒体载体服务"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.media_dir = os.path.join(self.temp_dir, "media")
+        self.media_manager = MediaManager(media_dir=self.media_dir)
+        self.container = DependencyContainer()
+        self.registry = MediaCarrierRegistry(self.container)
+        self.registry.register("memory", DummyProvider())
+        self.container.register(MediaCarrierRegistry, self.registry)
+        self.service = MediaCarrierService(self.container, self.media_manager)
+
+        self.media_ids = [
+            asyncio.run(self.media_manager.register_from_data(f"file {i}".encode(), format="plain"))
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        self.media_manager.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_reference_maps_to_multiple_media(self):
+        """测试一个引用键关联多个媒体"""
+        self.service.register_references(self.media_ids, "memory", "scope1")
+        self.service.register_reference(self.media_ids[0], "memory", "scope2")
+
+        media = self.service.get_media_by_reference("memory", "scope1")
+        self.assertEqual({m.media_id for m in media}, set(self.media_ids))
+        self.assertEqual(
+            set(self.service.get_references_by_media(self.media_ids[0])),
+            {("memory", "scope1"), ("memory", "scope2")},
+        )
+        self.assertEqual(self.service.get_reference_owner("memory:scope1"), "owner of scope1")
+
+        self.service.remove_reference(self.media_ids[1], "memory", "scope1")
+        media = self.service.get_media_by_reference("memory", "scope1")
+        self.assertEqual({m.media_id for m in media}, {self.media_ids[0], self.media_ids[2]})
+
+    def test_register_existing_reference_is_noop(self):
+        """测试重复注册引用不会重复写入元数据"""
+        self.service.register_reference(self.media_ids[0], "memory", "scope1")
+        metadata_path = os.path.join(self.media_dir, "metadata", f"{self.media_ids[0]}.json")
+        mtime = os.stat(metadata_path).st_mtime_ns
+        self.service.register_reference(self.media_ids[0], "memory", "scope1")
+        self.assertEqual(os.stat(metadata_path).st_mtime_ns, mtime)
+
+    def test_register_missing_media(self):
+        """测试注册不存在的媒体"""
+        with self.assertRaises(ValueError):
+            self.service.register_references([self.media_ids[0], "missing"], "memory", "scope1")
+
+    def test_index_rebuilt_from_metadata(self):
+        """测试引用索引从持久化的元数据中恢复"""
+        self.service.register_references(self.media_ids[:2], "memory", "scope1")
+        reloaded_manager = MediaManager(media_dir=self.media_dir)
+        service = MediaCarrierService(self.container, reloaded_manager)
+        media = service.get_media_by_reference("memory", "scope1")
+        self.assertEqual({m.media_id for m in media}, set(self.media_ids[:2]))
+
+    def test_deleted_media_is_pruned(self):
+        """测试媒体被删除后不会再通过引用返回"""
+        self.service.register_references(self.media_ids, "memory", "scope1")
+        self.media_manager.delete_media(self.media_ids[0])
+        media = self.service.get_media_by_reference("memory", "scope1")
+        self.assertEqual({m.media_id for m in media}, set(self.media_ids[1:]))
+        self.assertEqual(self.service.get_references_by_media(self.media_ids[0]), [])
+
+    def test_cleanup_orphaned_references(self):
+        """测试清理提供者已不存在的引用"""
+        self.service.register_references(self.media_ids[:2], "removed_plugin", "key")
+        self.service.register_reference(self.media_ids[2], "memory", "scope1")
+        self.registry.unregister("removed_plugin")
+
+        self.assertEqual(self.service.cleanup_orphaned_references(), 2)
+        self.assertEqual(self.service.get_media_by_reference("removed_plugin", "key"), [])
+        self.assertEqual(len(self.service.get_media_by_reference("memory", "scope1")), 1)
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from kirara_ai.media.downloader import DownloadError, MediaDownloader
+
+PAYLOAD = b"\x89PNG\r\n\x1a\n" + b"0" * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    flaky_failures = 0
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            if self.path == "/flaky" and cls.flaky_failures > 0:
+                cls.flaky_failures -= 1
+                self._reply(503, b"")
+            elif self.path == "/missing":
+                self._reply(404, b"")
+            elif self.path == "/slow":
+                threading.Event().wait(0.1)
+                self._reply(200, PAYLOAD)
+            else:
+                self._reply(200, PAYLOAD)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_download_reuses_session(server_url):
+    downloader = MediaDownloader()
+    assert await downloader.download(f"{server_url}/a.png") == PAYLOAD
+    session = downloader._get_loop_state().session
+    assert await downloader.download(f"{server_url}/b.png") == PAYLOAD
+    assert downloader._get_loop_state().session is session
+    await downloader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_download_retries_transient_errors(server_url):
+    downloader = MediaDownloader(backoff_base=0.01)
+    _Handler.flaky_failures = 2
+    assert await downloader.download(f"{server_url}/flaky") == PAYLOAD
+
+    _Handler.flaky_failures = 5
+    with pytest.raises(DownloadError):
+        await downloader.download(f"{server_url}/flaky")
+    _Handler.flaky_failures = 0
+    await downloader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_download_does_not_retry_client_errors(server_url):
+    downloader = MediaDownloader(backoff_base=10)
+    with pytest.raises(DownloadError) as exc_info:
+        await asyncio.wait_for(downloader.download(f"{server_url}/missing"), timeout=5)
+    assert not exc_info.value.retryable
+    await downloader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_download_size_limit(server_url):
+    downloader = MediaDownloader(max_size=100)
+    with pytest.raises(DownloadError, match="size limit"):
+        await downloader.download(f"{server_url}/big.png")
+    await downloader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_download_per_host_limit(server_url):
+    downloader = MediaDownloader(per_host_limit=2)
+    _Handler.max_active = 0
+    results = await asyncio.gather(*[downloader.download(f"{server_url}/slow") for _ in range(6)])
+    assert results == [PAYLOAD] * 6
+    assert _Handler.max_active <= 2
+    await downloader.aclose()
+
+
+def test_download_sync(server_url):
+    downloader = MediaDownloader()
+    assert downloader.download_sync(f"{server_url}/a.png") == PAYLOAD
+    downloader.close()
@@ -101,4 +101,28 @@ async def test_media_element_errors():
         with patch('curl_cffi.AsyncSession.get') as mock_get:
             mock_get.side_effect = ValueError("Mocked network error")
             media = ImageMessage(url="https://valid-url-but-will-fail.com/image.jpg")
-            await media.get_data()  # 模拟网络请求失败
\ No newline at end of file
+            await media.get_data()  # 模拟网络请求失败
+@pytest.mark.asyncio
+async def test_media_element_lazy_registration():
+    # 构造时不注册，首次需要时在当前事件循环中注册
+    media = ImageMessage(path=TEST_RESOURCE_PATH)
+    assert not media.registered
+    with patch("threading.Thread") as mock_thread:
+        data = await media.get_data()
+        created = await ImageMessage.create(path=TEST_RESOURCE_PATH)
+    mock_thread.assert_not_called()
+    assert media.registered
+    assert data is not None
+    assert created.registered
+    assert created.media_id == media.media_id
+
+    with pytest.raises(ValueError):
+        await ImageMessage.create()
+
+
+def test_media_element_sync_access():
+    # 同步上下文中首次访问 media_id 时阻塞注册
+    media = ImageMessage(path=TEST_RESOURCE_PATH)
+    assert not media.registered
+    assert media.media_id
+    assert media.registered
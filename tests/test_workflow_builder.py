@@ -9,6 +9,7 @@ from kirara_ai.workflow.core.block import Block
 from kirara_ai.workflow.core.block.input_output import Input, Output
 from kirara_ai.workflow.core.block.registry import BlockRegistry
 from kirara_ai.workflow.core.workflow.builder import WorkflowBuilder
+from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
 
 
 # 测试用的 Block 类
@@ -207,3 +208,38 @@ class TestWorkflowBuilder:
             warnings.simplefilter("error")
             builder = WorkflowBuilder("test_workflow").use(SimpleInputBlock)
             builder.save_to_yaml(yaml_path, container)
+
+    def test_build_reuses_template(self, container):
+        """测试重复构建复用模板，每次得到绑定到各自容器的独立 block"""
+        builder = (
+            WorkflowBuilder("test_workflow")
+            .use(SimpleInputBlock, name="input1", param1="test")
+            .chain(SimpleProcessBlock, name="process1", multiplier=2)
+        )
+        first = builder.build(container)
+        other_container = DependencyContainer(container)
+        second = builder.build(other_container)
+
+        assert first.template is second.template is builder._template
+        assert first.blocks[0] is not second.blocks[0]
+        assert first.blocks[0].container is container
+        assert second.blocks[0].container is other_container
+        assert second.wires[0].source_block is second.blocks[0]
+        assert second.wires[0].target_block is second.blocks[1]
+
+        # 修改结构后重新构建模板
+        builder.chain(SimpleProcessBlock, name="process2", multiplier=3)
+        assert len(builder.build(container).blocks) == 3
+
+    def test_registry_reloads_modified_yaml(self, container, yaml_path):
+        """测试 YAML 文件修改后注册表重新加载工作流"""
+        WorkflowBuilder("test_workflow").use(SimpleInputBlock, name="input1", param1="old").save_to_yaml(yaml_path, container)
+        registry = WorkflowRegistry(container)
+        registry.register("test", "workflow", WorkflowBuilder.load_from_yaml(yaml_path, container))
+        assert registry.get_workflow("test:workflow", container).blocks[0].param1 == "old"
+
+        WorkflowBuilder("test_workflow").use(SimpleInputBlock, name="input1", param1="new").save_to_yaml(yaml_path, container)
+        os.utime(yaml_path, (0, 0))
+        workflow = registry.get_workflow("test:workflow", container)
+        assert workflow.blocks[0].param1 == "new"
+        assert workflow.id == "test:workflow"
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import unittest
+
+from kirara_ai.tracing.broadcast import CoalescingQueue, WebSocketBroadcaster
+
+
+class TestCoalescingQueue(unittest.TestCase):
+    """WebSocket客户端队列测试"""
+
+    def test_drop_oldest_when_full(self):
+        """测试队列已满时丢弃最旧的消息"""
+        queue = CoalescingQueue(maxsize=3)
+        for i in range(5):
+            queue.put_nowait({"type": "log", "data": i})
+
+        self.assertEqual(queue.dropped, 2)
+        self.assertEqual([queue.get_nowait()["data"] for _ in range(3)], [2, 3, 4])
+
+    def test_coalesce_same_trace(self):
+        """测试同一追踪记录未发送的消息被合并"""
+        queue = CoalescingQueue(maxsize=10)
+        queue.put_nowait({"type": "new", "data": {"trace_id": "a", "status": "pending"}})
+        queue.put_nowait({"type": "update", "data": {"trace_id": "a", "status": "success"}})
+        queue.put_nowait({"type": "new", "data": {"trace_id": "b", "status": "pending"}})
+
+        self.assertEqual(queue.qsize(), 2)
+        first = queue.get_nowait()
+        self.assertEqual(first["type"], "new")
+        self.assertEqual(first["data"]["status"], "success")
+
+        # 已取出的消息不再参与合并
+        queue.put_nowait({"type": "update", "data": {"trace_id": "a", "status": "failed"}})
+        self.assertEqual(queue.qsize(), 2)
+
+
+class TestWebSocketBroadcaster(unittest.IsolatedAsyncioTestCase):
+    """WebSocket广播器测试"""
+
+    async def test_broadcast_from_other_thread(self):
+        """测试其他线程的消息被合并后投递到事件循环"""
+        broadcaster = WebSocketBroadcaster(batch_interval=0.01)
+        queue = broadcaster.register()
+
+        def produce():
+            for i in range(50):
+                broadcaster.broadcast({"type": "update", "data": {"trace_id": f"t{i % 5}", "seq": i}})
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        thread.join()
+        # 尚未到达投递时间，消息仍在缓冲区中
+        self.assertTrue(queue.empty())
+
+        await asyncio.sleep(0.05)
+        messages = [queue.get_nowait() for _ in range(queue.qsize())]
+        self.assertEqual(len(messages), 5)
+        self.assertEqual({message["data"]["seq"] for message in messages}, set(range(45, 50)))
+
+    async def test_close(self):
+        """测试关闭时通知所有客户端"""
+        broadcaster = WebSocketBroadcaster(max_queue_size=1)
+        queue = broadcaster.register()
+        broadcaster.broadcast({"type": "log", "data": 1})
+        broadcaster.close()
+
+        self.assertIsNone(await queue.get())
+        self.assertEqual(broadcaster.clients, [])
@@ -83,6 +83,30 @@ class TestTracerBase(TracingTestBase, IsolatedAsyncioTestCase):
         self.assertEqual(len(traces), 1)
         self.assertEqual(traces[0].trace_id, "test-trace-0")
 
+    def test_get_traces_with_cursor(self):
+        """测试键集分页"""
+        request_time = datetime.now()
+        for i in range(7):
+            trace = TestTraceRecord()
+            trace.trace_id = f"test-trace-{i}"
+            # 部分记录时间相同，依赖 id 保证翻页稳定
+            trace.request_time = request_time.replace(second=i // 2)
+            self.tracer.save_trace_record(trace)
+
+        seen = []
+        traces, total = self.tracer.get_traces(page_size=3)
+        while traces:
+            seen.extend(trace.trace_id for trace in traces)
+            cursor = self.tracer.encode_cursor(traces[-1])
+            traces, total = self.tracer.get_traces(page_size=3, cursor=cursor)
+            self.assertEqual(total, 7)
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(seen, [f"test-trace-{i}" for i in reversed(range(7))])
+
+        with self.assertRaises(ValueError):
+            self.tracer.get_traces(cursor="invalid")
+
     def test_get_recent_traces(self):
         """测试获取最近的追踪记录"""
         # 创建一些测试数据
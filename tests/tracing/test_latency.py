@@ -0,0 +1,78 @@
+import random
+import unittest
+
+from kirara_ai.tracing.histogram import LatencyHistogram
+from kirara_ai.tracing.llm_tracer import LLMTracer
+from tests.tracing.test_base import TracingTestBase
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """延迟直方图测试"""
+
+    def test_quantile_accuracy(self):
+        """测试分位数的相对误差"""
+        rng = random.Random(42)
+        values = sorted(rng.lognormvariate(6, 1) for _ in range(10000))
+        histogram = LatencyHistogram(relative_accuracy=0.01)
+        for value in values:
+            histogram.record(value)
+
+        for q in (0.5, 0.9, 0.99):
+            expected = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(histogram.quantile(q), expected, delta=expected * 0.02)
+        self.assertEqual(histogram.count, 10000)
+        self.assertEqual(histogram.max, values[-1])
+
+    def test_merge_and_serialize(self):
+        """测试合并与序列化"""
+        a = LatencyHistogram()
+        b = LatencyHistogram()
+        for value in range(1, 101):
+            (a if value % 2 else b).record(value)
+        a.merge(LatencyHistogram.from_dict(b.to_dict()))
+        self.assertEqual(a.count, 100)
+        self.assertAlmostEqual(a.quantile(0.5), 50, delta=1)
+        self.assertIsNone(LatencyHistogram().quantile(0.5))
+
+
+class TestLatencyRecorder(TracingTestBase):
+    """LLM延迟统计测试"""
+
+    def setUp(self):
+        super().setUp()
+        self.tracer = LLMTracer(self.container)
+        self.tracer.initialize()
+
+    def tearDown(self):
+        self.tracer.shutdown()
+        super().tearDown()
+
+    def test_percentiles_by_backend(self):
+        """测试按后端统计延迟分位数"""
+        for i in range(1, 101):
+            self.tracer.latency.record("model-a", "fast", i)
+            self.tracer.latency.record("model-b", "slow", i * 10)
+
+        items = {item["name"]: item for item in self.tracer.get_latency_percentiles("backend")}
+        self.assertEqual(items["fast"]["count"], 100)
+        self.assertAlmostEqual(items["fast"]["p50"], 50, delta=1)
+        self.assertAlmostEqual(items["slow"]["p99"], 990, delta=20)
+        self.assertEqual(len(self.tracer.get_latency_percentiles("model")), 2)
+        with self.assertRaises(ValueError):
+            self.tracer.get_latency_percentiles("unknown")
+
+    def test_histograms_persisted(self):
+        """测试直方图在重启后恢复"""
+        request = self.create_test_request()
+        response = self.create_test_response()
+        trace_id = self.tracer.start_request_tracking("test-backend", request)
+        self.tracer.complete_request_tracking(trace_id, request, response)
+
+        self.tracer.shutdown()
+        self.tracer = LLMTracer(self.container)
+        self.tracer.initialize()
+
+        items = self.tracer.get_latency_percentiles("backend")
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["name"], "test-backend")
+        self.assertEqual(items[0]["count"], 1)
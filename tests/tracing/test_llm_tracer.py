@@ -1,7 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from kirara_ai.events.tracing import LLMRequestCompleteEvent, LLMRequestFailEvent, LLMRequestStartEvent
 from kirara_ai.tracing import LLMTracer
+from kirara_ai.config.global_config import GlobalConfig
+from kirara_ai.tracing.models import LLMRequestPayload, LLMRequestTrace, LLMTraceRollup
+from kirara_ai.tracing.retention import vacuum
 from tests.tracing.test_base import TracingTestBase
 
 
@@ -140,4 +143,142 @@ class TestLLMTracer(TracingTestBase):
         self.assertTrue(len(stats["backends"]) > 0)
         backend_stat = stats["backends"][0]
         self.assertEqual(backend_stat["backend_name"], "test-backend")
-        self.assertEqual(backend_stat["count"], 3) 
\ No newline at end of file
+        self.assertEqual(backend_stat["count"], 3) 
+    def test_batched_writes(self):
+        """测试事件在后台批量合并写入"""
+        request = self.create_test_request()
+        response = self.create_test_response()
+        trace_ids = []
+        for _ in range(5):
+            trace_id = self.tracer.start_request_tracking("test-backend", request)
+            self.tracer.complete_request_tracking(trace_id, request, response)
+            trace_ids.append(trace_id)
+
+        records, total = self.tracer.get_traces()
+        self.assertEqual(total, 5)
+        self.assertEqual({record.trace_id for record in records}, set(trace_ids))
+        for record in records:
+            self.assertEqual(record.status, "success")
+            self.assertEqual(record.total_tokens, 30)
+
+        detail = self.tracer.get_trace_by_id(trace_ids[0]).to_detail_dict()
+        self.assertEqual(detail["request"]["model"], "test-model")
+        self.assertIsNotNone(detail["response"])
+
+    def test_duplicate_start_does_not_drop_batch(self):
+        """测试批次中存在重复记录时其他记录仍能写入"""
+        request = self.create_test_request()
+        trace_id = self.tracer.start_request_tracking("test-backend", request)
+        self.tracer.writer.flush()
+        self.event_bus.post(LLMRequestStartEvent(
+            trace_id=trace_id, model_id="test-model", backend_name="test-backend", request=request
+        ))
+        other_id = self.tracer.start_request_tracking("test-backend", request)
+
+        self.assertIsNotNone(self.tracer.get_trace_by_id(other_id))
+        self.assertEqual(self.tracer.get_traces()[1], 2)
+
+    def test_ws_broadcast_after_write(self):
+        """测试写入完成后向WebSocket客户端广播"""
+        queue = self.tracer.register_ws_client()
+        request = self.create_test_request()
+        trace_id = self.tracer.start_request_tracking("test-backend", request)
+        self.tracer.fail_request_tracking(trace_id, request, "Test error")
+        self.tracer.writer.flush()
+
+        messages = []
+        while not queue.empty():
+            messages.append(queue.get_nowait())
+        self.assertEqual(messages[0]["type"], "new")
+        self.assertEqual(messages[-1]["data"]["trace_id"], trace_id)
+        self.assertEqual(messages[-1]["data"]["status"], "failed")
+
+    def test_rollups_maintained_incrementally(self):
+        """测试预聚合统计随追踪记录增量更新"""
+        request = self.create_test_request()
+        response = self.create_test_response()
+        for i in range(4):
+            trace_id = self.tracer.start_request_tracking("test-backend", request)
+            if i < 3:
+                self.tracer.complete_request_tracking(trace_id, request, response)
+        self.tracer.writer.flush()
+
+        with self.db_manager.get_session() as session:
+            rollups = session.query(LLMTraceRollup).filter_by(granularity="day").all()
+            self.assertEqual(len(rollups), 1)
+            self.assertEqual(rollups[0].requests, 4)
+            self.assertEqual(rollups[0].success, 3)
+            self.assertEqual(rollups[0].total_tokens, 90)
+            self.assertEqual(rollups[0].duration_count, 3)
+            self.assertEqual(session.query(LLMTraceRollup).filter_by(granularity="hour").count(), 1)
+
+        stats = self.tracer.get_statistics()
+        self.assertEqual(stats["overview"]["pending_requests"], 1)
+        self.assertEqual(stats["daily_stats"][0]["requests"], 4)
+        self.assertEqual(stats["hourly_stats"][0]["tokens"], 90)
+
+        # 重启时未结束的请求被标记为失败，统计同步更新
+        self.tracer.shutdown()
+        self.tracer.initialize()
+        stats = self.tracer.get_statistics()
+        self.assertEqual(stats["overview"]["pending_requests"], 0)
+        self.assertEqual(stats["overview"]["failed_requests"], 1)
+
+    def test_payload_stored_separately(self):
+        """测试请求内容分表压缩存储，并可以早于追踪记录清理"""
+        self.container.resolve(GlobalConfig).tracing.llm_tracing_content = True
+        request = self.create_test_request()
+        response = self.create_test_response()
+        trace_id = self.tracer.start_request_tracking("test-backend", request)
+        self.tracer.complete_request_tracking(trace_id, request, response)
+        self.tracer.writer.flush()
+
+        with self.db_manager.get_session() as session:
+            payload = session.get(LLMRequestPayload, trace_id)
+            self.assertIsNotNone(payload.request_time)
+            # 数据已压缩（zstd 帧或 zlib 流），而不是原始 JSON
+            self.assertNotEqual(payload.request_data[:1], b"{")
+        detail = self.tracer.get_trace_by_id(trace_id).to_detail_dict()
+        self.assertEqual(detail["request"]["messages"][0]["content"][0]["text"], "test message")
+        self.assertEqual(detail["response"]["message"]["content"][0]["text"], "test response")
+
+        # 请求内容的保留时长短于追踪记录时，只清理请求内容
+        self.container.resolve(GlobalConfig).tracing.payload_retention_days = 1
+        with self.db_manager.get_session() as session:
+            session.query(LLMRequestTrace).update({"request_time": datetime.now() - timedelta(days=2)})
+            session.query(LLMRequestPayload).update({"request_time": datetime.now() - timedelta(days=2)})
+            session.commit()
+        self.tracer._clean_old_traces()
+        trace = self.tracer.get_trace_by_id(trace_id)
+        self.assertIsNotNone(trace)
+        self.assertIsNone(trace.to_detail_dict()["request"])
+
+    def test_retention_deletes_in_batches(self):
+        """测试分批清理过期的追踪记录"""
+        config = self.container.resolve(GlobalConfig)
+        config.tracing.retention_batch_size = 10
+        request = self.create_test_request()
+        trace_ids = [self.tracer.start_request_tracking("test-backend", request) for _ in range(30)]
+        self.tracer.writer.flush()
+
+        with self.db_manager.get_session() as session:
+            session.query(LLMRequestTrace).filter(LLMRequestTrace.trace_id.in_(trace_ids[:25])).update(
+                {"request_time": datetime.now() - timedelta(days=40)}
+            )
+            session.commit()
+
+        self.assertEqual(self.tracer._clean_old_traces(), 25)
+        self.assertEqual(self.tracer.get_traces()[1], 5)
+        vacuum(self.db_manager, "incremental")
+
+    def test_mark_pending_as_failed(self):
+        """测试启动时将未结束的请求标记为失败"""
+        request = self.create_test_request()
+        trace_id = self.tracer.start_request_tracking("test-backend", request)
+        self.tracer.writer.flush()
+
+        self.assertEqual(self.tracer._mark_pending_as_failed(), 1)
+        trace = self.tracer.get_trace_by_id(trace_id)
+        self.assertEqual(trace.status, "failed")
+        self.assertEqual(trace.error, "Incomplete request")
+        self.assertEqual(self.tracer._mark_pending_as_failed(), 0)
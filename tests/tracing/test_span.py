@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from kirara_ai.config.global_config import GlobalConfig, TracingConfig
+from kirara_ai.events.tracing import SpanEndEvent
+from kirara_ai.tracing.otlp import OTLPJsonExporter, build_export_request
+from kirara_ai.tracing.span import SPAN_BLOCK, SPAN_LLM, SPAN_WORKFLOW, current_span, start_span
+from kirara_ai.tracing.span_tracer import SpanTracer
+from kirara_ai.workflow.core.block import Block, Input, Output
+from kirara_ai.workflow.core.block.registry import BlockRegistry
+from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
+from kirara_ai.workflow.core.workflow import Wire, Workflow
+from tests.tracing.test_base import TracingTestBase
+from tests.utils.test_block_registry import create_test_block_registry
+
+
+class SourceBlock(Block):
+    name = "SourceBlock"
+    outputs = {"text": Output(name="text", label="文本", data_type=str, description="Text")}
+
+    def execute(self, **kwargs):
+        return {"text": "hello"}
+
+
+class CallBlock(Block):
+    """模拟在区块内发起 LLM 调用"""
+    name = "CallBlock"
+    inputs = {"text": Input(name="text", label="文本", data_type=str, description="Text")}
+    outputs = {"text": Output(name="text", label="文本", data_type=str, description="Text")}
+
+    def execute(self, text: str, **kwargs):
+        with start_span("llm test-model", SPAN_LLM, {"llm.model": "test-model"}):
+            return {"text": text.upper()}
+
+
+class TestSpanContext(unittest.TestCase):
+    """span 上下文传播测试"""
+
+    def test_nested_spans(self):
+        """测试子 span 继承链路和事件总线"""
+        ended = []
+
+        class Bus:
+            def post(self, event):
+                ended.append(event.span)
+
+        with start_span("root", SPAN_WORKFLOW, event_bus=Bus()) as root:  # type: ignore[arg-type]
+            with start_span("child", SPAN_BLOCK) as child:
+                self.assertIs(current_span(), child)
+            self.assertIs(current_span(), root)
+
+        self.assertIsNone(current_span())
+        self.assertEqual([span.name for span in ended], ["child", "root"])
+        self.assertEqual(child.trace_id, root.trace_id)
+        self.assertEqual(child.parent_span_id, root.span_id)
+        self.assertEqual(child.status, "ok")
+
+    def test_error_and_unrecorded(self):
+        """测试异常记录，以及没有事件总线时不发布"""
+        with self.assertRaises(ValueError):
+            with start_span("orphan", SPAN_BLOCK) as span:
+                raise ValueError("boom")
+        self.assertEqual(span.status, "error")
+        self.assertEqual(span.status_message, "boom")
+        self.assertIsNotNone(span.duration_ms)
+
+    def test_otlp_export(self):
+        """测试导出 OTLP JSON 文件"""
+        with start_span("root", SPAN_WORKFLOW, {"count": 3}) as root:
+            with start_span("llm", SPAN_LLM):
+                pass
+
+        request = build_export_request([root])
+        otlp_span = request["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(otlp_span["traceId"], root.trace_id)
+        self.assertEqual(otlp_span["status"], {"code": 1})
+        self.assertIn({"key": "count", "value": {"intValue": "3"}}, otlp_span["attributes"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "spans.jsonl")
+            OTLPJsonExporter(path=path).export([root])
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.loads(f.readline()), request)
+
+
+class TestSpanTracer(TracingTestBase):
+    """链路追踪器测试"""
+
+    def setUp(self):
+        super().setUp()
+        self.container.register(BlockRegistry, create_test_block_registry())
+        self.tracer = SpanTracer(self.container)
+        self.tracer.initialize()
+
+    def tearDown(self):
+        self.tracer.shutdown()
+        super().tearDown()
+
+    def _run_workflow(self):
+        source = SourceBlock(name="source")
+        call = CallBlock(name="call")
+        workflow = Workflow(
+            name="test", id="test:span", blocks=[source, call],
+            wires=[Wire(source_block=source, source_output="text", target_block=call, target_input="text")],
+        )
+        self.container.register(Workflow, workflow)
+        asyncio.run(WorkflowExecutor(self.container).run())
+
+    def test_workflow_spans(self):
+        """测试工作流执行生成嵌套的 span，区块线程内的调用挂在区块下"""
+        self._run_workflow()
+        records, total = self.tracer.get_traces()
+        self.assertEqual(total, 4)
+
+        spans = {record.name: record for record in self.tracer.get_trace_spans(records[0].otel_trace_id)}
+        self.assertEqual(len(spans), 4)
+        workflow_span = spans["workflow test:span"]
+        self.assertIsNone(workflow_span.parent_span_id)
+        self.assertEqual(spans["test:span:call"].parent_span_id, workflow_span.trace_id)
+        self.assertEqual(spans["llm test-model"].parent_span_id, spans["test:span:call"].trace_id)
+        self.assertEqual(spans["test:span:call"].to_dict()["attributes"]["block.name"], "call")
+
+        summary = {item["name"]: item for item in self.tracer.get_span_summary()}
+        self.assertEqual(summary["test:span:source"]["count"], 1)
+        self.assertIsNone(summary["test:span:source"]["share"])
+
+    def test_disabled(self):
+        """测试关闭链路追踪后不再记录"""
+        self.tracer.shutdown()
+        self.container.register(GlobalConfig, GlobalConfig(tracing=TracingConfig(span_tracing=False)))
+        self.tracer = SpanTracer(self.container)
+        self.tracer.initialize()
+        self.assertFalse(self.event_bus._listeners.get(SpanEndEvent))
+
+        self._run_workflow()
+        self.assertEqual(self.tracer.get_traces()[1], 0)
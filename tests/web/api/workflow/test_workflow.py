@@ -6,6 +6,7 @@ from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.web.app import WebServer
 from kirara_ai.workflow.core.block import Block, BlockRegistry
 from kirara_ai.workflow.core.block.input_output import Input, Output
+from kirara_ai.workflow.core.execution.profiler import WorkflowProfiler
 from kirara_ai.workflow.core.workflow import WorkflowRegistry
 from kirara_ai.workflow.core.workflow.builder import WorkflowBuilder
 from tests.utils.auth_test_utils import auth_headers, setup_auth_service  # noqa
@@ -84,6 +85,9 @@ def app():
     registry = WorkflowRegistry(container)
     registry.register(TEST_GROUP_ID, TEST_WORKFLOW_ID, builder)
     container.register(WorkflowRegistry, registry)
+    profiler = WorkflowProfiler(container)
+    profiler.record(f"{TEST_GROUP_ID}:{TEST_WORKFLOW_ID}", "llm", "test:llm", {"wall_ms": 12.5, "queue_wait_ms": 0.5, "cpu_ms": 1.0})
+    container.register(WorkflowProfiler, profiler)
 
     web_server = WebServer(container)
     container.register(WebServer, web_server)
@@ -210,3 +214,23 @@ class TestWorkflow:
         assert "error" not in data
         assert "message" in data
         assert data["message"] == "Workflow deleted successfully"
+
+    @pytest.mark.asyncio
+    async def test_workflow_profile(self, test_client, auth_headers):
+        """测试获取工作流的性能统计"""
+        full_id = f"{TEST_GROUP_ID}:{TEST_WORKFLOW_ID}"
+
+        response = test_client.get(
+            f"/backend-api/api/workflow/{TEST_GROUP_ID}/{TEST_WORKFLOW_ID}/profile",
+            headers=auth_headers,
+        )
+        data = response.json()
+        assert data["blocks"][0]["name"] == "llm"
+        assert data["blocks"][0]["wall_ms"]["avg"] == 12.5
+        assert data["block_types"][0]["block_type"] == "test:llm"
+
+        response = test_client.get(
+            f"/backend-api/api/workflow/{TEST_GROUP_ID}/{TEST_WORKFLOW_ID}/profile?format=collapsed",
+            headers=auth_headers,
+        )
+        assert response.text == f"{full_id};test:llm;llm 12500"
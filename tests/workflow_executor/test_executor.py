@@ -1,11 +1,13 @@
 import pytest
 
+from kirara_ai.config.global_config import GlobalConfig, ProfilingConfig
 from kirara_ai.events.event_bus import EventBus
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.workflow.core.block import Block, Input, Output
 from kirara_ai.workflow.core.block.registry import BlockRegistry
 from kirara_ai.workflow.core.execution.exceptions import BlockExecutionFailedException
 from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
+from kirara_ai.workflow.core.execution.profiler import WorkflowProfiler
 from kirara_ai.workflow.core.workflow import Wire, Workflow
 from tests.utils.test_block_registry import create_test_block_registry
 
@@ -128,6 +130,28 @@ async def test_executor_run():
     assert result["output1"]["result"] == "TEST_INPUT"
 
 
+@pytest.mark.asyncio
+async def test_executor_with_profiler():
+    """Test workflow executor records per-block profile when profiling is enabled."""
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, EventBus())
+    container.register(BlockRegistry, test_registry)
+    container.register(GlobalConfig, GlobalConfig(profiling=ProfilingConfig(enabled=True, memory_sample_interval=1)))
+    profiler = WorkflowProfiler(container)
+    container.register(WorkflowProfiler, profiler)
+    container.register(Workflow, workflow)
+    await WorkflowExecutor(container).run()
+
+    profile = profiler.get_profile("test_workflow")
+    blocks = {item["name"]: item for item in profile["blocks"]}
+    assert set(blocks) == {"input1", "process1", "output1"}
+    assert blocks["process1"]["count"] == 1
+    assert blocks["process1"]["block_type"] == "process:test"
+    assert blocks["process1"]["alloc_bytes"]["avg"] is not None
+    assert len(profiler.export_collapsed("test_workflow").splitlines()) == 3
+
+
 @pytest.mark.asyncio
 async def test_executor_with_failing_block():
     """Test workflow executor with a failing block."""